@@ -0,0 +1,104 @@
+import asyncio
+import concurrent.futures
+import functools
+import time
+import frame_acquisition
+
+'''
+asyncio runtime for BaselineRacer: image acquisition, odometry/control and race log monitoring as coroutines
+on one event loop, the RPCs of its single MultirotorClient go through a single-worker executor
+'''
+
+IMAGE_PERIOD = 0.03
+ODOMETRY_PERIOD = 0.5
+RPC_QUEUE_SIZE = 8
+
+
+class AsyncRacerRuntime(object):
+    def __init__(self, racer, log_monitor=None, image_period=IMAGE_PERIOD, odometry_period=ODOMETRY_PERIOD):
+        self.racer = racer
+        self.log_monitor = log_monitor
+        self.image_period = image_period
+        self.odometry_period = odometry_period
+
+        # the racer's callbacks only ever run on the RPC thread, so a single client is enough
+        racer.airsim_client_images = racer.airsim_client
+        racer.frame_acquisition.airsim_client = racer.airsim_client
+        racer.airsim_client_odom = racer.airsim_client
+
+        self.rpc_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="rpc")
+        self.inference_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        # bounds the number of RPCs waiting for the RPC thread
+        self.rpc_slots = None
+        self.loop = None
+
+    async def rpc(self, fn, *args, **kwargs):
+        async with self.rpc_slots:
+            return await self.loop.run_in_executor(self.rpc_executor, functools.partial(fn, *args, **kwargs))
+
+    async def sleep_until(self, deadline, period):
+        '''
+            fixed rate like rate_timer.RateTimer, the ticks missed by an overrun are skipped
+            returns the next deadline
+        '''
+        deadline += period
+        now = self.loop.time()
+        if deadline < now:
+            deadline += ((now - deadline) // period + 1) * period
+        await asyncio.sleep(deadline - now)
+        return deadline
+
+    async def image_loop(self):
+        deadline = self.loop.time()
+        while self.racer.is_image_thread_active:
+            capture_time = time.perf_counter()
+            response = await self.rpc(self.racer.frame_acquisition.get_response)
+            self.racer.latency.record("simGetImages", capture_time)
+            img_rgb = self.racer.frame_acquisition.decode(response)
+            if img_rgb is not None:
+                # the acquisition never waits for the inference, a frame not picked up in time is replaced
+                self.racer.frame_slot.put(img_rgb, capture_time, frame_acquisition.get_camera_pose(response))
+            deadline = await self.sleep_until(deadline, self.image_period)
+
+    async def odometry_loop(self):
+        '''
+            getMultirotorState, the termination checks and the moveOnSpline command of a tick
+            run back to back on the RPC thread, so commands are dispatched in tick order
+        '''
+        deadline = self.loop.time()
+        while self.racer.is_odometry_thread_active:
+            await self.rpc(self.racer.odometry_callback)
+            deadline = await self.sleep_until(deadline, self.odometry_period)
+
+    async def main(self):
+        self.loop = asyncio.get_event_loop()
+        self.rpc_slots = asyncio.Semaphore(RPC_QUEUE_SIZE)
+        self.racer.is_image_thread_active = True
+        self.racer.is_odometry_thread_active = True
+        self.racer.termination_evaluator.start_evaluator_thread()
+
+        tasks = [asyncio.ensure_future(self.image_loop()), asyncio.ensure_future(self.odometry_loop()),
+                 self.loop.run_in_executor(self.inference_executor, self.racer.inference_loop)]
+        if self.log_monitor is not None:
+            tasks.append(asyncio.ensure_future(self.log_monitor.watch_async(lambda: self.racer.is_odometry_thread_active)))
+        try:
+            # the race is over when the odometry loop returns, the other loops are cancelled
+            await tasks[1]
+        finally:
+            self.racer.is_image_thread_active = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.racer.termination_evaluator.stop_evaluator_thread()
+
+    def run(self):
+        '''
+            blocks until the racer clears is_odometry_thread_active
+        '''
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.main())
+        finally:
+            loop.close()
+            self.rpc_executor.shutdown(wait=True)
+            self.inference_executor.shutdown(wait=True)
@@ -6,6 +6,7 @@ import time
 import utils
 import numpy as np
 import math
+import rate_timer
 
 # drone_name should match the name in ~/Document/AirSim/settings.json
 class BaselineRacer(object):
@@ -32,6 +33,9 @@ class BaselineRacer(object):
         self.is_image_thread_active = False
         self.is_odometry_thread_active = False
 
+        self.image_callback_timer = None
+        self.odometry_callback_timer = None
+
         self.MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS = 10 # see https://github.com/microsoft/AirSim-NeurIPS2019-Drone-Racing/issues/38
 
     # loads desired level
@@ -206,14 +210,12 @@ class BaselineRacer(object):
 
     # call task() method every "period" seconds. 
     def repeat_timer_image_callback(self, task, period):
-        while self.is_image_thread_active:
-            task()
-            time.sleep(period)
+        self.image_callback_timer = rate_timer.RateTimer(task, period)
+        self.image_callback_timer.run(lambda: self.is_image_thread_active)
 
     def repeat_timer_odometry_callback(self, task, period):
-        while self.is_odometry_thread_active:
-            task()
-            time.sleep(period)
+        self.odometry_callback_timer = rate_timer.RateTimer(task, period)
+        self.odometry_callback_timer.run(lambda: self.is_odometry_thread_active)
 
     def start_image_callback_thread(self):
         if not self.is_image_thread_active:
@@ -226,6 +228,7 @@ class BaselineRacer(object):
             self.is_image_thread_active = False
             self.image_callback_thread.join()
             print("Stopped image callback thread.")
+            print(f"    image callback timer: {self.image_callback_timer}")
 
     def start_odometry_callback_thread(self):
         if not self.is_odometry_thread_active:
@@ -238,6 +241,7 @@ class BaselineRacer(object):
             self.is_odometry_thread_active = False
             self.odometry_callback_thread.join()
             print("Stopped odometry callback thread.")
+            print(f"    odometry callback timer: {self.odometry_callback_timer}")
 
 def main(args):
     # ensure you have generated the neurips planning settings file by running python generate_settings_file.py
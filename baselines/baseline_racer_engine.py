@@ -0,0 +1,728 @@
+from argparse import ArgumentParser
+import airsimneurips as airsim
+import threading
+import time
+import utils
+import numpy as np
+import math
+import os
+import copy
+import log_monitor
+import rate_timer
+import termination
+import latency
+import command_cache
+import gate_tracker
+import gate_poses
+import track_cache
+import trajectory
+import iteration_pipeline
+import frame_viewer
+import detection_pipeline
+import frame_acquisition
+import gate_roi
+import gate_box_tracker
+import async_runtime
+import racer_strategies
+
+## for gate detection
+import tensorflow as tf
+from object_detection.utils import label_map_util
+
+'''
+The racer shared by all the hyperparameter optimizers, the optimizer is a racer_strategies.RacerStrategy
+
+    python baseline_racer_engine.py --strategy gd
+    python baseline_racer_engine.py --strategy BO --log_file_name BO_no_slower_09.txt
+
+baseline_racer_gd.py, _po.py, _random_search.py, _baseline_GA.py and BO.py run it with their own defaults
+'''
+
+'''                                  MAP:  Qual_Tier_2
+    Gate idx 0 1    2      3 4         5                    6        7 8 9 10 11 12 13
+                 going up         big left turn --------- big gate
+'''
+
+FINISH_GATE_IDX = racer_strategies.FINISH_GATE_IDX
+
+## for gate detection
+
+MODEL_NAME = 'inference_graph'
+CWD_PATH = os.getcwd()
+PATH_TO_CKPT = os.path.join(CWD_PATH, MODEL_NAME, 'frozen_inference_graph.pb')
+PATH_TO_LABELS = os.path.join(CWD_PATH, 'training', 'labelmap.pbtxt')
+
+NUM_CLASSES = 1
+
+## Load the label map.
+
+label_map = label_map_util.load_labelmap(PATH_TO_LABELS)
+categories = label_map_util.convert_label_map_to_categories(label_map, max_num_classes=NUM_CLASSES,
+                                                            use_display_name=True)
+category_index = label_map_util.create_category_index(categories)
+
+# Load the Tensorflow model into memory.
+detection_graph = tf.Graph()
+with detection_graph.as_default():
+    od_graph_def = tf.GraphDef()
+    with tf.gfile.GFile(PATH_TO_CKPT, 'rb') as fid:
+        serialized_graph = fid.read()
+        od_graph_def.ParseFromString(serialized_graph)
+        tf.import_graph_def(od_graph_def, name='')
+    config = tf.ConfigProto()
+    # config.gpu_options.allow_growth = True
+    config.gpu_options.per_process_gpu_memory_fraction = 0.7
+    sess = tf.Session(graph=detection_graph, config=config)
+
+# Define input and output tensors (i.e. data) for the object detection classifier
+
+# Input tensor is the image
+image_tensor = detection_graph.get_tensor_by_name('image_tensor:0')
+
+# Output tensors are the detection boxes, scores, and classes
+# Each box represents a part of the image where a particular object was detected
+detection_boxes = detection_graph.get_tensor_by_name('detection_boxes:0')
+
+# Each score represents level of confidence for each of the objects.
+# The score is shown on the result image, together with the class label.
+detection_scores = detection_graph.get_tensor_by_name('detection_scores:0')
+detection_classes = detection_graph.get_tensor_by_name('detection_classes:0')
+
+# Number of objects detected
+num_detections = detection_graph.get_tensor_by_name('num_detections:0')
+
+DETECTION_THRESHOLD = 0.97
+
+
+def L2_distance(l1, l2):
+    ''' l1 = list1, l2 = list2
+    '''
+    return math.sqrt((l1[0] - l2[0])**2 + (l1[1] - l2[1])**2 + (l1[2] - l2[2])**2)
+
+def L2_norm(l):
+    ''' l = list
+    '''
+    return math.sqrt((l[0])**2 + (l[1])**2 + (l[2])**2)
+
+def convex_combination(vec1, vec2, eta):
+    ''' 0 <= eta <= 1, indicating how close it is to the vec2
+        e.g. eta = 1, vec_result = vec2
+        eta = 0, vec_result = vec1
+    '''
+    vec_result = airsim.Vector3r(0,0,0)
+    vec_result.x_val = (1-eta) * vec1.x_val + eta * vec2.x_val
+    vec_result.y_val = (1-eta) * vec1.y_val + eta * vec2.y_val
+    vec_result.z_val = (1-eta) * vec1.z_val + eta * vec2.z_val
+    return vec_result
+
+# drone_name should match the name in ~/Document/AirSim/settings.json
+class BaselineRacer(object):
+    '''
+        strategy: racer_strategies.RacerStrategy, chooses the hyperparameters of every race
+    '''
+    def __init__(self, strategy, drone_name="drone_1", viz_traj=True, viz_traj_color_rgba=[1.0, 0.0, 0.0, 1.0], viz_image_cv2=True,
+                 image_width=None, image_height=None, roi_size=None, detect_every=gate_box_tracker.DETECT_EVERY):
+        ## gate idx trackers
+        self.last_gate_passed_idx = -1
+        self.last_gate_idx_moveOnSpline_was_called_on = -1
+        self.next_gate_idx = 0
+        self.next_next_gate_idx = 1
+        # position at the previous odometry sample, gates are tracked along the path in between
+        self.prev_xyz = None
+
+        self.drone_name = drone_name
+        self.gate_poses_ground_truth = None
+        self.gate_object_names_sorted = None
+        self.viz_image_cv2 = viz_image_cv2
+        self.viz_traj = viz_traj
+        self.viz_traj_color_rgba = viz_traj_color_rgba
+
+        self.airsim_client = airsim.MultirotorClient()
+        self.airsim_client.confirmConnection()
+        # we need two airsim MultirotorClient objects because the comm lib we use (rpclib) is not thread safe
+        # so we poll images in a thread using one airsim MultirotorClient object
+        # and use another airsim MultirotorClient for querying state commands
+        self.airsim_client_images = airsim.MultirotorClient()
+        self.airsim_client_images.confirmConnection()
+        self.airsim_client_odom = airsim.MultirotorClient()
+        self.airsim_client_odom.confirmConnection()
+        self.log_monitor = log_monitor.LogMonitor()
+        self.level_name = None
+        self.race_tier = None
+
+        # the image callback only acquires the frames, the inference thread runs the detector on the newest one
+        self.image_callback_thread = threading.Thread(target=self.repeat_timer_image_callback, args=(self.image_callback, 0.03))
+        self.inference_thread = threading.Thread(target=self.inference_loop)
+        # fpv frames at the resolution of the detector, without decoding copies
+        self.frame_acquisition = frame_acquisition.FrameAcquisition(self.airsim_client_images, "fpv_cam", airsim.ImageType.Scene,
+                                                                    width=image_width, height=image_height)
+        self.frame_slot = detection_pipeline.FrameSlot(on_drop=self.frame_acquisition.release)
+        # with a roi size, the detector runs on a crop around the projection of the next gate
+        self.gate_roi = gate_roi.GateROI(input_size=roi_size) if roi_size else None
+        # the detector runs on one frame out of detect_every, the box is predicted on the others
+        self.detect_every = detect_every
+        self.gate_box_tracker = gate_box_tracker.GateBoxTracker() if detect_every > 1 else None
+        self.num_inference_frames = 0
+        self.is_image_thread_active = False
+
+        self.got_odom = False
+        self.odometry_callback_thread = threading.Thread(target=self.repeat_timer_odometry_callback, args=(self.odometry_callback, 0.5))
+        self.is_odometry_thread_active = False
+
+        self.image_callback_timer = None
+        self.odometry_callback_timer = None
+        # per phase latency histograms of the callbacks, dumped at the end of every race
+        self.latency = latency.LatencyRecorder()
+        # odometry samples of the current race, saved at the end of every race
+        self.trajectory = trajectory.TrajectoryBuffer()
+        # the logging and the optimizer step of a finished race run while the next one is set up
+        self.iteration_pipeline = iteration_pipeline.IterationPipeline(iteration_pipeline.get_iteration_file_name(strategy.log_file_name))
+        # moveOnSpline is only re-sent when the target, the hyperparameters or the tracking deviation change
+        self.spline_command_cache = command_cache.SplineCommandCache()
+        # checked in this order on the evaluator thread, the odometry callback only reads the result
+        # the finish is checked by the odometry callback itself, there is no next gate to fly to after it
+        termination_conditions = [
+            (termination.DRONE_STUCKED, self.is_drone_stucked),
+            (termination.SLOWER_THAN_LAST_RACE, self.is_slower_than_last_race),
+            (termination.DRONE_MISSED_SOME_GATE, self.is_drone_missed_some_gate)]
+        if not strategy.terminate_slower_races:
+            # the optimizer needs the time of every gate, even when the race is slower than the best one
+            del termination_conditions[1]
+        self.termination_evaluator = termination.TerminationEvaluator(termination_conditions, latency=self.latency)
+
+        self.MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS = 10 # see https://github.com/microsoft/AirSim-NeurIPS2019-Drone-Racing/issues/383
+        # gate poses are fetched once per level (read from the track cache for tier 1), self.gate_pose_cache.invalidate() to fetch them again
+        self.gate_pose_cache = gate_poses.GatePoseCache(max_trials=self.MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS, track_cache=track_cache.TrackCache())
+        self.finished_race = False
+        self.terminated_program = False
+
+        ################### gate detection result variables #################
+        self.img_mutex = threading.Lock()
+        self.W = 0
+        self.H = 0
+        self.Mx = 0
+        self.My = 0
+        self.detect_flag = False
+        self.previous_detect_flag = False
+        # the last detection published, with the capture time of its frame
+        self.detection = detection_pipeline.GateDetection()
+        # headless unless the frames are shown, then the detections are drawn on the viewer thread
+        self.frame_viewer = frame_viewer.FrameViewer(category_index, DETECTION_THRESHOLD) if viz_image_cv2 else None
+
+        ################# Hyper-parameter Optimization#####################
+        self.strategy = strategy
+        self.hyper_opt = strategy.hyper_opt
+        self.use_new_hyper_for_next_race(strategy.propose())
+        self.iteration = strategy.iteration
+
+
+    # loads desired level
+    def load_level(self, level_name, sleep_sec=2.0):
+        self.level_name = level_name
+        self.airsim_client.simLoadLevel(self.level_name)
+        self.airsim_client.confirmConnection() # failsafe
+        time.sleep(sleep_sec) # let the environment load completely
+
+    # Starts an instance of a race in your given level, if valid
+    def start_race(self, tier=3):
+        self.race_tier = tier
+        self.airsim_client.simStartRace(tier)
+
+    # Resets a current race: moves players to start positions, timer and penalties reset
+    def reset_race(self):
+        self.airsim_client.simResetRace()
+
+    def dummy_reset(self):
+        self.airsim_client.reset()
+        time.sleep(0.1)
+        self.airsim_client.simResetRace()
+        time.sleep(0.1)
+        self.airsim_client.enableApiControl(vehicle_name=self.drone_name)
+        self.airsim_client.arm(vehicle_name=self.drone_name)
+
+
+    # arms drone, enable APIs, set default traj tracker gains
+    def initialize_drone(self):
+        self.airsim_client.enableApiControl(vehicle_name=self.drone_name)
+        self.airsim_client.arm(vehicle_name=self.drone_name)
+
+        traj_tracker_gains = airsim.TrajectoryTrackerGains(kp_cross_track=11.0, kd_cross_track=4.0,
+                                                            kp_vel_cross_track=3.0, kd_vel_cross_track=0.0,
+                                                            kp_along_track=0.4, kd_along_track=0.0,
+                                                            kp_vel_along_track=0.04, kd_vel_along_track=0.0,
+                                                            kp_z_track=8.3, kd_z_track=3.5,
+                                                            kp_vel_z=3, kd_vel_z=0.8,
+                                                            kp_yaw=3.0, kd_yaw=0.5)
+
+
+
+        self.airsim_client.setTrajectoryTrackerGains(traj_tracker_gains, vehicle_name=self.drone_name)
+        time.sleep(0.2)
+    
+    def reset_drone_parameter(self):
+        # gate idx trackers
+        self.last_gate_passed_idx = -1
+        self.last_gate_idx_moveOnSpline_was_called_on = -1
+        self.next_gate_idx = 0
+        self.next_next_gate_idx = 1
+        self.prev_xyz = None
+
+        self.finished_race = False
+        self.terminated_program = False
+        self.termination_evaluator.reset()
+        self.spline_command_cache.invalidate()
+        self.trajectory.reset()
+
+    def takeoffAsync(self):
+        self.airsim_client.takeoffAsync().join()
+
+    # like takeoffAsync(), but with moveOnSpline()
+    def takeoff_with_moveOnSpline(self, takeoff_height=1.0):
+        start_position = self.airsim_client.simGetVehiclePose(vehicle_name=self.drone_name).position
+        takeoff_waypoint = airsim.Vector3r(start_position.x_val, start_position.y_val, start_position.z_val-takeoff_height)
+
+        self.airsim_client.moveOnSplineAsync([takeoff_waypoint], vel_max=15.0, acc_max=5.0, add_position_constraint=True, add_velocity_constraint=False, 
+            add_acceleration_constraint=False, viz_traj=self.viz_traj, viz_traj_color_rgba=self.viz_traj_color_rgba, vehicle_name=self.drone_name).join()
+
+    # stores gate ground truth poses as a list of airsim.Pose() objects in self.gate_poses_ground_truth
+    def get_ground_truth_gate_poses(self):
+        self.gate_object_names_sorted, self.gate_poses_ground_truth = \
+            self.gate_pose_cache.get_gate_poses(self.airsim_client, self.level_name, self.race_tier)
+        self.n_gate = len(self.gate_object_names_sorted)
+        self.gate_centers = gate_tracker.get_gate_centers(self.gate_poses_ground_truth)
+
+    # this is utility function to get a velocity constraint which can be passed to moveOnSplineVelConstraints()
+    # the "scale" parameter scales the gate facing vector accordingly, thereby dictating the speed of the velocity constraint
+    def get_gate_facing_vector_from_quaternion(self, airsim_quat, scale = 1.0):
+        # convert gate quaternion to rotation matrix
+        # ref: https://en.wikipedia.org/wiki/Rotation_matrix#Quaternion; https://www.lfd.uci.edu/~gohlke/code/transformations.py.html
+        q = np.array([airsim_quat.w_val, airsim_quat.x_val, airsim_quat.y_val, airsim_quat.z_val], dtype=np.float64)
+        n = np.dot(q, q)
+        if n < np.finfo(float).eps:
+            return airsim.Vector3r(0.0, 1.0, 0.0)
+        q *= np.sqrt(2.0 / n)
+        q = np.outer(q, q)
+        rotation_matrix = np.array([[1.0-q[2, 2]-q[3, 3],     q[1, 2]-q[3, 0],     q[1, 3]+q[2, 0]],
+                                    [    q[1, 2]+q[3, 0], 1.0-q[1, 1]-q[3, 3],     q[2, 3]-q[1, 0]],
+                                    [    q[1, 3]-q[2, 0],     q[2, 3]+q[1, 0], 1.0-q[1, 1]-q[2, 2]]])
+        gate_facing_vector = rotation_matrix[:,1]
+        return airsim.Vector3r(scale * gate_facing_vector[0], scale * gate_facing_vector[1], scale * gate_facing_vector[2])
+
+    def get_last_gate_passed_idx(self):
+        # all the next gates at once, a gate passed between two samples is not missed
+        return gate_tracker.get_last_gate_passed_idx(self.gate_centers, self.next_gate_idx, self.prev_xyz, self.curr_xyz,
+                                                     self.hyper_opt.curr_hyper.d)
+    
+    def update_gate_idx_trackers(self, last_gate_passed_idx):
+        if last_gate_passed_idx > self.next_gate_idx:
+            print(f"     passed gates {self.next_gate_idx} to {last_gate_passed_idx} between two samples")
+        self.last_gate_passed_idx = last_gate_passed_idx
+        self.next_gate_idx = last_gate_passed_idx + 1
+        self.next_next_gate_idx = last_gate_passed_idx + 2
+        # print("Update next_gate_idx to %d" % self.next_gate_idx)
+    
+    def is_race_finished(self):
+        '''                                                             Soccer_Field_Medium
+            Gate idx 0 1 2   3      4  5  6  7  8   9  10   11               12               13        14       15 16 17 18 19 20   21     22 23 24
+                           curved        down             far right     b4 big turn left    mid-air  sharp down                    sharp up
+        '''
+        terminate_condition = self.last_gate_passed_idx >= FINISH_GATE_IDX
+        if terminate_condition:
+            print("     FINISH the race")
+        return terminate_condition
+
+    def is_drone_stucked(self):
+        early_terminate_condition = L2_norm(self.curr_lin_vel) < 0.05
+        if early_terminate_condition:
+            print("     EARLY TERMINATION: drone stucked")
+        return early_terminate_condition
+
+    def is_slower_than_last_race(self):
+        early_terminate_condition = self.log_monitor.get_current_race_time(self.drone_name) > self.hyper_opt.best_hyper.time[-1]
+        if early_terminate_condition:
+            print("     EARLY TERMINATION: slower than the best racorded time")
+        return early_terminate_condition
+
+    def is_drone_missed_some_gate(self):
+        early_terminate_condition = self.log_monitor.check_gate_missed(self.drone_name)
+        if early_terminate_condition:
+            print("     EARLY TERMINATION: drone missed some gate")
+        return early_terminate_condition
+
+    def is_drone_collied(self):
+        early_terminate_condition = self.log_monitor.check_collision(self.drone_name)
+        if early_terminate_condition:
+            print("     EARLY TERMINATION: drone collided")
+        return early_terminate_condition
+
+    def get_detection_roi(self, img_rgb, camera_pose):
+        if self.gate_roi is None or camera_pose is None or self.gate_poses_ground_truth is None:
+            return None
+        next_gate_idx = min(self.next_gate_idx, len(self.gate_poses_ground_truth) - 1)
+        return self.gate_roi.get_roi(img_rgb.shape, self.gate_poses_ground_truth[next_gate_idx].position, camera_pose)
+
+    def gate_detection(self, img_rgb, capture_time=None, camera_pose=None):
+        THRESHOULD = DETECTION_THRESHOLD
+        #### gate detection
+        roi = self.get_detection_roi(img_rgb, camera_pose)
+        frame_expanded = np.expand_dims(img_rgb if roi is None else self.gate_roi.crop(img_rgb, roi), axis=0)
+        # Perform the actual detection by running the model with the image as input
+        (boxes, scores, classes, num) = sess.run(
+            [detection_boxes, detection_scores, detection_classes, num_detections],
+            feed_dict={image_tensor: frame_expanded})
+        if roi is not None:
+            # normalized to the crop -> normalized to the frame
+            boxes = self.gate_roi.to_frame_boxes(boxes, roi, img_rgb.shape)
+        detection = detection_pipeline.GateDetection(capture_time)
+        box_of_interest = detection_pipeline.get_biggest_box(np.squeeze(boxes, axis=0), np.squeeze(scores, axis=0), THRESHOULD)
+        if box_of_interest is not None:
+            h_box = box_of_interest[2]-box_of_interest[0]
+            w_box = box_of_interest[3]-box_of_interest[1]
+            Area_box = h_box * w_box
+
+            if Area_box <= 0.98 and Area_box >= 0.01:    # Feel free to change this number, set to 0 if don't want this effect
+                # If we detect the box but it's still to far keep the same control command
+                # This is to prevent the drone to track the next gate when it has not pass the current gate yet
+                detection = detection_pipeline.GateDetection(capture_time, box_of_interest)
+                #print("box_of_interest : ", box_of_interest, detection)
+            else:
+                if self.next_gate_idx == FINISH_GATE_IDX:
+                    self.detect_big_gate = True
+        else:
+            self.estimate_depth = 8
+        self.publish_detection(detection)
+
+        if self.frame_viewer is not None:
+            self.frame_viewer.show(img_rgb, boxes, classes, scores)
+
+    def publish_detection(self, detection):
+        # only the result is published under the lock, the inference runs outside of it
+        with self.img_mutex:
+            self.detection = detection
+            self.detect_flag = detection.detect_flag
+            if detection.detect_flag:
+                self.H = detection.H
+                self.W = detection.W
+                self.My = detection.My
+                self.Mx = detection.Mx
+
+    def image_callback(self):
+        tick_start = time.perf_counter()
+        # get uncompressed fpv cam image
+        response = self.frame_acquisition.get_response()
+        self.latency.record("simGetImages", tick_start)
+        img_rgb = self.frame_acquisition.decode(response)
+        if img_rgb is not None:
+            # the frame is stamped with the time it was requested
+            self.frame_slot.put(img_rgb, tick_start, frame_acquisition.get_camera_pose(response))
+        self.latency.record("image_callback", tick_start)
+
+    def inference_loop(self):
+        while self.is_image_thread_active:
+            frame = self.frame_slot.get()
+            if frame is None:
+                continue
+            img_rgb, capture_time, camera_pose = frame
+            start = time.perf_counter()
+            if self.gate_box_tracker is None or not self.track_gate(img_rgb, capture_time, camera_pose):
+                self.gate_detection(img_rgb, capture_time, camera_pose)
+                self.latency.record("gate_detection", start)
+                if self.gate_box_tracker is not None:
+                    self.update_gate_box_tracker(capture_time, camera_pose)
+            else:
+                self.latency.record("gate_tracking", start)
+            self.frame_acquisition.release(img_rgb)
+            self.num_inference_frames += 1
+
+    def track_gate(self, img_rgb, capture_time, camera_pose):
+        '''
+            publishes the predicted box instead of running the detector, returns False if the frame needs the detector
+        '''
+        if self.num_inference_frames % self.detect_every == 0 or not self.gate_box_tracker.is_tracking() or \
+           self.gate_box_tracker.gate_idx != self.next_gate_idx:
+            return False
+        self.gate_box_tracker.aspect_ratio = img_rgb.shape[0] / img_rgb.shape[1]
+        box = self.gate_box_tracker.predict(capture_time, camera_pose)
+        if box is None:
+            return False
+        self.publish_detection(detection_pipeline.GateDetection(capture_time, box))
+        return True
+
+    def update_gate_box_tracker(self, capture_time, camera_pose):
+        detection = self.detection
+        if detection.detect_flag:
+            self.gate_box_tracker.update(detection.box, capture_time, camera_pose, self.next_gate_idx)
+        else:
+            self.gate_box_tracker.reset()
+
+    
+    def odometry_callback(self):
+        tick_start = time.perf_counter()
+        # in world frame:
+        self.drone_state = self.airsim_client_odom.getMultirotorState()
+        start = self.latency.record("getMultirotorState", tick_start)
+        drone_position = self.drone_state.kinematics_estimated.position
+        drone_velocity = self.drone_state.kinematics_estimated.linear_velocity
+        self.curr_lin_vel = [drone_velocity.x_val, drone_velocity.y_val, drone_velocity.z_val]
+        self.curr_xyz = [drone_position.x_val, drone_position.y_val, drone_position.z_val]
+        self.got_odom = True
+
+        if (self.finished_race == False):
+            last_gate_passed_idx = self.get_last_gate_passed_idx()
+            if last_gate_passed_idx >= 0:
+                self.update_gate_idx_trackers(last_gate_passed_idx)
+            self.prev_xyz = self.curr_xyz
+            # one detection for the whole tick, the inference thread may publish a new one meanwhile
+            detection = self.detection
+            if detection.capture_time is not None:
+                self.latency.record("detection_age", detection.capture_time)
+            self.trajectory.append(tick_start, drone_position, drone_velocity, self.next_gate_idx, detection.detect_flag)
+            
+            # the conditions are evaluated on the evaluator thread, this tick waits a little for their result
+            # so no command is sent after a missed gate or a slower split
+            self.termination_evaluator.post_odometry()
+            is_terminated = self.is_race_finished() or self.termination_evaluator.wait_for_evaluation()
+            start = self.latency.record("termination", start)
+            if is_terminated:
+                self.finished_race = True
+                time.sleep(1.0)
+                self.airsim_client.moveByVelocityAsync(0, 0, 0, 2).join()   # stop the drone
+                self.spline_command_cache.invalidate()
+
+                return
+
+            ''' Control Part'''
+            if (detection.detect_flag == True):
+                ''' Go to the center of the gate'''
+                # self.airsim_client.cancelLastTask()
+                self.fly_to_next_gate_with_moveOnSpline()
+            else:
+                ''' Go to prior of the gate'''
+                noisy_position_of_next_gate = self.gate_poses_ground_truth[self.next_gate_idx].position
+                target_position = convex_combination(drone_position, noisy_position_of_next_gate, 0.5)
+
+                self.fly_to_next_point_with_moveOnSpline(target_position)
+            self.latency.record("moveOnSpline", start)
+            self.latency.record("odometry_callback", tick_start)
+
+        elif (self.finished_race == True and L2_norm(self.curr_lin_vel) < 0.5):
+            # race is finished
+            self.terminated_program = True
+            time.sleep(0.5)
+            
+            times, penalties = self.log_monitor.get_scores_at_gates(FINISH_GATE_IDX + 1, self.drone_name)
+            current_race_time = np.round(times + penalties, 2).tolist()
+
+            print(f"best: {self.hyper_opt.best_hyper.time.tolist()}")
+            print(f"curr: {current_race_time}")
+            print(f"odometry timer: {self.odometry_callback_timer}")
+            print(f"spline commands: {self.spline_command_cache}")
+            self.spline_command_cache.reset_stats()
+
+            # the histograms and the samples of the race are taken here, they are written on the pipeline thread
+            next_hyper = self.iteration_pipeline.submit(self.finish_iteration, self.iteration, current_race_time,
+                                                        self.latency.get_histograms(), self.trajectory.export())
+            self.dummy_reset()
+            self.race_again(next_hyper, current_race_time[-1])
+        else:
+            pass
+
+    def use_new_hyper_for_next_race(self, new_hyper):
+        self.hyper_opt.curr_hyper = copy.deepcopy(new_hyper)
+
+    def finish_iteration(self, iteration, race_time, histograms, samples):
+        '''
+            on the pipeline thread, while the simulator is reset for the next race
+            returns the hyperparameters of the next race, None when the strategy is finished
+        '''
+        latency.write_histograms(latency.get_latency_file_name(self.strategy.log_file_name), f"iteration: {iteration}", histograms)
+        trajectory.save_samples(trajectory.get_trajectory_file_name(self.strategy.log_file_name, iteration), samples)
+
+        self.strategy.observe(race_time)
+        # data logging
+        self.strategy.checkpoint(iteration)
+        if self.strategy.is_finished():
+            return None
+        return self.strategy.propose()
+
+    def race_again(self, next_hyper, race_time=None):
+        '''
+            next_hyper: future of finish_iteration(), it runs during the simulator reset
+            and is waited for before the race clock starts
+        '''
+        self.reset_drone_parameter()
+        new_hyper = self.iteration_pipeline.wait(next_hyper, self.iteration, race_time)
+        if new_hyper is None:
+            # the odometry thread stops after this tick, main() stops the others
+            self.is_odometry_thread_active = False
+            return
+        self.use_new_hyper_for_next_race(new_hyper)
+        self.iteration = self.iteration + 1
+        print(f"================ iteration: {self.iteration} ================")
+
+        self.start_race(1)
+        self.airsim_client.disableApiControl(vehicle_name="drone_2")
+        self.airsim_client.disarm(vehicle_name="drone_2")
+        self.takeoff_with_moveOnSpline()
+        self.get_ground_truth_gate_poses()
+
+
+    def fly_to_next_gate_with_moveOnSpline(self):
+        # print(self.gate_poses_ground_truth[self.next_gate_idx].position)
+        target = self.gate_poses_ground_truth[self.next_gate_idx].position
+        vel_max = self.hyper_opt.curr_hyper.v[self.next_gate_idx]
+        acc_max = self.hyper_opt.curr_hyper.a[self.next_gate_idx]
+        if not self.spline_command_cache.is_new_command("gate", target, vel_max, acc_max, self.curr_xyz):
+            return None
+        return self.airsim_client.moveOnSplineAsync([target], 
+                                                    vel_max=vel_max,
+                                                    acc_max=acc_max, 
+                                                    add_position_constraint=True, 
+                                                    add_velocity_constraint=True, 
+                                                    add_acceleration_constraint=True, 
+                                                    replan_from_lookahead=False,
+                                                    viz_traj=self.viz_traj, 
+                                                    viz_traj_color_rgba=self.viz_traj_color_rgba, 
+                                                    vehicle_name=self.drone_name)
+
+
+    def fly_to_next_point_with_moveOnSpline(self, point):
+        # print(self.gate_poses_ground_truth[self.next_gate_idx].position)
+        vel_max = self.hyper_opt.curr_hyper.v[self.next_gate_idx]
+        acc_max = self.hyper_opt.curr_hyper.a[self.next_gate_idx]
+        if not self.spline_command_cache.is_new_command("point", point, vel_max, acc_max, self.curr_xyz):
+            return None
+        return self.airsim_client.moveOnSplineAsync([point],
+                                                    vel_max=vel_max,
+                                                    acc_max=acc_max, 
+                                                    add_position_constraint=True, 
+                                                    add_velocity_constraint=True, 
+                                                    add_acceleration_constraint=True, 
+                                                    replan_from_lookahead=False,
+                                                    viz_traj=self.viz_traj, 
+                                                    viz_traj_color_rgba=self.viz_traj_color_rgba, 
+                                                    vehicle_name=self.drone_name)
+
+    # call task() method every "period" seconds, on fixed deadlines so that the rate does not drift with task()
+    def repeat_timer_image_callback(self, task, period):
+        self.image_callback_timer = rate_timer.RateTimer(task, period)
+        self.image_callback_timer.run(lambda: self.is_image_thread_active)
+
+    def repeat_timer_odometry_callback(self, task, period):
+        self.odometry_callback_timer = rate_timer.RateTimer(task, period)
+        try:
+            self.odometry_callback_timer.run(lambda: self.is_odometry_thread_active)
+        finally:
+            # main() waits for the flag, it is cleared also when the callback raises (e.g. in finish_iteration)
+            self.is_odometry_thread_active = False
+
+    def start_image_callback_thread(self):
+        if not self.is_image_thread_active:
+            self.is_image_thread_active = True
+            self.image_callback_thread.start()
+            self.inference_thread.start()
+            print("Started image callback thread")
+
+    def stop_image_callback_thread(self):
+        if self.is_image_thread_active:
+            self.is_image_thread_active = False
+            self.image_callback_thread.join()
+            self.inference_thread.join()
+            print("Stopped image callback thread.")
+            print(f"    image callback timer: {self.image_callback_timer}")
+            print(f"    frame slot: {self.frame_slot}")
+            print(f"    frame acquisition: {self.frame_acquisition}")
+            if self.gate_roi is not None:
+                print(f"    gate roi: {self.gate_roi}")
+            if self.gate_box_tracker is not None:
+                print(f"    gate box tracker: {self.gate_box_tracker}")
+
+    def start_odometry_callback_thread(self):
+        if not self.is_odometry_thread_active:
+            self.is_odometry_thread_active = True
+            self.odometry_callback_thread.start()
+            self.termination_evaluator.start_evaluator_thread()
+            print("Started odometry callback thread")
+
+    def stop_odometry_callback_thread(self):
+        if self.is_odometry_thread_active:
+            self.is_odometry_thread_active = False
+            # self.odometry_callback_thread.join()
+            self.termination_evaluator.stop_evaluator_thread()
+            print("Stopped odometry callback thread.")
+            print(f"    odometry callback timer: {self.odometry_callback_timer}")
+
+
+def main(args, strategy):
+    # ensure you have generated the neurips planning settings file by running python generate_settings_file.py
+    baseline_racer = BaselineRacer(strategy, drone_name="drone_1", viz_traj=args.viz_traj, viz_traj_color_rgba=[1.0, 1.0, 1.0, 1.0], viz_image_cv2=args.viz_image_cv2,
+                                   image_width=args.image_width, image_height=args.image_height, roi_size=args.roi_size,
+                                   detect_every=args.detect_every)
+
+    baseline_racer.load_level(args.level_name)
+    if baseline_racer.frame_viewer is not None:
+        baseline_racer.frame_viewer.start_viewer_thread()
+    if args.runtime == "threads":
+        baseline_racer.start_image_callback_thread()
+    baseline_racer.start_race(args.race_tier)
+    baseline_racer.get_ground_truth_gate_poses()
+    baseline_racer.initialize_drone()
+    
+    # don't want opponent drone
+    baseline_racer.airsim_client.disableApiControl(vehicle_name="drone_2")
+    baseline_racer.airsim_client.disarm(vehicle_name="drone_2")
+
+    baseline_racer.takeoff_with_moveOnSpline()
+    print(f"================ iteration: {baseline_racer.iteration} ================")
+    baseline_racer.iteration_pipeline.start_race()
+    if args.runtime == "asyncio":
+        # blocks for the whole session, the racer resets and restarts the race from the odometry callback
+        async_runtime.AsyncRacerRuntime(baseline_racer, baseline_racer.log_monitor).run()
+    else:
+        # termination checks read the state kept up to date by the watcher instead of the log file
+        baseline_racer.log_monitor.start_watcher_thread()
+        baseline_racer.start_odometry_callback_thread()
+        # the racer resets and restarts the race from the odometry callback until the strategy is finished
+        while baseline_racer.is_odometry_thread_active:
+            time.sleep(1.0)
+        baseline_racer.stop_image_callback_thread()
+        baseline_racer.termination_evaluator.stop_evaluator_thread()
+        baseline_racer.log_monitor.stop_watcher_thread()
+    if baseline_racer.frame_viewer is not None:
+        baseline_racer.frame_viewer.stop_viewer_thread()
+    baseline_racer.gate_pose_cache.close()
+    baseline_racer.iteration_pipeline.close()
+    strategy.close()
+
+
+def get_argument_parser(viz_image_cv2=False):
+    parser = ArgumentParser()
+    parser.add_argument('--level_name', type=str, choices=["Soccer_Field_Easy", "Soccer_Field_Medium", "ZhangJiaJie_Medium", "Building99_Hard", 
+        "Qualifier_Tier_1", "Qualifier_Tier_2", "Qualifier_Tier_3", "Final_Tier_1", "Final_Tier_2", "Final_Tier_3"], default="Qualifier_Tier_2")
+    parser.add_argument('--planning_baseline_type', type=str, choices=["all_gates_at_once","all_gates_one_by_one"], default="all_gates_at_once")
+    parser.add_argument('--planning_and_control_api', type=str, choices=["moveOnSpline", "moveOnSplineVelConstraints"], default="moveOnSpline")
+    parser.add_argument('--enable_viz_traj', dest='viz_traj', action='store_true', default=False)
+    parser.add_argument('--enable_viz_image_cv2', dest='viz_image_cv2', action='store_true', default=viz_image_cv2)
+    # no window and no drawing at all, also for the racers that show the frames by default
+    parser.add_argument('--headless', dest='viz_image_cv2', action='store_false')
+    parser.add_argument('--race_tier', type=int, choices=[1,2,3], default=1)
+    # resolution the detector runs at, the camera resolution (settings.json) if not given,
+    # only one of them keeps the aspect ratio of the camera
+    parser.add_argument('--image_width', type=int, default=None)
+    parser.add_argument('--image_height', type=int, default=None)
+    # size of the crop around the next gate the detector runs on, the whole frame if not given
+    parser.add_argument('--roi_size', type=int, default=None)
+    # run the detector on one frame out of detect_every, the gate box is tracked on the others
+    parser.add_argument('--detect_every', type=int, default=1)
+    parser.add_argument('--runtime', type=str, choices=["threads", "asyncio"], default="threads")
+    return parser
+
+
+if __name__ == "__main__":
+    parser = get_argument_parser()
+    parser.add_argument('--strategy', type=str, choices=["gd", "po", "random_search", "GA", "BO"], default="gd")
+    parser.add_argument('--log_file_name', type=str, default=None)
+    parser.add_argument('--no_resume', dest='resume', action='store_false', default=True)
+    args = parser.parse_args()
+    log_file_name = args.log_file_name or f"{args.strategy}.txt"
+    main(args, racer_strategies.get_strategy(args.strategy, log_file_name, resume=args.resume))
@@ -0,0 +1,136 @@
+from argparse import ArgumentParser
+import os
+import random
+import shutil
+import tempfile
+import time
+import numpy as np
+import log_monitor
+
+'''
+Latency/throughput of the LogMonitor queries on synthetic RaceLogs of increasing size
+
+    python benchmark_log_monitor.py --sizes 1000 10000 100000 1000000
+
+cold:   a fresh LogMonitor parses the whole log (first query of a race)
+warm:   the log is already parsed, the query only checks for appended lines
+tick:   one odometry period worth of lines is appended before every query (odometry loop)
+'''
+
+DRONE_NAMES = ["drone_1", "drone_2"]
+NUM_GATES = 14
+LINES_PER_TICK = 2     # time + odometry per drone and tick
+TICK_MS = 10
+
+
+def generate_race_log(file_path, num_lines, drone_names=DRONE_NAMES, num_gates=NUM_GATES, seed=0):
+    '''
+        synthetic race log with the layout of the simulator: odometry/time lines for every drone,
+        gate passes spread over the race, random collisions followed by a penalty, a missed gate
+        for the last drone, and every drone finishes at the end
+    '''
+    rng = random.Random(seed)
+    num_ticks = max(num_lines // (LINES_PER_TICK * len(drone_names)), num_gates + 1)
+    ticks_per_gate = num_ticks // (num_gates + 1)
+    gates_passed = {drone_name: 0 for drone_name in drone_names}
+    collision_count = {drone_name: 0 for drone_name in drone_names}
+    lines = ["header\n", "header\n", "header\n"]
+    for tick in range(num_ticks):
+        race_time = tick * TICK_MS
+        for drone_name in drone_names:
+            lines.append(f"{drone_name} 0 {race_time} odometry_XYZRPY ({tick * 0.01:.3f},1.000,-2.000,0.000,0.000,90.000)\n")
+            lines.append(f"{drone_name} 0 {race_time} time {race_time}\n")
+            if tick > 0 and tick % ticks_per_gate == 0 and gates_passed[drone_name] < num_gates:
+                gates_passed[drone_name] += 1
+                lines.append(f"{drone_name} 0 {race_time} gates_passed {gates_passed[drone_name]}\n")
+                if drone_name == drone_names[-1] and gates_passed[drone_name] == num_gates // 2:
+                    lines.append(f"{drone_name} 0 {race_time} gates_missed 1\n")
+                elif rng.random() < 0.2:
+                    collision_count[drone_name] += 1
+                    lines.append(f"{drone_name} 0 {race_time} collision_count {collision_count[drone_name]}\n")
+                    lines.append(f"{drone_name} 0 {race_time} penalty {3000 * collision_count[drone_name]}\n")
+    race_time = num_ticks * TICK_MS
+    for drone_name in drone_names:
+        lines.append(f"{drone_name} 0 {race_time} finished 1\n")
+    with open(file_path, "w") as f:
+        f.writelines(lines)
+    return len(lines) - log_monitor.NUM_HEADER_LINES
+
+
+def get_queries(monitor):
+    '''
+        every public query of LogMonitor, with the arguments the racers use
+    '''
+    finish_time = monitor.get_race_time("drone_1")
+    return {
+        "update": lambda: monitor.update(),
+        "get_drone_state": lambda: monitor.get_drone_state("drone_1"),
+        "get_score_at_gate": lambda: monitor.get_score_at_gate("5"),
+        "get_scores_at_gates": lambda: monitor.get_scores_at_gates(NUM_GATES),
+        "get_race_time": lambda: monitor.get_race_time("drone_1"),
+        "check_gate_passed": lambda: monitor.check_gate_passed(5),
+        "check_gate_missed": lambda: monitor.check_gate_missed(),
+        "check_collision": lambda: monitor.check_collision(),
+        "get_last_gate_idx_before_termination": lambda: monitor.get_last_gate_idx_before_termination(),
+        "get_score": lambda: monitor.get_score(finish_time),
+        "get_current_race_time": lambda: monitor.get_current_race_time(),
+        "read_log": lambda: monitor.read_log(),
+    }
+
+
+def measure(task, repeat):
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        task()
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def report(name, latencies, num_lines=None):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+    throughput = f"{num_lines / np.median(latencies):12.0f} lines/s" if num_lines else f"{1. / np.median(latencies):12.0f} calls/s"
+    print(f"    {name:48s} p50 {p50:12.1f} us    p99 {p99:12.1f} us    {throughput}")
+
+
+def benchmark_size(log_dir, num_lines, repeat, cold_repeat):
+    file_path = os.path.join(log_dir, f"synthetic_{num_lines}.log")
+    num_lines = generate_race_log(file_path, num_lines)
+    print(f"{num_lines} lines")
+
+    path_to_log = log_dir + os.sep
+    report("cold parse", measure(lambda: log_monitor.LogMonitor(path_to_log).update(), cold_repeat), num_lines)
+
+    monitor = log_monitor.LogMonitor(path_to_log)
+    monitor.update()
+    for name, query in get_queries(monitor).items():
+        report(f"warm {name}", measure(query, repeat))
+
+    with open(file_path, "a") as f:
+        tick_lines = "".join(f"{drone_name} 0 0 time 0\n" for drone_name in DRONE_NAMES) * LINES_PER_TICK
+
+        def append_and_query():
+            f.write(tick_lines)
+            f.flush()
+            monitor.check_gate_missed()
+
+        report("tick check_gate_missed", measure(append_and_query, repeat))
+    os.remove(file_path)
+
+
+def main(args):
+    log_dir = tempfile.mkdtemp(prefix="RaceLogs_")
+    try:
+        for num_lines in args.sizes:
+            benchmark_size(log_dir, num_lines, args.repeat, args.cold_repeat)
+    finally:
+        shutil.rmtree(log_dir)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=1000, help='calls per warm query')
+    parser.add_argument('--cold_repeat', type=int, default=5, help='full parses per log size')
+    args = parser.parse_args()
+    main(args)
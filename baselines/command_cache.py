@@ -0,0 +1,82 @@
+import math
+
+'''
+Coalescing of the moveOnSplineAsync commands of the odometry callback: a command is only sent again
+when its target, vel_max/acc_max or kind changes, or the drone left the segment it was sent along
+'''
+
+TARGET_TOLERANCE = 1.0
+DEVIATION_THRESHOLD = 1.0
+
+
+def to_xyz(position):
+    '''
+        airsim.Vector3r or [x, y, z] -> [x, y, z]
+    '''
+    if hasattr(position, "x_val"):
+        return [position.x_val, position.y_val, position.z_val]
+    return list(position)
+
+
+def get_distance(p1, p2):
+    return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2 + (p1[2] - p2[2])**2)
+
+
+def get_distance_to_segment(point, start, end):
+    '''
+        distance from point to the segment [start, end]
+    '''
+    direction = [end[i] - start[i] for i in range(3)]
+    length_squared = sum(d * d for d in direction)
+    if length_squared == 0.:
+        return get_distance(point, start)
+    eta = sum((point[i] - start[i]) * direction[i] for i in range(3)) / length_squared
+    eta = min(max(eta, 0.), 1.)
+    return get_distance(point, [start[i] + eta * direction[i] for i in range(3)])
+
+
+class SplineCommandCache(object):
+    '''
+        remembers the last spline command sent, is_new_command() tells if the next one has to be sent
+        invalidate() forces the next command to be sent (new race, drone stopped by another command)
+    '''
+    def __init__(self, target_tolerance=TARGET_TOLERANCE, deviation_threshold=DEVIATION_THRESHOLD):
+        self.target_tolerance = target_tolerance
+        self.deviation_threshold = deviation_threshold
+        self.num_sent = 0
+        self.num_coalesced = 0
+        self.invalidate()
+
+    def invalidate(self):
+        self.kind = None
+        self.start_xyz = None
+        self.target_xyz = None
+        self.vel_max = None
+        self.acc_max = None
+
+    def is_new_command(self, kind, target, vel_max, acc_max, curr_xyz):
+        '''
+            kind: what the target is ("gate" or "point"), a change of kind is always sent
+            returns True (and remembers the command) if it has to be sent
+        '''
+        target_xyz = to_xyz(target)
+        if self.kind == kind and self.vel_max == vel_max and self.acc_max == acc_max and \
+           get_distance(target_xyz, self.target_xyz) <= self.target_tolerance and \
+           get_distance_to_segment(curr_xyz, self.start_xyz, self.target_xyz) <= self.deviation_threshold:
+            self.num_coalesced += 1
+            return False
+
+        self.kind = kind
+        self.start_xyz = list(curr_xyz)
+        self.target_xyz = target_xyz
+        self.vel_max = vel_max
+        self.acc_max = acc_max
+        self.num_sent += 1
+        return True
+
+    def reset_stats(self):
+        self.num_sent = 0
+        self.num_coalesced = 0
+
+    def __str__(self):
+        return f"sent = {self.num_sent}, coalesced = {self.num_coalesced}"
@@ -0,0 +1,88 @@
+import threading
+import numpy as np
+
+'''
+Latest-frame-wins hand-off between the image acquisition and the gate detection
+
+    acquisition thread:     frame_slot.put(img_rgb, capture_time, camera_pose)
+    inference thread:       img_rgb, capture_time, camera_pose = frame_slot.get()
+'''
+
+FRAME_WAIT_TIMEOUT = 0.1
+
+
+class FrameSlot(object):
+    '''
+        holds at most one frame, put() overwrites a frame that was not taken yet
+        on_drop(frame) is called for the overwritten frames (frame_acquisition.FrameAcquisition.release)
+    '''
+    def __init__(self, on_drop=None):
+        self.on_drop = on_drop
+        self.condition = threading.Condition()
+        self.frame = None
+        self.capture_time = None
+        self.camera_pose = None
+        self.is_new_frame = False
+        self.num_frames = 0
+        self.num_dropped = 0
+
+    def put(self, frame, capture_time, camera_pose=None):
+        with self.condition:
+            if self.is_new_frame:
+                self.num_dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(self.frame)
+            self.frame = frame
+            self.capture_time = capture_time
+            self.camera_pose = camera_pose
+            self.is_new_frame = True
+            self.num_frames += 1
+            self.condition.notify()
+
+    def get(self, timeout=FRAME_WAIT_TIMEOUT):
+        '''
+            waits for a frame newer than the last one taken, returns (frame, capture_time, camera_pose),
+            or None after timeout seconds without a new frame
+        '''
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.is_new_frame, timeout):
+                return None
+            self.is_new_frame = False
+            return self.frame, self.capture_time, self.camera_pose
+
+    def __str__(self):
+        return f"frames = {self.num_frames}, dropped = {self.num_dropped}"
+
+
+class GateDetection(object):
+    '''
+        the gate box chosen in a frame, box = [ymin, xmin, ymax, xmax] normalized, None if no gate was detected
+        H, W: size of the box, My, Mx: its center
+    '''
+    def __init__(self, capture_time=None, box=None):
+        self.capture_time = capture_time
+        self.box = box
+        self.detect_flag = box is not None
+        if self.detect_flag:
+            self.H = box[2] - box[0]
+            self.W = box[3] - box[1]
+            self.My = (box[2] + box[0]) / 2
+            self.Mx = (box[3] + box[1]) / 2
+
+    def __str__(self):
+        if not self.detect_flag:
+            return f"no gate (captured at {self.capture_time})"
+        return f"W : {self.W}, H : {self.H}, M : {self.Mx} {self.My} (captured at {self.capture_time})"
+
+
+def get_biggest_box(boxes, scores, threshold):
+    '''
+        boxes: (N,4) normalized [ymin, xmin, ymax, xmax], scores: (N,) of one frame
+        in the case of more than one gates are detected, we want to select the nearest gate (biggest bounding box)
+        returns the biggest box scored at least threshold, None if there is none
+    '''
+    boxes_detected = boxes[scores >= threshold]   # only interested in the bounding boxes that show detection
+    if len(boxes_detected) == 0:
+        return None
+    Area = (boxes_detected[:, 2] - boxes_detected[:, 0]) * (boxes_detected[:, 3] - boxes_detected[:, 1])
+    return boxes_detected[np.argmax(Area)]   # the first one if several have the maximum area
@@ -0,0 +1,85 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import time
+
+# see `man inotify`
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+def load_inotify():
+    '''
+        returns libc if it provides inotify (linux), None otherwise
+    '''
+    libc_name = ctypes.util.find_library('c')
+    if libc_name is None:
+        return None
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class DirectoryWatch(object):
+    '''
+        block until something is written or created in one of the watched directories
+        uses inotify when available, otherwise falls back to polling every poll_period seconds
+    '''
+    def __init__(self, paths, poll_period=0.01):
+        self.paths = list(paths)
+        self.poll_period = poll_period
+        self.fd = None
+
+        libc = load_inotify()
+        if libc is None:
+            return
+        fd = libc.inotify_init1(IN_NONBLOCK)
+        if fd < 0:
+            return
+        for path in self.paths:
+            if libc.inotify_add_watch(fd, os.fsencode(path), WATCH_MASK) < 0:
+                os.close(fd)
+                return
+        self.fd = fd
+
+    def is_using_inotify(self):
+        return self.fd is not None
+
+    def wait(self, timeout):
+        '''
+            returns True if the directories (may) have changed
+            with inotify, returns False when nothing happened within timeout
+        '''
+        if self.fd is None:
+            time.sleep(min(timeout, self.poll_period))
+            return True
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        self.drain()
+        return True
+
+    def drain(self):
+        '''
+            read the pending inotify events, we only care that something changed
+        '''
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
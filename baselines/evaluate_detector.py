@@ -0,0 +1,281 @@
+from argparse import ArgumentParser
+import csv
+import glob
+import math
+import os
+import threading
+import time
+import cv2
+import numpy as np
+import tensorflow as tf
+import detection_pipeline
+import latency
+
+'''
+Offline evaluation of the gate detector: throughput and accuracy over a directory of images
+
+    python evaluate_detector.py --dataset_path dataset/soccer_test --batch_size 8
+    python evaluate_detector.py --dataset_path dataset/labelled --box_labels dataset/labelled/test_labels.csv
+'''
+
+MODEL_NAME = 'inference_graph'
+CWD_PATH = os.getcwd()
+PATH_TO_CKPT = os.path.join(CWD_PATH, MODEL_NAME, 'frozen_inference_graph.pb')
+DETECTION_THRESHOLD = 0.97
+NUM_WARMUP_BATCHES = 2
+MIN_IOU = 0.5
+CAM_FOV = 90.0   # in degrees, camera '0' of the pose sampler
+
+
+class GateDetector(object):
+    '''
+        the frozen detection graph in a session reused for every batch
+        detect(images) -> boxes (B,N,4), scores (B,N) for a (B,H,W,3) uint8 batch
+    '''
+    def __init__(self, graph_path=PATH_TO_CKPT, gpu_memory_fraction=0.7):
+        self.graph = tf.Graph()
+        with self.graph.as_default():
+            graph_def = tf.GraphDef()
+            with tf.gfile.GFile(graph_path, 'rb') as fid:
+                graph_def.ParseFromString(fid.read())
+                tf.import_graph_def(graph_def, name='')
+            config = tf.ConfigProto()
+            config.gpu_options.per_process_gpu_memory_fraction = gpu_memory_fraction
+            self.sess = tf.Session(graph=self.graph, config=config)
+        self.image_tensor = self.graph.get_tensor_by_name('image_tensor:0')
+        self.detection_boxes = self.graph.get_tensor_by_name('detection_boxes:0')
+        self.detection_scores = self.graph.get_tensor_by_name('detection_scores:0')
+
+    def detect(self, images):
+        return self.sess.run([self.detection_boxes, self.detection_scores], feed_dict={self.image_tensor: images})
+
+    def close(self):
+        self.sess.close()
+
+
+def get_image_paths(dataset_path):
+    # same order as the rows of gate_training_data.csv, see racing_utils.dataset_utils.read_images()
+    image_dir = os.path.join(dataset_path, 'images')
+    if not os.path.isdir(image_dir):
+        image_dir = dataset_path
+    image_paths = []
+    for extension in ('png', 'jpg', 'jpeg'):
+        image_paths += glob.glob(os.path.join(image_dir, f'*.{extension}'))
+    return sorted(image_paths)
+
+
+def read_batches(image_paths, batch_size, batches, is_active):
+    '''
+        reads the images into (B,H,W,3) batches and puts them in the batches list, None at the end
+        a batch is cut short when the size of the images changes, the detector needs one size per batch
+    '''
+    images, paths = [], []
+    for image_path in image_paths:
+        if not is_active():
+            break
+        image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"cannot read {image_path}")
+            continue
+        if images and (image.shape != images[0].shape or len(images) == batch_size):
+            batches.put((np.stack(images), paths))
+            images, paths = [], []
+        images.append(image)
+        paths.append(image_path)
+    if images:
+        batches.put((np.stack(images), paths))
+    batches.put(None)
+
+
+class BatchQueue(object):
+    '''
+        bounded queue between the reading thread and the inference, so reading stays a few batches ahead
+    '''
+    def __init__(self, max_size=4):
+        self.max_size = max_size
+        self.items = []
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.items) < self.max_size)
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def get(self):
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.items) > 0)
+            item = self.items.pop(0)
+            self.condition.notify_all()
+            return item
+
+
+def read_box_labels(file_path):
+    '''
+        {filename: (M,4) normalized [ymin, xmin, ymax, xmax]} from a csv of pixel boxes
+    '''
+    labels = {}
+    with open(file_path) as f:
+        for row in csv.DictReader(f):
+            width, height = float(row['width']), float(row['height'])
+            box = [float(row['ymin']) / height, float(row['xmin']) / width, float(row['ymax']) / height, float(row['xmax']) / width]
+            labels.setdefault(row['filename'], []).append(box)
+    return {filename: np.array(boxes) for filename, boxes in labels.items()}
+
+
+def read_pose_labels(file_path, image_paths):
+    '''
+        {image path: (r, theta, psi, phi_rel)} from gate_training_data.csv, one row per image in order
+    '''
+    table = np.loadtxt(file_path, delimiter=' ', ndmin=2)
+    return {image_path: row for image_path, row in zip(image_paths, table)}
+
+
+def get_projected_center(pose, width, height, fov_degrees=CAM_FOV):
+    '''
+        normalized (x, y) image position of the gate center placed by racing_utils.geom_utils.randomGatePose()
+        at polar (r, theta, psi) of the drone (x forward, y right, z down)
+    '''
+    r, theta, psi = pose[:3]
+    x = r * math.cos(theta) * math.sin(psi)
+    y = r * math.sin(theta) * math.sin(psi)
+    z = r * math.cos(psi)
+    tan_half_fov = math.tan(math.radians(fov_degrees) / 2.)
+    return 0.5 + y / x / (2. * tan_half_fov), 0.5 + z / x / (2. * tan_half_fov) * width / height
+
+
+def get_iou(box, boxes):
+    '''
+        IoU of box (4,) with each of boxes (M,4)
+    '''
+    ymin = np.maximum(box[0], boxes[:, 0])
+    xmin = np.maximum(box[1], boxes[:, 1])
+    ymax = np.minimum(box[2], boxes[:, 2])
+    xmax = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(ymax - ymin, 0, None) * np.clip(xmax - xmin, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / (area + areas - intersection)
+
+
+class DetectionAccuracy(object):
+    '''
+        box labels: greedy matching of the detections (by score) with the labels at IoU >= min_iou
+        pose labels: the gate of the racers (biggest box) against the projected gate center
+    '''
+    def __init__(self, threshold=DETECTION_THRESHOLD, min_iou=MIN_IOU):
+        self.threshold = threshold
+        self.min_iou = min_iou
+        self.num_true_positives = 0
+        self.num_false_positives = 0
+        self.num_false_negatives = 0
+        self.num_pose_images = 0
+        self.num_gates_detected = 0
+        self.num_centers_in_box = 0
+        self.center_errors = []
+
+    def add_box_labels(self, boxes, scores, label_boxes):
+        detected = boxes[scores >= self.threshold][np.argsort(-scores[scores >= self.threshold])]
+        is_matched = np.zeros(len(label_boxes), dtype=np.bool_)
+        for box in detected:
+            ious = get_iou(box, label_boxes) if len(label_boxes) else np.zeros(0)
+            ious[is_matched] = 0.
+            if len(ious) and ious.max() >= self.min_iou:
+                is_matched[np.argmax(ious)] = True
+                self.num_true_positives += 1
+            else:
+                self.num_false_positives += 1
+        self.num_false_negatives += int((~is_matched).sum())
+
+    def add_pose_label(self, boxes, scores, pose, image_shape):
+        self.num_pose_images += 1
+        box = detection_pipeline.get_biggest_box(boxes, scores, self.threshold)
+        if box is None:
+            return
+        self.num_gates_detected += 1
+        center_x, center_y = get_projected_center(pose, image_shape[1], image_shape[0])
+        self.center_errors.append(math.hypot((box[1] + box[3]) / 2 - center_x, (box[0] + box[2]) / 2 - center_y))
+        if box[0] <= center_y <= box[2] and box[1] <= center_x <= box[3]:
+            self.num_centers_in_box += 1
+
+    def __str__(self):
+        lines = []
+        if self.num_true_positives + self.num_false_positives + self.num_false_negatives > 0:
+            precision = self.num_true_positives / max(self.num_true_positives + self.num_false_positives, 1)
+            recall = self.num_true_positives / max(self.num_true_positives + self.num_false_negatives, 1)
+            lines.append(f"boxes (IoU >= {self.min_iou}): precision = {precision:.3f}, recall = {recall:.3f}, "
+                         f"tp = {self.num_true_positives}, fp = {self.num_false_positives}, fn = {self.num_false_negatives}")
+        if self.num_pose_images > 0:
+            line = f"gates: detected in {self.num_gates_detected}/{self.num_pose_images} images"
+            if self.center_errors:
+                line += f", center in box = {self.num_centers_in_box / self.num_gates_detected:.3f}, " \
+                        f"center error (normalized) median = {np.median(self.center_errors):.3f}, p90 = {np.percentile(self.center_errors, 90):.3f}"
+            lines.append(line)
+        return "\n".join(lines) if lines else "no labels"
+
+
+def main(args):
+    image_paths = get_image_paths(args.dataset_path)
+    if args.max_images:
+        image_paths = image_paths[:args.max_images]
+    if not image_paths:
+        print(f"no images in {args.dataset_path}")
+        return
+    box_labels = read_box_labels(args.box_labels) if args.box_labels else {}
+    pose_label_path = os.path.join(args.dataset_path, 'gate_training_data.csv')
+    pose_labels = read_pose_labels(pose_label_path, image_paths) if not box_labels and os.path.exists(pose_label_path) else {}
+
+    detector = GateDetector(args.graph)
+    accuracy = DetectionAccuracy(args.threshold)
+    batch_latency = latency.LatencyHistogram()
+    batches = BatchQueue()
+    is_reading = True
+    reader = threading.Thread(target=read_batches, args=(image_paths, args.batch_size, batches, lambda: is_reading), daemon=True)
+    reader.start()
+
+    num_batches = 0
+    num_images = 0
+    inference_time = 0.
+    try:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            images, paths = batch
+            start = time.perf_counter()
+            boxes, scores = detector.detect(images)
+            batch_time = time.perf_counter() - start
+            num_batches += 1
+            # the first batches build the kernels and allocate the memory, they are not timed
+            if num_batches > NUM_WARMUP_BATCHES:
+                batch_latency.record(batch_time * 1e6)
+                inference_time += batch_time
+                num_images += len(images)
+
+            for i, image_path in enumerate(paths):
+                if os.path.basename(image_path) in box_labels:
+                    accuracy.add_box_labels(boxes[i], scores[i], box_labels[os.path.basename(image_path)])
+                elif image_path in pose_labels:
+                    accuracy.add_pose_label(boxes[i], scores[i], pose_labels[image_path], images.shape[1:])
+    finally:
+        is_reading = False
+        detector.close()
+
+    print(f"graph: {args.graph}")
+    print(f"images: {len(image_paths)}, batch size: {args.batch_size}, batches: {num_batches} ({min(num_batches, NUM_WARMUP_BATCHES)} warm-up)")
+    if num_images > 0:
+        print(f"throughput: {num_images / inference_time:.1f} images/s")
+        print(f"batch latency: {batch_latency}")
+    print(accuracy)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--dataset_path', type=str, required=True)
+    parser.add_argument('--graph', type=str, default=PATH_TO_CKPT)
+    parser.add_argument('--batch_size', type=int, default=8)
+    parser.add_argument('--threshold', type=float, default=DETECTION_THRESHOLD)
+    parser.add_argument('--box_labels', type=str, default=None)
+    parser.add_argument('--max_images', type=int, default=None)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,119 @@
+import threading
+import airsimneurips as airsim
+import cv2
+import numpy as np
+
+'''
+Camera frames from simGetImages without copies, resized into preallocated buffers when asked for a smaller resolution
+
+    acquisition = FrameAcquisition(airsim_client, "fpv_cam", airsim.ImageType.Scene)
+    img_rgb = acquisition.get_frame()       # H x W x 3 uint8, None if the response is broken
+    acquisition.release(img_rgb)            # when done with the frame
+'''
+
+NUM_FRAME_BUFFERS = 4
+
+
+def get_camera_pose(response):
+    '''
+        pose of the camera when the frame of the ImageResponse was taken
+    '''
+    return airsim.Pose(response.camera_position, response.camera_orientation)
+
+
+class FramePool(object):
+    '''
+        preallocated frames of one shape, a frame is acquire()d for a new image and release()d when
+        it is not used anymore, more are allocated if all of them are in use
+    '''
+    def __init__(self, shape, num_buffers=NUM_FRAME_BUFFERS):
+        self.shape = shape
+        self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(num_buffers)]
+        self.buffer_ids = set(id(buffer) for buffer in self.buffers)
+        self.free_buffers = list(self.buffers)
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.free_buffers:
+                return self.free_buffers.pop()
+            buffer = np.empty(self.shape, dtype=np.uint8)
+            self.buffers.append(buffer)
+            self.buffer_ids.add(id(buffer))
+            return buffer
+
+    def release(self, buffer):
+        if id(buffer) not in self.buffer_ids:
+            return
+        with self.lock:
+            self.free_buffers.append(buffer)
+
+    def __len__(self):
+        return len(self.buffers)
+
+
+class FrameAcquisition(object):
+    '''
+        width, height: resolution the frames are wanted at, None for the resolution of the camera,
+        only one of them keeps the aspect ratio of the camera
+    '''
+    def __init__(self, airsim_client, camera_name="fpv_cam", image_type=airsim.ImageType.Scene, width=None, height=None,
+                 num_buffers=NUM_FRAME_BUFFERS):
+        self.airsim_client = airsim_client
+        self.request = [airsim.ImageRequest(camera_name, image_type, False, False)]
+        self.width = width
+        self.height = height
+        self.num_buffers = num_buffers
+        self.pool = None
+        self.num_frames = 0
+        self.num_resized = 0
+
+    def get_response(self):
+        return self.airsim_client.simGetImages(self.request)[0]
+
+    def get_size(self, camera_width, camera_height):
+        '''
+            (width, height) of the frames, a missing one keeps the aspect ratio of the camera
+        '''
+        if self.width is None and self.height is None:
+            return camera_width, camera_height
+        if self.height is None:
+            return self.width, max(int(round(self.width * camera_height / camera_width)), 1)
+        if self.width is None:
+            return max(int(round(self.height * camera_width / camera_height)), 1), self.height
+        return self.width, self.height
+
+    def decode(self, response):
+        '''
+            ImageResponse -> H x W x C uint8 frame, None if the size of the data does not match the resolution
+        '''
+        num_pixels = response.width * response.height
+        # the data of a broken response is empty, or not a whole number of pixels
+        if num_pixels == 0 or len(response.image_data_uint8) == 0 or len(response.image_data_uint8) % num_pixels != 0:
+            return None
+        num_channels = len(response.image_data_uint8) // num_pixels
+        img = np.frombuffer(response.image_data_uint8, dtype=np.uint8).reshape(response.height, response.width, num_channels)
+        self.num_frames += 1
+        width, height = self.get_size(response.width, response.height)
+        if response.width == width and response.height == height:
+            return img
+
+        # the camera renders more than this use case needs, set its resolution in settings.json to save the resize
+        shape = (height, width, num_channels)
+        if self.pool is None or self.pool.shape != shape:
+            self.pool = FramePool(shape, self.num_buffers)
+        frame = self.pool.acquire()
+        cv2.resize(img, (width, height), dst=frame, interpolation=cv2.INTER_AREA)
+        self.num_resized += 1
+        return frame
+
+    def get_frame(self):
+        return self.decode(self.get_response())
+
+    def release(self, frame):
+        if self.pool is not None and frame is not None:
+            self.pool.release(frame)
+
+    def __str__(self):
+        buffers = len(self.pool) if self.pool is not None else 0
+        return f"frames = {self.num_frames}, resized = {self.num_resized}, buffers = {buffers}"
@@ -0,0 +1,98 @@
+import os
+import threading
+import cv2
+import numpy as np
+from object_detection.utils import visualization_utils as vis_util
+
+'''
+Window showing the fpv frames with the gate detections, drawn on its own low-priority thread
+'''
+
+WINDOW_NAME = "img_rgb"
+# nice value of the viewer thread, so drawing never competes with the racer threads
+VIEWER_NICENESS = 19
+
+
+class FrameViewer(object):
+    '''
+        show(img_rgb, boxes, classes, scores) only copies the frame, the caller may reuse img_rgb
+        a frame that was not drawn yet is replaced by the new one
+    '''
+    def __init__(self, category_index, min_score_thresh, window_name=WINDOW_NAME):
+        self.category_index = category_index
+        self.min_score_thresh = min_score_thresh
+        self.window_name = window_name
+
+        # show() writes to frame while run() draws on drawn_frame, they are swapped for every frame drawn
+        self.frame = None
+        self.drawn_frame = None
+        self.detections = None
+        self.is_new_frame = False
+        self.num_shown = 0
+        self.num_dropped = 0
+        self.condition = threading.Condition()
+
+        self.viewer_thread = None
+        self.is_viewer_thread_active = False
+
+    def show(self, img_rgb, boxes, classes, scores):
+        with self.condition:
+            if self.frame is None or self.frame.shape != img_rgb.shape:
+                self.frame = np.empty_like(img_rgb)
+            np.copyto(self.frame, img_rgb)
+            self.detections = (boxes, classes, scores)
+            if self.is_new_frame:
+                self.num_dropped += 1
+            self.is_new_frame = True
+            self.condition.notify()
+
+    def draw(self, img_rgb, boxes, classes, scores):
+        vis_util.visualize_boxes_and_labels_on_image_array(
+            img_rgb,
+            np.squeeze(boxes),
+            np.squeeze(classes).astype(np.int32),
+            np.squeeze(scores),
+            self.category_index,
+            use_normalized_coordinates=True,
+            line_thickness=8,
+            min_score_thresh=self.min_score_thresh)
+        cv2.imshow(self.window_name, img_rgb)
+        cv2.waitKey(1)
+
+    def run(self):
+        try:
+            # linux schedules threads on their own, this only lowers the priority of the viewer thread
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), VIEWER_NICENESS)
+        except (AttributeError, OSError):
+            pass
+        while self.is_viewer_thread_active:
+            with self.condition:
+                while not self.is_new_frame and self.is_viewer_thread_active:
+                    self.condition.wait()
+                if not self.is_viewer_thread_active:
+                    break
+                img_rgb, self.frame = self.frame, self.drawn_frame
+                self.drawn_frame = img_rgb
+                detections = self.detections
+                self.is_new_frame = False
+            self.draw(img_rgb, *detections)
+            self.num_shown += 1
+        cv2.destroyWindow(self.window_name)
+
+    def start_viewer_thread(self):
+        if not self.is_viewer_thread_active:
+            self.is_viewer_thread_active = True
+            self.viewer_thread = threading.Thread(target=self.run, daemon=True)
+            self.viewer_thread.start()
+            print("Started frame viewer thread")
+
+    def stop_viewer_thread(self):
+        if self.is_viewer_thread_active:
+            with self.condition:
+                self.is_viewer_thread_active = False
+                self.condition.notify()
+            self.viewer_thread.join()
+            print(f"Stopped frame viewer thread: {self}")
+
+    def __str__(self):
+        return f"shown = {self.num_shown}, dropped = {self.num_dropped}"
@@ -0,0 +1,116 @@
+import math
+import numpy as np
+import gate_roi
+
+'''
+Constant velocity Kalman filter on the gate box (Mx, My, W, H), predicts the box between two runs of the detector
+'''
+
+DETECT_EVERY = 1
+MAX_PREDICTION_TIME = 0.3   # in seconds, the track is dropped after that long without a detection
+POSITION_NOISE = 0.05       # process noise of the box center and size, normalized units / s
+VELOCITY_NOISE = 0.5        # process noise of their velocities, normalized units / s^2
+MEASUREMENT_NOISE = 0.01    # normalized units
+
+
+def rotate_normalized_point(u, v, prev_orientation, curr_orientation, aspect_ratio, fov_degrees=gate_roi.FPV_CAM_FOV):
+    '''
+        normalized image point (u right, v down, in [0, 1]) seen from prev_orientation -> the same
+        direction seen from curr_orientation, the camera translation is ignored
+        aspect_ratio: height / width of the frame
+    '''
+    tan_half_fov = math.tan(math.radians(fov_degrees) / 2.)
+    ray = np.array([1., (u - 0.5) * 2. * tan_half_fov, (v - 0.5) * 2. * tan_half_fov * aspect_ratio])
+    ray = gate_roi.get_rotation_matrix(curr_orientation).T @ (gate_roi.get_rotation_matrix(prev_orientation) @ ray)
+    if ray[0] <= 0.:
+        return None
+    return 0.5 + ray[1] / ray[0] / (2. * tan_half_fov), 0.5 + ray[2] / ray[0] / (2. * tan_half_fov * aspect_ratio)
+
+
+class GateBoxTracker(object):
+    '''
+        update(box, capture_time, camera_pose) with the boxes found by the detector
+        predict(capture_time, camera_pose) -> predicted box, None if no gate is tracked
+        boxes are normalized [ymin, xmin, ymax, xmax] like the detector outputs them
+    '''
+    def __init__(self, aspect_ratio=0.75, max_prediction_time=MAX_PREDICTION_TIME):
+        self.aspect_ratio = aspect_ratio
+        self.max_prediction_time = max_prediction_time
+        # state: Mx, My, W, H and their velocities, the detector measures the first four (measurement matrix H)
+        self.H = np.hstack([np.eye(4), np.zeros((4, 4))])
+        self.R = np.eye(4) * MEASUREMENT_NOISE ** 2
+        self.num_updates = 0
+        self.num_predictions = 0
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.P = None
+        self.state_time = None
+        self.detection_time = None
+        self.camera_orientation = None
+        self.gate_idx = None
+
+    def is_tracking(self):
+        return self.x is not None
+
+    def get_transition(self, dt):
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        Q = np.diag([POSITION_NOISE ** 2 * dt] * 4 + [VELOCITY_NOISE ** 2 * dt] * 4)
+        return F, Q
+
+    def compensate_rotation(self, camera_pose):
+        if camera_pose is None:
+            return
+        if self.camera_orientation is not None:
+            center = rotate_normalized_point(self.x[0], self.x[1], self.camera_orientation, camera_pose.orientation, self.aspect_ratio)
+            if center is None:
+                # the gate went behind the camera
+                self.reset()
+                return
+            self.x[0], self.x[1] = center
+        self.camera_orientation = camera_pose.orientation
+
+    def propagate(self, capture_time, camera_pose):
+        self.compensate_rotation(camera_pose)
+        if not self.is_tracking():
+            return
+        dt = max(capture_time - self.state_time, 0.)
+        F, Q = self.get_transition(dt)
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+        self.state_time = capture_time
+
+    def update(self, box, capture_time, camera_pose=None, gate_idx=None):
+        z = np.array([(box[1] + box[3]) / 2, (box[0] + box[2]) / 2, box[3] - box[1], box[2] - box[0]])
+        self.num_updates += 1
+        if self.is_tracking() and gate_idx == self.gate_idx:
+            self.propagate(capture_time, camera_pose)
+        if not self.is_tracking() or gate_idx != self.gate_idx:
+            # new track
+            self.x = np.hstack([z, np.zeros(4)])
+            self.P = np.diag([MEASUREMENT_NOISE ** 2] * 4 + [1.] * 4)
+            self.state_time = capture_time
+            self.camera_orientation = camera_pose.orientation if camera_pose is not None else None
+        else:
+            S = self.H @ self.P @ self.H.T + self.R
+            K = self.P @ self.H.T @ np.linalg.inv(S)
+            self.x = self.x + K @ (z - self.H @ self.x)
+            self.P = (np.eye(8) - K @ self.H) @ self.P
+        self.detection_time = capture_time
+        self.gate_idx = gate_idx
+
+    def predict(self, capture_time, camera_pose=None):
+        if not self.is_tracking() or capture_time - self.detection_time > self.max_prediction_time:
+            self.reset()
+            return None
+        self.propagate(capture_time, camera_pose)
+        if not self.is_tracking():
+            return None
+        self.num_predictions += 1
+        mx, my, w, h = self.x[:4]
+        return np.array([my - h / 2, mx - w / 2, my + h / 2, mx + w / 2])
+
+    def __str__(self):
+        return f"detections = {self.num_updates}, predictions = {self.num_predictions}"
@@ -0,0 +1,86 @@
+import concurrent.futures
+import functools
+import threading
+import airsimneurips as airsim
+import track_cache
+
+'''
+Gate poses of a level, fetched by a pool of clients and kept per (level, race tier)
+'''
+
+NUM_FETCH_CLIENTS = 4
+MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS = 10
+
+
+class GatePoseCache(object):
+    '''
+        get_gate_poses(airsim_client, level_name, race_tier) -> (gate names sorted along the track, poses)
+        the first call for a level queries the simulator (or the track cache), the next ones return the memoized poses
+    '''
+    def __init__(self, num_clients=NUM_FETCH_CLIENTS, max_trials=MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS, track_cache=None):
+        self.num_clients = num_clients
+        self.max_trials = max_trials
+        self.track_cache = track_cache
+        self.poses = {}
+        self.lock = threading.Lock()
+        self.clients = threading.local()
+        self.executor = None
+
+    def get_client(self):
+        # one client per fetching thread, created on its first request
+        client = getattr(self.clients, "client", None)
+        if client is None:
+            client = self.clients.client = airsim.MultirotorClient()
+            client.confirmConnection()
+        return client
+
+    def get_pose(self, race_tier, gate_name):
+        client = self.get_client()
+        # the client picks true or noisy poses after the tier of the race it started
+        if hasattr(client, "race_tier"):
+            client.race_tier = race_tier
+        return client.simGetObjectPose(gate_name)
+
+    def fetch_gate_poses(self, gate_names, race_tier=None):
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.num_clients, thread_name_prefix="gate_pose")
+        get_pose = functools.partial(self.get_pose, race_tier)
+        poses = list(self.executor.map(get_pose, gate_names))
+        counter = 0
+        nan_indices = [i for i, pose in enumerate(poses) if track_cache.is_nan_pose(pose)]
+        while nan_indices and counter < self.max_trials:
+            print(f"DEBUG: {[gate_names[i] for i in nan_indices]} position is nan, retrying...")
+            counter += 1
+            for i, pose in zip(nan_indices, self.executor.map(get_pose, [gate_names[i] for i in nan_indices])):
+                poses[i] = pose
+            nan_indices = [i for i in nan_indices if track_cache.is_nan_pose(poses[i])]
+        assert not nan_indices, f"ERROR: {[gate_names[i] for i in nan_indices]} position is still nan after {counter} trials"
+        return poses
+
+    def get_gate_poses(self, airsim_client, level_name, race_tier=None):
+        key = (level_name, race_tier)
+        with self.lock:
+            if key not in self.poses and self.track_cache is not None and race_tier == 1:
+                track = self.track_cache.get_track(airsim_client, level_name,
+                                                   lambda airsim_client, gate_names: self.fetch_gate_poses(gate_names, race_tier))
+                self.poses[key] = (track.gate_names, track.get_poses())
+            if key not in self.poses:
+                gate_names = track_cache.get_sorted_gate_names(airsim_client)
+                self.poses[key] = (gate_names, self.fetch_gate_poses(gate_names, race_tier))
+            gate_names, poses = self.poses[key]
+        return list(gate_names), list(poses)
+
+    def invalidate(self, level_name=None):
+        '''
+            forget the poses of level_name, or of every level if None
+            the next get_gate_poses() queries the simulator (or the track cache) again
+        '''
+        with self.lock:
+            for key in list(self.poses):
+                if level_name is None or key[0] == level_name:
+                    del self.poses[key]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,95 @@
+import math
+import cv2
+import numpy as np
+
+'''
+Region of interest of the next gate in the fpv_cam frame, from the gate pose and the camera pose
+'''
+
+FPV_CAM_FOV = 90.0     # in degrees, see utils.AirSimSettingsCreator
+GATE_SIZE = 2.0         # in meters, outer size of the gates
+ROI_MARGIN = 1.6        # size of the square over the projected size of the gate
+ROI_MIN_SIZE = 48       # in pixels
+ROI_INPUT_SIZE = 160    # in pixels, the crop is resized to input_size x input_size
+MIN_VISIBLE_FRACTION = 0.5
+
+
+def get_rotation_matrix(airsim_quat):
+    '''
+        airsim.Quaternionr -> 3x3 rotation matrix (body to world)
+    '''
+    w, x, y, z = airsim_quat.w_val, airsim_quat.x_val, airsim_quat.y_val, airsim_quat.z_val
+    return np.array([[1 - 2 * (y * y + z * z),     2 * (x * y - z * w),     2 * (x * z + y * w)],
+                     [    2 * (x * y + z * w), 1 - 2 * (x * x + z * z),     2 * (y * z - x * w)],
+                     [    2 * (x * z - y * w),     2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]])
+
+
+def project_point(point, camera_position, camera_orientation, width, height, fov_degrees=FPV_CAM_FOV):
+    '''
+        world point (airsim.Vector3r) -> (u, v, depth) in pixels of a width x height frame, None if it is behind the camera
+        the camera looks along its x axis, y is right and z is down in the image (NED)
+    '''
+    offset = np.array([point.x_val - camera_position.x_val, point.y_val - camera_position.y_val, point.z_val - camera_position.z_val])
+    x, y, z = get_rotation_matrix(camera_orientation).T @ offset
+    if x <= 0.:
+        return None
+    focal_length = (width / 2.) / math.tan(math.radians(fov_degrees) / 2.)
+    return width / 2. + focal_length * y / x, height / 2. + focal_length * z / x, x
+
+
+class GateROI(object):
+    '''
+        get_roi(frame_shape, gate_position, camera_pose) -> (y0, x0, y1, x1) in pixels, or None
+        crop(img, roi) -> input_size x input_size crop, in a buffer reused for every frame
+        to_frame_boxes(boxes, roi, frame_shape): normalized boxes of the crop -> normalized boxes of the frame
+    '''
+    def __init__(self, fov_degrees=FPV_CAM_FOV, gate_size=GATE_SIZE, margin=ROI_MARGIN, min_size=ROI_MIN_SIZE,
+                 input_size=ROI_INPUT_SIZE):
+        self.fov_degrees = fov_degrees
+        self.gate_size = gate_size
+        self.margin = margin
+        self.min_size = min_size
+        self.input_size = input_size
+        self.crop_buffer = None
+        self.num_roi = 0
+        self.num_full_frame = 0
+
+    def get_roi(self, frame_shape, gate_position, camera_pose):
+        height, width = frame_shape[:2]
+        projection = project_point(gate_position, camera_pose.position, camera_pose.orientation, width, height, self.fov_degrees)
+        if projection is None:
+            self.num_full_frame += 1
+            return None
+        u, v, depth = projection
+        focal_length = (width / 2.) / math.tan(math.radians(self.fov_degrees) / 2.)
+        half_size = max(self.margin * self.gate_size * focal_length / depth, self.min_size) / 2.
+        y0, x0, y1, x1 = v - half_size, u - half_size, v + half_size, u + half_size
+        roi = (int(max(y0, 0)), int(max(x0, 0)), int(min(y1, height)), int(min(x1, width)))
+        visible_area = max(roi[2] - roi[0], 0) * max(roi[3] - roi[1], 0)
+        # a gate mostly out of the frame, or closer than the frame is large, is looked for in the whole frame
+        if visible_area < MIN_VISIBLE_FRACTION * (2 * half_size) ** 2 or (roi[2] - roi[0]) >= height:
+            self.num_full_frame += 1
+            return None
+        self.num_roi += 1
+        return roi
+
+    def crop(self, img, roi):
+        y0, x0, y1, x1 = roi
+        shape = (self.input_size, self.input_size, img.shape[2])
+        if self.crop_buffer is None or self.crop_buffer.shape != shape:
+            self.crop_buffer = np.empty(shape, dtype=img.dtype)
+        cv2.resize(img[y0:y1, x0:x1], (self.input_size, self.input_size), dst=self.crop_buffer, interpolation=cv2.INTER_AREA)
+        return self.crop_buffer
+
+    def to_frame_boxes(self, boxes, roi, frame_shape):
+        '''
+            boxes: [..., 4] normalized [ymin, xmin, ymax, xmax] of the crop
+        '''
+        height, width = frame_shape[:2]
+        y0, x0, y1, x1 = roi
+        scale = np.array([(y1 - y0) / height, (x1 - x0) / width, (y1 - y0) / height, (x1 - x0) / width])
+        offset = np.array([y0 / height, x0 / width, y0 / height, x0 / width])
+        return boxes * scale + offset
+
+    def __str__(self):
+        return f"roi = {self.num_roi}, full frame = {self.num_full_frame}"
@@ -0,0 +1,49 @@
+import numpy as np
+
+'''
+Gate progress of a racer: the path flown since the last odometry sample against the next GATE_LOOKAHEAD gates
+'''
+
+# how many upcoming gates may be passed between two samples, also keeps a gate that comes back
+# near the drone later in the track (crossing tracks) from being taken for the next one
+GATE_LOOKAHEAD = 3
+
+
+def get_gate_centers(gate_poses):
+    '''
+        list of airsim.Pose -> (N,3) array of the gate positions
+    '''
+    return np.array([[pose.position.x_val, pose.position.y_val, pose.position.z_val] for pose in gate_poses], dtype=np.float64).reshape(-1, 3)
+
+
+def get_distances_to_segment(points, start, end):
+    '''
+        distances of the (N,3) points to the segment [start, end]
+    '''
+    direction = end - start
+    length_squared = np.dot(direction, direction)
+    if length_squared == 0.:
+        return np.linalg.norm(points - start, axis=1)
+    eta = np.clip((points - start) @ direction / length_squared, 0., 1.)
+    return np.linalg.norm(points - (start + eta[:, None] * direction), axis=1)
+
+
+def get_last_gate_passed_idx(gate_centers, next_gate_idx, prev_xyz, curr_xyz, pass_distances, lookahead=GATE_LOOKAHEAD):
+    '''
+        gate_centers:   (N,3) array, see get_gate_centers()
+        prev_xyz:       position of the previous sample, None for the first sample of a race
+        pass_distances: a gate is passed when the drone came within pass_distances[gate_idx] of its center,
+                        the gates without a distance are not tracked
+
+        returns the index of the furthest gate passed since prev_xyz, -1 if none
+    '''
+    end_idx = min(next_gate_idx + lookahead, len(gate_centers), len(pass_distances))
+    if next_gate_idx >= end_idx:
+        return -1
+    curr_xyz = np.asarray(curr_xyz, dtype=np.float64)
+    start_xyz = curr_xyz if prev_xyz is None else np.asarray(prev_xyz, dtype=np.float64)
+    distances = get_distances_to_segment(gate_centers[next_gate_idx:end_idx], start_xyz, curr_xyz)
+    is_passed = distances < np.asarray(pass_distances[next_gate_idx:end_idx])
+    if not is_passed.any():
+        return -1
+    return next_gate_idx + int(np.flatnonzero(is_passed)[-1])
@@ -3,7 +3,6 @@ import numpy as np
 
 import os
 import sys
-import math
 
 import airsimneurips as airsim
 # print(os.path.abspath(airsim.__file__))
@@ -14,8 +13,10 @@ curr_dir = os.path.dirname(os.path.abspath(__file__))
 import_path = os.path.join(curr_dir, '..')
 sys.path.insert(0, import_path)
 import racing_utils
+import track_cache
+import frame_acquisition
 
-MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS = 10
+LEVEL_NAME = 'Soccer_Field_Easy'
 
 GATE_YAW_RANGE = [-np.pi, np.pi]  # world theta gate
 UAV_X_RANGE = [-30, 30] # world x quad
@@ -42,10 +43,12 @@ class PoseSampler:
         self.client = airsim.MultirotorClient()
 
         self.client.confirmConnection()
-        self.client.simLoadLevel('Soccer_Field_Easy')
+        self.client.simLoadLevel(LEVEL_NAME)
         print("Start race")
         time.sleep(4)
         self.client = airsim.MultirotorClient()
+        # frames of camera '0' at its resolution, read without copies
+        self.frame_acquisition = frame_acquisition.FrameAcquisition(self.client, '0', airsim.ImageType.Scene)
         self.configureEnvironment()
         self.gate_object_names_sorted = None
         self.gate_poses_ground_truth = None
@@ -70,7 +73,7 @@ class PoseSampler:
             self.client.simSetObjectPose(self.tgt_name, p_o_g, True)
             # self.client.plot_tf([p_o_g], duration=20.0)
         # request quad img from AirSim
-        image_response = self.client.simGetImages([airsim.ImageRequest('0', airsim.ImageType.Scene, False, False)])[0]
+        image_response = self.frame_acquisition.get_response()
         # save all the necessary information to file
         self.writeImgToFile(image_response)
         self.writePosToFile(r, theta, psi, phi_rel)
@@ -101,9 +104,8 @@ class PoseSampler:
 
     # write image to file
     def writeImgToFile(self, image_response):
-        if len(image_response.image_data_uint8) == image_response.width * image_response.height * 3:
-            img1d = np.fromstring(image_response.image_data_uint8, dtype=np.uint8)  # get numpy array
-            img_rgb = img1d.reshape(image_response.height, image_response.width, 3)  # reshape array to 4 channel image array H X W X 3
+        img_rgb = self.frame_acquisition.decode(image_response)  # H X W X 3 view of the response, no copy
+        if img_rgb is not None and img_rgb.shape[2] == 3:
             cv2.imwrite(os.path.join(self.base_path, 'images', str(self.curr_idx).zfill(len(str(self.num_samples))) + '.png'), img_rgb)  # write to png
         else:
             print('ERROR IN IMAGE SIZE -- NOT SUPPOSED TO HAPPEN')
@@ -114,23 +116,8 @@ class PoseSampler:
         self.file.write(data_string)
 
     # stores gate ground truth poses as a list of airsim.Pose() objects in self.gate_poses_ground_truth
+    # the track is read from the track cache, the simulator is only queried the first time
     def get_ground_truth_gate_poses(self):
-        gate_names_sorted_bad = sorted(self.client.simListSceneObjects("Gate.*"))
-        # gate_names_sorted_bad is of the form `GateN_GARBAGE`. for example:
-        # ['Gate0', 'Gate10_21', 'Gate11_23', 'Gate1_3', 'Gate2_5', 'Gate3_7', 'Gate4_9', 'Gate5_11', 'Gate6_13', 'Gate7_15', 'Gate8_17', 'Gate9_19']
-        # we sort them by their ibdex of occurence along the race track(N), and ignore the unreal garbage number after the underscore(GARBAGE)
-        gate_indices_bad = [int(gate_name.split('_')[0][4:]) for gate_name in gate_names_sorted_bad]
-        gate_indices_correct = sorted(range(len(gate_indices_bad)), key=lambda k: gate_indices_bad[k])
-        self.gate_object_names_sorted = [gate_names_sorted_bad[gate_idx] for gate_idx in gate_indices_correct]
-        self.gate_poses_ground_truth = []
-        for gate_name in self.gate_object_names_sorted:
-            curr_pose = self.client.simGetObjectPose(gate_name)
-            counter = 0
-            while (math.isnan(curr_pose.position.x_val) or math.isnan(curr_pose.position.y_val) or math.isnan(curr_pose.position.z_val)) and (counter < MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS):
-                print("DEBUG: {gate_name} position is nan, retrying...")
-                counter += 1
-                curr_pose = self.client.simGetObjectPose(gate_name)
-            assert not math.isnan(curr_pose.position.x_val), "ERROR: {gate_name} curr_pose.position.x_val is still {curr_pose.position.x_val} after {counter} trials"
-            assert not math.isnan(curr_pose.position.y_val), "ERROR: {gate_name} curr_pose.position.y_val is still {curr_pose.position.y_val} after {counter} trials"
-            assert not math.isnan(curr_pose.position.z_val), "ERROR: {gate_name} curr_pose.position.z_val is still {curr_pose.position.z_val} after {counter} trials"
-            self.gate_poses_ground_truth.append(curr_pose)
+        track = track_cache.TrackCache().get_track(self.client, LEVEL_NAME)
+        self.gate_object_names_sorted = track.gate_names
+        self.gate_poses_ground_truth = track.get_poses()
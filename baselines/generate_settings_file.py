@@ -1,3 +1,10 @@
+from argparse import ArgumentParser
 from utils import AirSimSettingsCreator
 
-AirSimSettingsCreator().write_airsim_neurips_baseline_settings_file()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    # fpv_cam resolution, match the --image_width/--image_height of the racers so their frames are never resized
+    parser.add_argument('--image_width', type=int, default=320)
+    parser.add_argument('--image_height', type=int, default=240)
+    args = parser.parse_args()
+    AirSimSettingsCreator().write_airsim_neurips_baseline_settings_file(image_width=args.image_width, image_height=args.image_height)
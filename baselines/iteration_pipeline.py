@@ -0,0 +1,75 @@
+import collections
+import concurrent.futures
+import os
+import time
+
+'''
+Work between two races (logging, optimizer step) on its own thread, overlapped with the simulator reset
+'''
+
+ITERATION_RATE_WINDOW = 20
+
+
+class IterationPipeline(object):
+    '''
+        window: iterations/hour is measured over the last window races
+    '''
+    def __init__(self, stats_file_name=None, window=ITERATION_RATE_WINDOW):
+        self.stats_file_name = stats_file_name
+        # one thread, so the iterations are logged in order
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="iteration")
+        self.race_start_times = collections.deque(maxlen=window + 1)
+        self.race_end_time = None
+        self.dead_time = 0.
+        self.total_dead_time = 0.
+        self.num_iterations = 0
+
+    def start_race(self):
+        self.race_start_times.append(time.perf_counter())
+
+    def submit(self, task, *args):
+        '''
+            runs task(*args) on the pipeline thread, returns its future
+        '''
+        self.race_end_time = time.perf_counter()
+        return self.executor.submit(task, *args)
+
+    def wait(self, future, iteration=None, race_time=None):
+        '''
+            the result of a submit(), when the next race can start
+        '''
+        result = future.result()
+        self.start_race()
+        self.dead_time = self.race_start_times[-1] - self.race_end_time
+        self.total_dead_time += self.dead_time
+        self.num_iterations += 1
+        print(f"iterations: {self}")
+        if self.stats_file_name is not None:
+            self.executor.submit(self.write_stats, iteration, race_time, self.dead_time, self.get_iterations_per_hour())
+        return result
+
+    def get_iterations_per_hour(self):
+        if len(self.race_start_times) < 2:
+            return 0.
+        return 3600. * (len(self.race_start_times) - 1) / (self.race_start_times[-1] - self.race_start_times[0])
+
+    def get_mean_dead_time(self):
+        return self.total_dead_time / self.num_iterations if self.num_iterations > 0 else 0.
+
+    def write_stats(self, iteration, race_time, dead_time, iterations_per_hour):
+        with open(self.stats_file_name, "a") as f:
+            f.write(f"iteration: {iteration}, race time: {race_time}, dead time: {dead_time:.2f} s, iterations/hour: {iterations_per_hour:.1f}\n")
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __str__(self):
+        return f"{self.get_iterations_per_hour():.1f}/hour, dead time = {self.dead_time:.2f} s (mean {self.get_mean_dead_time():.2f} s)"
+
+
+def get_iteration_file_name(log_file_name):
+    '''
+        the iteration stats of an iteration log: po5_2.txt -> po5_2_iterations.txt
+    '''
+    root, ext = os.path.splitext(log_file_name)
+    return f"{root}_iterations{ext or '.txt'}"
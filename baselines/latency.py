@@ -0,0 +1,127 @@
+import os
+import time
+import numpy as np
+
+'''
+Latency histograms of the phases of the racer callbacks (getMultirotorState, termination checks,
+gate detection, moveOnSpline dispatch, ...), dumped once per race next to the iteration log
+
+    recorder = LatencyRecorder()
+    start = time.perf_counter()
+    state = client.getMultirotorState()
+    start = recorder.record("getMultirotorState", start)    # returns now, the start of the next phase
+'''
+
+# HDR-style log-linear buckets: every power of 2 is split into 2 ** (SUB_BUCKET_BITS - 1) buckets,
+# so any value is recorded with a relative error below 2 ** (1 - SUB_BUCKET_BITS) (< 1.6 %)
+SUB_BUCKET_BITS = 7
+MAX_LATENCY_US = 60 * 1000 * 1000
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class LatencyHistogram(object):
+    '''
+        fixed memory histogram of latencies in microseconds, from 1 us to max_value
+        recording is O(1), percentiles are read from the bucket counts
+    '''
+    def __init__(self, sub_bucket_bits=SUB_BUCKET_BITS, max_value=MAX_LATENCY_US):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half_count = self.sub_bucket_count // 2
+        self.max_value = int(max_value)
+        num_buckets = max(self.max_value.bit_length() - sub_bucket_bits, 0) + 1
+        self.counts = np.zeros((num_buckets + 1) * self.sub_bucket_half_count, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self.counts[:] = 0
+        self.total_count = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def get_index(self, value):
+        # values below sub_bucket_count have their own bucket, the others share one with
+        # the values that only differ in the bits below the sub_bucket_bits most significant ones
+        shift = max(value.bit_length() - self.sub_bucket_bits, 0)
+        return shift * self.sub_bucket_half_count + (value >> shift)
+
+    def get_value(self, index):
+        '''
+            highest value recorded in the bucket
+        '''
+        shift = max(index // self.sub_bucket_half_count - 1, 0)
+        return ((index - shift * self.sub_bucket_half_count + 1) << shift) - 1
+
+    def record(self, value):
+        value = min(max(int(value), 0), self.max_value)
+        self.counts[self.get_index(value)] += 1
+        self.total_count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+        self.sum += value
+
+    def get_percentiles(self, percentiles=PERCENTILES):
+        if self.total_count == 0:
+            return [0] * len(percentiles)
+        cumulative_counts = np.cumsum(self.counts)
+        ranks = np.ceil(np.asarray(percentiles) / 100. * self.total_count).clip(1, self.total_count)
+        indices = np.searchsorted(cumulative_counts, ranks)
+        return [int(min(self.get_value(index), self.max)) for index in indices]
+
+    def get_mean(self):
+        return self.sum / self.total_count if self.total_count > 0 else 0.
+
+    def __str__(self):
+        percentiles = " ".join(f"p{p:g} {value:9d}" for p, value in zip(PERCENTILES, self.get_percentiles()))
+        return f"count {self.total_count:7d}    mean {self.get_mean():11.1f}    min {self.min or 0:9d}    " \
+               f"{percentiles}    max {self.max:9d}  us"
+
+
+class LatencyRecorder(object):
+    '''
+        one histogram per phase, created on the first record()
+        each phase is recorded by a single thread, dump() hands the histograms of the race over to
+        the caller and starts new ones, so the callbacks never wait for it
+    '''
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, phase, start):
+        '''
+            records the time since start (time.perf_counter()) for phase, returns now
+        '''
+        now = time.perf_counter()
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = LatencyHistogram()
+        histogram.record((now - start) * 1e6)
+        return now
+
+    def get_histograms(self):
+        histograms, self.histograms = self.histograms, {}
+        return histograms
+
+    def dump(self, file_path, title):
+        '''
+            appends the histograms of the phases to file_path and starts new ones
+        '''
+        write_histograms(file_path, title, self.get_histograms())
+
+
+def write_histograms(file_path, title, histograms):
+    '''
+        appends histograms (from LatencyRecorder.get_histograms()) to file_path
+    '''
+    with open(file_path, "a") as f:
+        f.write(f"\n{title}\n")
+        for phase, histogram in histograms.items():
+            f.write(f"    {phase:24s} {histogram}\n")
+
+
+def get_latency_file_name(log_file_name):
+    '''
+        the latency file of an iteration log: po5_2.txt -> po5_2_latency.txt
+    '''
+    root, ext = os.path.splitext(log_file_name)
+    return f"{root}_latency{ext or '.txt'}"
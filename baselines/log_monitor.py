@@ -1,178 +1,591 @@
+import asyncio
+import collections
 import glob
 import os
+import threading
 import time
+import traceback
+import numpy as np
+import dir_watch
 
 disqualified_racers = set()
 finished_racers = set()
 PATH_TO_LOG = '/home/usrg/god_ws/AirSim-Drone-Racing-Lab/ADRL/ADRL/ADRL/Saved/Logs/RaceLogs/'
 # PATH_TO_LOG = '/home/usrg/god_ws/AirSim-NeurIPS2019-Drone-Racing/AirSim_Qualification/AirSimExe/Saved/Logs/RaceLogs/'
 
+NUM_HEADER_LINES = 3
+NOT_PASSED_SCORE = (1000, 0)
+INITIAL_NUM_GATES = 32
+WATCHER_POLL_PERIOD = 0.01
+WATCHER_STOP_TIMEOUT = 0.1
+# in seconds, how often all the logs of a RaceLogs directory are stat'ed again
+LOG_RESCAN_PERIOD = 1.0
+
+# log key -> event kind, finished/disqualified only fire when the value turns 1
+EVENT_KINDS = {"gates_passed": "gate_passed",
+               "gates_missed": "gate_missed",
+               "collision_count": "collision",
+               "finished": "finished",
+               "disqualified": "disqualified"}
+
+# value is the logged value as int, e.g. the 1-indexed gate for gate_passed; time is in ms
+# instance is the index of the simulator instance (RaceLogs directory) the event comes from
+RaceEvent = collections.namedtuple('RaceEvent', ['kind', 'drone_name', 'time', 'value', 'instance'])
+
+
+class RaceEventTable(object):
+    '''
+        columnar per-gate table of one drone, filled in a single pass over the log
+        row i holds gate i (0-indexed, the log file counts gates from 1)
+            gate_passed_time    time the gate was passed [s], nan if not passed yet
+            gates_missed        the gate was followed by a gates_missed line
+            collision_count     collision count logged right after the gate
+            penalty             penalty logged right after the collision [s]
+            resolved            the line(s) after gates_passed have arrived
+    '''
+    def __init__(self, num_gates=INITIAL_NUM_GATES):
+        self.num_gates = 0
+        self.allocate(num_gates)
+
+    def allocate(self, capacity):
+        gate_passed_time = np.full(capacity, np.nan)
+        gates_missed = np.zeros(capacity, dtype=bool)
+        collision_count = np.zeros(capacity, dtype=np.int32)
+        penalty = np.zeros(capacity)
+        resolved = np.zeros(capacity, dtype=bool)
+        if self.num_gates > 0:
+            n = self.num_gates
+            gate_passed_time[:n] = self.gate_passed_time[:n]
+            gates_missed[:n] = self.gates_missed[:n]
+            collision_count[:n] = self.collision_count[:n]
+            penalty[:n] = self.penalty[:n]
+            resolved[:n] = self.resolved[:n]
+        self.gate_passed_time = gate_passed_time
+        self.gates_missed = gates_missed
+        self.collision_count = collision_count
+        self.penalty = penalty
+        self.resolved = resolved
+
+    def add_gate(self, gate_idx, gate_passed_time):
+        '''
+            gate_idx starts from 1 as in the log file
+            returns False if the gate already has a row
+        '''
+        row = gate_idx - 1
+        if row < 0:
+            return False
+        if row < self.num_gates and not np.isnan(self.gate_passed_time[row]):
+            return False
+        if row >= len(self.gate_passed_time):
+            self.allocate(max(2 * len(self.gate_passed_time), row + 1))
+        self.gate_passed_time[row] = gate_passed_time
+        self.num_gates = max(self.num_gates, row + 1)
+        return True
+
+    def resolve(self, gate_idx, missed=False, collision_count=0, penalty=0):
+        row = gate_idx - 1
+        self.gates_missed[row] = missed
+        self.collision_count[row] = collision_count
+        self.penalty[row] = penalty
+        self.resolved[row] = True
+
+    def get_scores(self, num_gates):
+        '''
+            (time, penalty) arrays of the first num_gates gates
+            a gate that is missed, not passed or not resolved yet scores NOT_PASSED_SCORE
+        '''
+        n = min(num_gates, self.num_gates)
+        times = np.full(num_gates, float(NOT_PASSED_SCORE[0]))
+        penalties = np.full(num_gates, float(NOT_PASSED_SCORE[1]))
+        valid = self.resolved[:n] & ~self.gates_missed[:n]
+        times[:n][valid] = self.gate_passed_time[:n][valid]
+        penalties[:n][valid] = self.penalty[:n][valid]
+        return times, penalties
+
+    def is_passed(self, gate_idx):
+        '''
+            a gates_passed line with gate_idx was logged
+        '''
+        row = gate_idx - 1
+        return 0 <= row < self.num_gates and not np.isnan(self.gate_passed_time[row])
+
+    def get_score(self, gate_idx):
+        row = gate_idx - 1
+        if row < 0 or row >= self.num_gates or not self.resolved[row] or self.gates_missed[row]:
+            return NOT_PASSED_SCORE
+        return (float(self.gate_passed_time[row]), float(self.penalty[row]))
+
+
+class DroneRaceState(object):
+    '''
+        running state of one drone, built from the race log lines of that drone
+        time and penalty are kept in milliseconds as they appear in the log
+    '''
+    def __init__(self, drone_name):
+        self.drone_name = drone_name
+        self.time = 0
+        self.gates_passed = 0
+        self.gates_missed = 0
+        self.collision_count = 0
+        self.penalty = 0
+        self.finished = False
+        self.disqualified = False
+        self.finish_time = None
+
+        # a gates_missed/collision_count line is only written when it happens
+        self.gate_missed_logged = False
+        self.collision_logged = False
+
+        self.table = RaceEventTable()
+        # the score of a passed gate is only known once the following line(s) arrive
+        # each entry is [gate_idx, waiting_for_penalty]
+        self.pending_gates = []
+
+    def process(self, key, value, race_time):
+        self.time = race_time
+        if self.pending_gates:
+            self.resolve_pending_gates(key, value)
+
+        if key == "gates_passed":
+            self.gates_passed = int(value)
+            if self.table.add_gate(self.gates_passed, race_time / 1000.):
+                self.pending_gates.append([self.gates_passed, False])
+        elif key == "gates_missed":
+            self.gates_missed = int(value)
+            self.gate_missed_logged = True
+        elif key == "collision_count":
+            self.collision_count = int(value)
+            self.collision_logged = True
+        elif key == "penalty":
+            self.penalty = int(value)
+        elif key == "disqualified":
+            self.disqualified = value == '1'
+        elif key == "finished":
+            if self.finish_time is None:
+                self.finish_time = race_time
+            self.finished = value == '1'
+
+    def resolve_pending_gates(self, key, value):
+        '''
+            the line right after gates_passed tells how the gate was passed
+                gates_missed            -> the drone missed some gate before it
+                collision_count         -> wait for the penalty line
+                anything else           -> no collision, no penalty
+        '''
+        still_pending = []
+        for pending in self.pending_gates:
+            gate_idx, waiting_for_penalty = pending
+            if waiting_for_penalty:
+                if key == "penalty":
+                    self.table.resolve(gate_idx, collision_count=self.collision_count, penalty=int(value) / 1000.)
+                else:
+                    still_pending.append(pending)
+            elif key == "gates_missed":
+                self.table.resolve(gate_idx, missed=True)
+            elif key == "collision_count":
+                pending[1] = True
+                still_pending.append(pending)
+            else:
+                self.table.resolve(gate_idx)
+        self.pending_gates = still_pending
+
+
+class RaceLogTail(object):
+    '''
+        keeps the race log open and parses only the lines appended since the last read
+    '''
+    def __init__(self, file_path, instance=0):
+        self.file_path = file_path
+        self.instance = instance
+        self.file = None
+        # events parsed but not dispatched yet, drained by LogMonitor
+        self.events = []
+        self.reopen()
+
+    def reopen(self):
+        '''
+            parse the log again from the top, also when it was truncated or replaced under the same name
+        '''
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.file_path, "rb")
+        self.offset = 0
+        self.partial_line = b''
+        self.header_lines_left = NUM_HEADER_LINES
+        self.drones = {}
+        self.last_time = 0
+        self.num_lines = 0
+
+    def is_rewritten(self):
+        try:
+            file_stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return False
+        return file_stat.st_ino != os.fstat(self.file.fileno()).st_ino or file_stat.st_size < self.offset
+
+    def close(self):
+        self.file.close()
+
+    def get_drone(self, drone_name):
+        if drone_name not in self.drones:
+            self.drones[drone_name] = DroneRaceState(drone_name)
+        return self.drones[drone_name]
+
+    def read_new_lines(self):
+        '''
+            read everything appended since the last call
+            an incomplete last line is kept until the simulator finishes writing it
+        '''
+        if self.is_rewritten():
+            self.reopen()
+        self.file.seek(self.offset)
+        chunk = self.file.read()
+        if not chunk:
+            return 0
+        self.offset += len(chunk)
+        lines = (self.partial_line + chunk).split(b'\n')
+        self.partial_line = lines.pop()
+
+        for line in lines:
+            self.process_line(line.decode())
+        return len(lines)
+
+    def process_line(self, line):
+        if self.header_lines_left > 0:
+            self.header_lines_left -= 1
+            return
+        token = line.split()
+        if not len(token) == 5:
+            return
+        drone_name, race_time, key, value = token[0], int(token[2]), token[3], token[4]
+        self.num_lines += 1
+        self.last_time = race_time
+        self.get_drone(drone_name).process(key, value, race_time)
+
+        if key in EVENT_KINDS and (value == '1' or key not in ("finished", "disqualified")):
+            self.events.append(RaceEvent(EVENT_KINDS[key], drone_name, race_time, int(value), self.instance))
+
+
+class RaceLogDirectory(object):
+    '''
+        finds the latest race log of a RaceLogs directory
+        the directory is only listed again when its mtime changes (a log was created or removed) or the
+        latest log was truncated or replaced, and then only the new files are stat'ed, so the cost does
+        not grow with the old logs. every rescan_period all the logs are stat'ed again, for an older log
+        rewritten in place under the same name
+    '''
+    def __init__(self, path_to_log, rescan_period=LOG_RESCAN_PERIOD):
+        self.path_to_log = path_to_log
+        self.rescan_period = rescan_period
+        self.dir_key = None
+        self.latest_key = None
+        self.ctimes = {}
+        self.latest_log = None
+        self.full_rescan_time = None
+
+    def get_latest_key(self):
+        '''
+            (inode, size) of the latest log, None if it is gone
+        '''
+        try:
+            file_stat = os.stat(self.latest_log)
+        except FileNotFoundError:
+            return None
+        return (file_stat.st_ino, file_stat.st_size)
+
+    def is_latest_log_changed(self):
+        latest_key = self.get_latest_key()
+        # appended lines only make it bigger
+        is_changed = latest_key is None or self.latest_key is None or latest_key[0] != self.latest_key[0] or \
+                     latest_key[1] < self.latest_key[1]
+        self.latest_key = latest_key
+        return is_changed
+
+    def get_latest_log(self):
+        dir_stat = os.stat(self.path_to_log)
+        dir_key = (dir_stat.st_ino, dir_stat.st_mtime_ns)
+        now = time.monotonic()
+        if self.full_rescan_time is None or now - self.full_rescan_time > self.rescan_period:
+            self.ctimes = {}
+            self.full_rescan_time = now
+            self.rescan()
+        elif dir_key != self.dir_key or self.latest_log is None or self.is_latest_log_changed():
+            self.rescan()
+        self.dir_key = dir_key
+        return self.latest_log
+
+    def rescan(self):
+        names = set(name for name in os.listdir(self.path_to_log) if name.endswith('.log'))
+        ctimes = {}
+        for name in names:
+            if name in self.ctimes:
+                ctimes[name] = self.ctimes[name]
+            else:
+                try:
+                    ctimes[name] = os.path.getctime(os.path.join(self.path_to_log, name))
+                except FileNotFoundError:
+                    pass
+        if self.latest_log is not None and os.path.basename(self.latest_log) in ctimes:
+            # the latest log was just written to, its cached ctime is stale
+            try:
+                ctimes[os.path.basename(self.latest_log)] = os.path.getctime(self.latest_log)
+            except FileNotFoundError:
+                pass
+        self.ctimes = ctimes
+        if not ctimes:
+            raise ValueError(f"no race log in {self.path_to_log}")
+        self.latest_log = os.path.join(self.path_to_log, max(ctimes, key=ctimes.get))
+        self.latest_key = self.get_latest_key()
+
+
+class RaceLogStream(object):
+    '''
+        the latest race log of one simulator instance (one RaceLogs directory)
+    '''
+    def __init__(self, path_to_log, instance):
+        self.path_to_log = path_to_log
+        self.instance = instance
+        self.log_directory = RaceLogDirectory(path_to_log)
+        self.tail = None
+        self.lock = threading.Lock()
+
+    def update(self):
+        '''
+            parse the lines appended to the latest race log since the last query
+            simStartRace/simResetRace create a new log, in which case the state starts over;
+            the new tail is fully built before it replaces the old one
+            returns (tail, events parsed since the last update)
+        '''
+        with self.lock:
+            latest_file = self.log_directory.get_latest_log()
+            if self.tail is None or self.tail.file_path != latest_file:
+                old_tail, self.tail = self.tail, RaceLogTail(latest_file, self.instance)
+                if old_tail is not None:
+                    old_tail.close()
+            tail = self.tail
+            tail.read_new_lines()
+            events, tail.events = tail.events, []
+        return tail, events
+
+
 class LogMonitor(object):
+    '''
+        path_to_log is one RaceLogs directory, or a list of them, one per simulator instance
+        queries take the drone name and the instance index (the position in that list)
+    '''
     def __init__(self, path_to_log=PATH_TO_LOG):
         self.path_to_log = path_to_log
+        if isinstance(path_to_log, str):
+            path_to_log = [path_to_log]
+        self.streams = [RaceLogStream(path, instance) for instance, path in enumerate(path_to_log)]
 
-    def open_file(self, path_to_log):
+        # event kind -> list of callbacks, each called as callback(RaceEvent)
+        self.callbacks = {kind: [] for kind in EVENT_KINDS.values()}
+        self.watcher_thread = None
+        self.is_watcher_thread_active = False
+        # True while the watcher thread or watch_async() keeps the state up to date
+        self.is_watching = False
+
+    def get_latest_log(self, path_to_log):
+        for stream in self.streams:
+            if path_to_log == stream.path_to_log:
+                return stream.log_directory.get_latest_log()
         list_of_files = glob.glob(path_to_log + '*.log')
-        latest_file = max(list_of_files, key=os.path.getctime)
+        return max(list_of_files, key=os.path.getctime)
+
+    def open_file(self, path_to_log):
+        latest_file = self.get_latest_log(path_to_log)
         # print("Opened file: " + latest_file)
-        return open(latest_file, "r+")
-    
+        return open(latest_file, "r")
+
     def skip_header(self, opened_file):
-        opened_file.readline()
-        opened_file.readline()
-        opened_file.readline()
-    
-    def get_score_at_gate(self, gate_idx):
+        for _ in range(NUM_HEADER_LINES):
+            opened_file.readline()
+
+    def update(self, instance=0):
+        tail, events = self.streams[instance].update()
+        self.dispatch(events)
+        return tail
+
+    def update_all(self):
+        for stream in self.streams:
+            try:
+                _, events = stream.update()
+            except ValueError:
+                continue    # no race log yet
+            self.dispatch(events)
+
+    def get_tail(self, instance=0):
+        '''
+            while the watcher thread runs it keeps the state up to date,
+            so queries do not touch the file
+        '''
+        tail = self.streams[instance].tail
+        if self.is_watching and tail is not None:
+            return tail
+        return self.update(instance)
+
+    def get_drone_state(self, drone_name="drone_1", instance=0):
+        tail = self.get_tail(instance)
+        drone = tail.drones.get(drone_name)
+        if drone is None:
+            # the drone has not logged anything yet
+            drone = DroneRaceState(drone_name)
+        return drone
+
+    def get_drone_states(self, drone_name=None, instance=0):
+        '''
+            every drone of the instance if drone_name is None
+        '''
+        if drone_name is None:
+            return list(self.get_tail(instance).drones.values())
+        return [self.get_drone_state(drone_name, instance)]
+
+    def subscribe(self, kind, callback):
+        assert(kind in self.callbacks), f"unknown race event: {kind}"
+        self.callbacks[kind].append(callback)
+
+    def on_gate_passed(self, callback):
+        self.subscribe("gate_passed", callback)
+
+    def on_gate_missed(self, callback):
+        self.subscribe("gate_missed", callback)
+
+    def on_collision(self, callback):
+        self.subscribe("collision", callback)
+
+    def on_finished(self, callback):
+        self.subscribe("finished", callback)
+
+    def on_disqualified(self, callback):
+        self.subscribe("disqualified", callback)
+
+    def dispatch(self, events):
+        for event in events:
+            for callback in self.callbacks[event.kind]:
+                try:
+                    callback(event)
+                except Exception:
+                    traceback.print_exc()
+
+    def watch(self, period):
+        # one watcher for all the instances
+        watch = dir_watch.DirectoryWatch([stream.path_to_log for stream in self.streams], poll_period=period)
+        is_changed = True
+        self.is_watching = True
+        try:
+            while self.is_watcher_thread_active:
+                if is_changed:
+                    self.update_all()
+                # the timeout only bounds how long stop_watcher_thread() waits
+                is_changed = watch.wait(WATCHER_STOP_TIMEOUT)
+        finally:
+            self.is_watching = False
+            watch.close()
+
+    async def watch_async(self, is_active, period=WATCHER_POLL_PERIOD):
+        '''
+            same as the watcher thread, as a coroutine on the caller's event loop
+            runs until is_active() returns False
+        '''
+        loop = asyncio.get_event_loop()
+        watch = dir_watch.DirectoryWatch([stream.path_to_log for stream in self.streams], poll_period=period)
+        is_changed = asyncio.Event()
+        if watch.is_using_inotify():
+            loop.add_reader(watch.fd, lambda: (watch.drain(), is_changed.set()))
+        self.is_watching = True
+        try:
+            self.update_all()
+            while is_active():
+                if watch.is_using_inotify():
+                    try:
+                        await asyncio.wait_for(is_changed.wait(), WATCHER_STOP_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        continue
+                    is_changed.clear()
+                else:
+                    await asyncio.sleep(period)
+                self.update_all()
+        finally:
+            self.is_watching = False
+            if watch.is_using_inotify():
+                loop.remove_reader(watch.fd)
+            watch.close()
+
+    def start_watcher_thread(self, period=WATCHER_POLL_PERIOD):
+        '''
+            parse the logs in the background as soon as the simulators write to them
+            and push the events to the registered callbacks
+        '''
+        if not self.is_watcher_thread_active:
+            self.is_watcher_thread_active = True
+            self.watcher_thread = threading.Thread(target=self.watch, args=(period,), daemon=True)
+            self.watcher_thread.start()
+            print("Started log watcher thread")
+
+    def stop_watcher_thread(self):
+        if self.is_watcher_thread_active:
+            self.is_watcher_thread_active = False
+            self.watcher_thread.join()
+            print("Stopped log watcher thread.")
+
+    def get_score_at_gate(self, gate_idx, drone_name="drone_1", instance=0):
         '''
             get time used to passed gate_idx (time + penalty)
             NOTE: the gate idx in the log file starts from 1, but from 0 in the code
         '''
-        counter = 0
-        penalty = 0
-        gate_passed_time = -1
-        f = self.open_file(self.path_to_log)
-        self.skip_header(f)
-        for line in f:
-            token = line.split()
-            if token[-2] == "gates_passed" and token[0] == "drone_1" and token[-1] == gate_idx:
-                gate_passed_time = int(token[2]) / 1000.
-                counter = 1
-            elif counter == 1 and token[-2] == "gates_missed":   # drone missed some gate
-                f.close()
-                # print(f"    The drone missed gate: {gate_idx} ")
-                return (1000, 0)
-            elif counter == 1 and not token[-2] == "collision_count":   # no collision
-                f.close()
-                return (gate_passed_time, penalty)
-            elif counter == 1 and token[-2] == "collision_count":   # there is collision
-                counter = 2
-            elif counter == 2 and token[-2] == "penalty":
-                penalty = int(token[-1]) / 1000.
-                f.close()
-                return (gate_passed_time, penalty)
-            
-            
+        drone = self.get_drone_state(drone_name, instance)
         # print (f"    The drone did not pass the gate_idx: {gate_idx}")
-        return (1000, 0)
-
-
-    def get_race_time(self, drone_name):
-        f = self.open_file(self.path_to_log)
-        self.skip_header(f)
-        for line in f:
-            token = line.split()
-            
-            if token[0] == drone_name and token[3] == "finished":
-                # print("finish time", token[2])
-                f.close()
-                return token[2]
-        
-        assert(False), "Did not get the race time requested"
-    
-
-    def check_gate_passed(self, idx):
-        if not isinstance(idx, str):
-            idx = str(idx)
-        f = self.open_file(self.path_to_log)
-        self.skip_header(f)
-        for line in f:
-            token = line.split()
-            if token[-2] == "gates_passed" and token[0] == "drone_1" and token[-1] == idx:
-                f.close()
-                return True
-        f.close()
-        return False
-
-
-    def check_gate_missed(self):
-        f = self.open_file(self.path_to_log)
-        self.skip_header(f)
-        for line in f:
-            token = line.split()
-            if token[-2] == "gates_missed":
-                f.close()
-                return True
-        f.close()
-        return False
-
-
-    def check_collision(self):
-        f = self.open_file(self.path_to_log)
-        self.skip_header(f)
-        for line in f:
-            token = line.split()
-            if token[-2] == "collision_count":
-                f.close()
-                return True
-        f.close()
-        return False
-
-    def get_last_gate_idx_before_termination(self):
-        gate_idx = 1
-        f = self.open_file(self.path_to_log)
-        self.skip_header(f)
-        for line in f:
-            token = line.split()
-            if token[-2] == "gates_passed":
-                gate_idx = token[-1]
-
-        f.close()
-        # print(f"gate_idx passed before termination {int(gate_idx) - 1}")
+        return drone.table.get_score(int(gate_idx))
+
+    def get_scores_at_gates(self, num_gates, drone_name="drone_1", instance=0):
+        '''
+            (time, penalty) arrays for gates 1..num_gates of the log, from a single parse
+            same values as calling get_score_at_gate for every gate
+        '''
+        return self.get_drone_state(drone_name, instance).table.get_scores(num_gates)
+
+    def get_race_time(self, drone_name, instance=0):
+        drone = self.get_drone_state(drone_name, instance)
+        assert(drone.finish_time is not None), "Did not get the race time requested"
+        # print("finish time", drone.finish_time)
+        return str(drone.finish_time)
+
+    def check_gate_passed(self, idx, drone_name="drone_1", instance=0):
+        # the gate itself was logged as passed, as the line scan did
+        return self.get_drone_state(drone_name, instance).table.is_passed(int(idx))
 
+    def check_gate_missed(self, drone_name=None, instance=0):
+        return any(drone.gate_missed_logged for drone in self.get_drone_states(drone_name, instance))
+
+    def check_collision(self, drone_name=None, instance=0):
+        return any(drone.collision_logged for drone in self.get_drone_states(drone_name, instance))
+
+    def get_last_gate_idx_before_termination(self, drone_name="drone_1", instance=0):
+        # gate 0 if the drone did not pass any gate yet
+        gate_idx = max(self.get_drone_state(drone_name, instance).gates_passed, 1)
+        # print(f"gate_idx passed before termination {int(gate_idx) - 1}")
         return int(gate_idx) - 1
 
-    def get_score(self, finish_time):
+    def get_score(self, finish_time, drone_name="drone_1", instance=0):
         '''
         score = (time, num_gates_passed, num_gates_missed, penalty)
         '''
-        f = self.open_file(self.path_to_log)
-        self.skip_header(f)
-        num_gates_missed = 0
-        for line in f:
-            token = line.split()
-            if token[2] == finish_time:
-                
-                if token[-2] == "gates_passed":
-                    num_gates_passed = int(token[-1])
-                elif token[-2] == "gates_missed":
-                    num_gates_missed = int(token[-1])
-                elif token[-2] == "penalty":
-                    penalty = int(token[-1]) / 1000.
-                elif token[-2] == "finished":
-                    race_time = int(finish_time) / 1000.
-                    # print(time, num_gates_passed, num_gates_missed, penalty)
-                    # return the score
-                    f.close()
-                    return (race_time, num_gates_passed, num_gates_missed, penalty)
-                else:
-                    continue
-
-        assert(False), "Did not get the score requested"
-                
-    def get_current_race_time(self):
-        penalty = 0
-        f = self.open_file(self.path_to_log)
-        self.skip_header(f)
-        for line in f:
-            token = line.split()
-            if not len(token) == 5:
-                break
-            elif token[-2] == "penalty" and token[0] == "drone_1":
-                penalty = int(token[-1])
-            current_race_time = int(token[2]) + penalty
-
-        f.close()
-        return current_race_time / 1000.
-
-    def read_log(self):
-        finish_time = self.get_race_time("drone_1")
-        return self.get_score(finish_time)
-        # for line in f:
-        #     print(line.split())
-        # for line in self.follow(f):
-        #     print("process lines")
-        #     self.process(line)
+        drone = self.get_drone_state(drone_name, instance)
+        assert(drone.finish_time is not None and str(drone.finish_time) == str(finish_time)), "Did not get the score requested"
+        race_time = drone.finish_time / 1000.
+        # print(time, num_gates_passed, num_gates_missed, penalty)
+        return (race_time, drone.gates_passed, drone.gates_missed, drone.penalty / 1000.)
+
+    def get_current_race_time(self, drone_name="drone_1", instance=0):
+        tail = self.get_tail(instance)
+        penalty = self.get_drone_state(drone_name, instance).penalty
+        return (tail.last_time + penalty) / 1000.
+
+    def read_log(self, drone_name="drone_1", instance=0):
+        finish_time = self.get_race_time(drone_name, instance)
+        return self.get_score(finish_time, drone_name, instance)
 
 if __name__ == "__main__":
     log_monitor = LogMonitor()
-    print(log_monitor.get_score_at_gate("5"))
\ No newline at end of file
+    print(log_monitor.get_score_at_gate("5"))
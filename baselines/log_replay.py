@@ -0,0 +1,178 @@
+from argparse import ArgumentParser
+import os
+import time
+import log_monitor
+
+'''
+Re-emit recorded RaceLogs into a scratch directory with their original timing, so that LogMonitor
+and the termination logic of the racers can be exercised without the simulator
+
+    python log_replay.py RaceLogs/*.log --out_dir /tmp/RaceLogs --speed 10
+    python log_replay.py RaceLogs/*.log --out_dir /tmp/RaceLogs --speed 0 --benchmark
+'''
+
+REPLAY_CHUNK_LINES = 1
+
+
+def read_race_log(file_path):
+    '''
+        returns (header_lines, [(race_time_ms, line), ...])
+        lines without a race time are replayed together with the previous line
+    '''
+    with open(file_path, "r") as f:
+        lines = f.readlines()
+    header = lines[:log_monitor.NUM_HEADER_LINES]
+    body = []
+    race_time = 0
+    for line in lines[log_monitor.NUM_HEADER_LINES:]:
+        token = line.split()
+        if len(token) == 5 and token[2].isdigit():
+            race_time = int(token[2])
+        if not line.endswith('\n'):
+            line += '\n'
+        body.append((race_time, line))
+    return header, body
+
+
+class TerminationProbe(object):
+    '''
+        same termination conditions as BaselineRacer.odometry_callback, computed from the log only
+            is_race_finished            -> the last gate is passed
+            is_slower_than_last_race    -> current race time > best_time
+            is_drone_missed_some_gate   -> a gates_missed line is in the log
+        the race time of the first condition that fires is kept in self.terminated_at
+    '''
+    def __init__(self, monitor, best_time=1000., finish_gate_idx=13):
+        self.monitor = monitor
+        self.best_time = best_time
+        self.finish_gate_idx = finish_gate_idx
+        self.reason = None
+        self.terminated_at = None
+
+    def is_race_finished(self):
+        return self.monitor.check_gate_passed(self.finish_gate_idx + 1)
+
+    def is_slower_than_last_race(self):
+        return self.monitor.get_current_race_time() > self.best_time
+
+    def is_drone_missed_some_gate(self):
+        return self.monitor.check_gate_missed()
+
+    def check(self):
+        if self.reason is not None:
+            return self.reason
+        for condition in (self.is_race_finished, self.is_slower_than_last_race, self.is_drone_missed_some_gate):
+            if condition():
+                self.reason = condition.__name__
+                self.terminated_at = self.monitor.get_current_race_time()
+                break
+        return self.reason
+
+
+class RaceLogReplayer(object):
+    '''
+        speed = N replays N times faster than recorded, speed = 0 replays as fast as possible
+        on_chunk() is called after every chunk_lines lines are flushed to the scratch log
+    '''
+    def __init__(self, log_files, out_dir, speed=1.0, chunk_lines=REPLAY_CHUNK_LINES):
+        self.log_files = list(log_files)
+        self.out_dir = out_dir
+        self.speed = speed
+        self.chunk_lines = chunk_lines
+        if not os.path.isdir(self.out_dir):
+            os.makedirs(self.out_dir)
+
+    def get_out_path(self, file_path):
+        '''
+            a new file for every replayed race, a log of the out_dir is never rewritten in place:
+            race.log -> race.log, race_1.log, race_2.log, ...
+        '''
+        root, ext = os.path.splitext(os.path.basename(file_path))
+        out_path = os.path.join(self.out_dir, root + ext)
+        num = 1
+        while os.path.exists(out_path):
+            out_path = os.path.join(self.out_dir, f"{root}_{num}{ext}")
+            num += 1
+        return out_path
+
+    def replay(self, on_race_start=None, on_chunk=None):
+        for file_path in self.log_files:
+            self.replay_file(file_path, on_race_start, on_chunk)
+
+    def replay_file(self, file_path, on_race_start=None, on_chunk=None):
+        header, body = read_race_log(file_path)
+        out_path = self.get_out_path(file_path)
+        with open(out_path, "x") as f:
+            f.writelines(header)
+            f.flush()
+            if on_race_start is not None:
+                on_race_start(out_path)
+
+            start = time.perf_counter()
+            first_race_time = body[0][0] if body else 0
+            for i in range(0, len(body), self.chunk_lines):
+                chunk = body[i:i + self.chunk_lines]
+                if self.speed > 0:
+                    deadline = start + (chunk[0][0] - first_race_time) / 1000. / self.speed
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                f.writelines(line for _, line in chunk)
+                f.flush()
+                if on_chunk is not None:
+                    on_chunk(chunk[-1][0])
+        return out_path
+
+
+def benchmark(log_files, out_dir, chunk_lines):
+    '''
+        parse throughput of LogMonitor on the replayed logs, as fast as possible
+    '''
+    monitor = log_monitor.LogMonitor(out_dir + os.sep)
+    replayer = RaceLogReplayer(log_files, out_dir, speed=0, chunk_lines=chunk_lines)
+    parse_time = [0.]
+
+    def on_chunk(race_time):
+        start = time.perf_counter()
+        monitor.update()
+        parse_time[0] += time.perf_counter() - start
+
+    replayer.replay(on_chunk=on_chunk)
+    num_lines = sum(len(read_race_log(file_path)[1]) for file_path in log_files)
+    print(f"lines: {num_lines}, parse time: {parse_time[0]:.3f} s, "
+          f"throughput: {num_lines / max(parse_time[0], 1e-9):.0f} lines/s")
+
+
+def main(args):
+    if args.benchmark:
+        benchmark(args.log_files, args.out_dir, args.chunk_lines)
+        return
+
+    monitor = log_monitor.LogMonitor(args.out_dir + os.sep)
+    probe = [None]
+
+    def on_race_start(out_path):
+        if probe[0] is not None:
+            print(f"    {probe[0].reason} at {probe[0].terminated_at}")
+        print(f"replaying {out_path}")
+        probe[0] = TerminationProbe(monitor, args.best_time, args.finish_gate_idx)
+
+    def on_chunk(race_time):
+        probe[0].check()
+
+    RaceLogReplayer(args.log_files, args.out_dir, args.speed, args.chunk_lines).replay(on_race_start, on_chunk)
+    if probe[0] is not None:
+        print(f"    {probe[0].reason} at {probe[0].terminated_at}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('log_files', type=str, nargs='+')
+    parser.add_argument('--out_dir', type=str, default='replay_logs')
+    parser.add_argument('--speed', type=float, default=1.0, help='N times faster than recorded, 0 for as fast as possible')
+    parser.add_argument('--chunk_lines', type=int, default=REPLAY_CHUNK_LINES)
+    parser.add_argument('--best_time', type=float, default=1000.)
+    parser.add_argument('--finish_gate_idx', type=int, default=13)
+    parser.add_argument('--benchmark', dest='benchmark', action='store_true', default=False)
+    args = parser.parse_args()
+    main(args)
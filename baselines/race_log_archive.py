@@ -0,0 +1,285 @@
+from argparse import ArgumentParser
+import datetime
+import glob
+import os
+import re
+import numpy as np
+import log_monitor
+
+'''
+Pack plain-text RaceLogs into one compressed npz archive and query it with numpy
+
+    python race_log_archive.py build archive.npz /path/to/RaceLogs/
+    python race_log_archive.py splits archive.npz --level Qualifier_Tier_2
+
+events table, one row per log line except odometry:
+    race, drone, event (dictionary encoded), time [ms], value
+odometry table, one row per odometry line:
+    race, drone, time [ms], xyzrpy (float32)
+race index, one row per log file:
+    file_name, level, tier, race_number, start_time (unix time), event/odometry row ranges
+'''
+
+# [TimeStamp]_[Level]_tier_[Tier#]_[Race#].log, the level name may contain underscores
+LOG_FILE_NAME = re.compile(r'^(?P<stamp>[^_]+)_(?P<level>.+)_tier_(?P<tier>\d+)_(?P<race>\d+)\.log$')
+TIMESTAMP_FORMATS = ['%Y-%m-%d-%H-%M-%S', '%Y.%m.%d-%H.%M.%S', '%Y%m%d-%H%M%S']
+ODOMETRY_EVENT = "odometry_XYZRPY"
+
+
+def parse_log_file_name(file_path):
+    '''
+        returns (level, tier, race_number, start_time)
+        falls back to the file mtime if the time stamp cannot be parsed
+    '''
+    file_name = os.path.basename(file_path)
+    start_time = os.path.getmtime(file_path)
+    match = LOG_FILE_NAME.match(file_name)
+    if match is None:
+        return "", -1, -1, start_time
+    for time_format in TIMESTAMP_FORMATS:
+        try:
+            start_time = datetime.datetime.strptime(match.group('stamp'), time_format).timestamp()
+            break
+        except ValueError:
+            continue
+    return match.group('level'), int(match.group('tier')), int(match.group('race')), start_time
+
+
+def parse_log_lines(file_path):
+    '''
+        returns (events, odometry) as lists of tuples with the drone and event names as strings
+    '''
+    events = []
+    odometry = []
+    with open(file_path, "r") as f:
+        for _ in range(log_monitor.NUM_HEADER_LINES):
+            f.readline()
+        for line in f:
+            token = line.split()
+            if not len(token) == 5:
+                continue
+            drone_name, race_time, key, value = token[0], int(token[2]), token[3], token[4]
+            if key == ODOMETRY_EVENT:
+                xyzrpy = [float(x) for x in value.strip('()').split(',')]
+                odometry.append((drone_name, race_time, xyzrpy))
+            else:
+                events.append((drone_name, race_time, key, float(value)))
+    return events, odometry
+
+
+def encode(names, dictionary):
+    '''
+        dictionary encode names with (and extend) the given dictionary (list of names)
+    '''
+    codes = {name: code for code, name in enumerate(dictionary)}
+    encoded = np.empty(len(names), dtype=np.uint8)
+    for i, name in enumerate(names):
+        if name not in codes:
+            codes[name] = len(dictionary)
+            dictionary.append(name)
+        encoded[i] = codes[name]
+    return encoded
+
+
+class RaceLogArchive(object):
+    def __init__(self):
+        self.drone_names = []
+        self.event_names = []
+
+        self.event_race = np.zeros(0, dtype=np.int32)
+        self.event_drone = np.zeros(0, dtype=np.uint8)
+        self.event_code = np.zeros(0, dtype=np.uint8)
+        self.event_time = np.zeros(0, dtype=np.int32)
+        self.event_value = np.zeros(0, dtype=np.float64)
+
+        self.odom_race = np.zeros(0, dtype=np.int32)
+        self.odom_drone = np.zeros(0, dtype=np.uint8)
+        self.odom_time = np.zeros(0, dtype=np.int32)
+        self.odom_xyzrpy = np.zeros((0, 6), dtype=np.float32)
+
+        self.race_file_name = np.zeros(0, dtype=str)
+        self.race_level = np.zeros(0, dtype=str)
+        self.race_tier = np.zeros(0, dtype=np.int32)
+        self.race_number = np.zeros(0, dtype=np.int32)
+        self.race_start_time = np.zeros(0, dtype=np.float64)
+        self.race_event_rows = np.zeros((0, 2), dtype=np.int64)
+        self.race_odom_rows = np.zeros((0, 2), dtype=np.int64)
+
+    @property
+    def num_races(self):
+        return len(self.race_file_name)
+
+    def add_logs(self, log_files):
+        '''
+            convert and append the given log files, the ones already in the archive are skipped
+        '''
+        known = set(self.race_file_name.tolist())
+        log_files = sorted(set(f for f in log_files if os.path.basename(f) not in known))
+        if not log_files:
+            return 0
+
+        event_columns = [[] for _ in range(5)]
+        odom_columns = [[] for _ in range(4)]
+        race_columns = [[] for _ in range(7)]
+        num_events = len(self.event_race)
+        num_odom = len(self.odom_race)
+        for race_idx, file_path in enumerate(log_files, start=self.num_races):
+            events, odometry = parse_log_lines(file_path)
+            level, tier, race_number, start_time = parse_log_file_name(file_path)
+
+            event_columns[0].append(np.full(len(events), race_idx, dtype=np.int32))
+            event_columns[1].append(encode([e[0] for e in events], self.drone_names))
+            event_columns[2].append(encode([e[2] for e in events], self.event_names))
+            event_columns[3].append(np.array([e[1] for e in events], dtype=np.int32))
+            event_columns[4].append(np.array([e[3] for e in events], dtype=np.float64))
+
+            odom_columns[0].append(np.full(len(odometry), race_idx, dtype=np.int32))
+            odom_columns[1].append(encode([o[0] for o in odometry], self.drone_names))
+            odom_columns[2].append(np.array([o[1] for o in odometry], dtype=np.int32))
+            odom_columns[3].append(np.array([o[2] for o in odometry], dtype=np.float32).reshape(-1, 6))
+
+            race_columns[0].append(os.path.basename(file_path))
+            race_columns[1].append(level)
+            race_columns[2].append(tier)
+            race_columns[3].append(race_number)
+            race_columns[4].append(start_time)
+            race_columns[5].append((num_events, num_events + len(events)))
+            race_columns[6].append((num_odom, num_odom + len(odometry)))
+            num_events += len(events)
+            num_odom += len(odometry)
+
+        assert(len(self.drone_names) < 256 and len(self.event_names) < 256), "too many names for uint8 codes"
+        self.event_race = np.concatenate([self.event_race] + event_columns[0])
+        self.event_drone = np.concatenate([self.event_drone] + event_columns[1])
+        self.event_code = np.concatenate([self.event_code] + event_columns[2])
+        self.event_time = np.concatenate([self.event_time] + event_columns[3])
+        self.event_value = np.concatenate([self.event_value] + event_columns[4])
+
+        self.odom_race = np.concatenate([self.odom_race] + odom_columns[0])
+        self.odom_drone = np.concatenate([self.odom_drone] + odom_columns[1])
+        self.odom_time = np.concatenate([self.odom_time] + odom_columns[2])
+        self.odom_xyzrpy = np.concatenate([self.odom_xyzrpy] + odom_columns[3])
+
+        self.race_file_name = np.concatenate([self.race_file_name, np.array(race_columns[0], dtype=str)])
+        self.race_level = np.concatenate([self.race_level, np.array(race_columns[1], dtype=str)])
+        self.race_tier = np.concatenate([self.race_tier, np.array(race_columns[2], dtype=np.int32)])
+        self.race_number = np.concatenate([self.race_number, np.array(race_columns[3], dtype=np.int32)])
+        self.race_start_time = np.concatenate([self.race_start_time, np.array(race_columns[4], dtype=np.float64)])
+        self.race_event_rows = np.concatenate([self.race_event_rows, np.array(race_columns[5], dtype=np.int64)])
+        self.race_odom_rows = np.concatenate([self.race_odom_rows, np.array(race_columns[6], dtype=np.int64)])
+        return len(log_files)
+
+    def save(self, file_path):
+        np.savez_compressed(file_path,
+                            drone_names=np.array(self.drone_names, dtype=str),
+                            event_names=np.array(self.event_names, dtype=str),
+                            event_race=self.event_race, event_drone=self.event_drone, event_code=self.event_code,
+                            event_time=self.event_time, event_value=self.event_value,
+                            odom_race=self.odom_race, odom_drone=self.odom_drone, odom_time=self.odom_time,
+                            odom_xyzrpy=self.odom_xyzrpy,
+                            race_file_name=self.race_file_name, race_level=self.race_level, race_tier=self.race_tier,
+                            race_number=self.race_number, race_start_time=self.race_start_time,
+                            race_event_rows=self.race_event_rows, race_odom_rows=self.race_odom_rows)
+
+    @classmethod
+    def load(cls, file_path):
+        archive = cls()
+        with np.load(file_path) as data:
+            for name in data.files:
+                setattr(archive, name, data[name])
+        archive.drone_names = archive.drone_names.tolist()
+        archive.event_names = archive.event_names.tolist()
+        return archive
+
+    def select_races(self, level=None, tier=None, start_time=None, end_time=None):
+        '''
+            indices of the races matching the level/tier and started within [start_time, end_time)
+        '''
+        mask = np.ones(self.num_races, dtype=bool)
+        if level is not None:
+            mask &= self.race_level == level
+        if tier is not None:
+            mask &= self.race_tier == tier
+        if start_time is not None:
+            mask &= self.race_start_time >= start_time
+        if end_time is not None:
+            mask &= self.race_start_time < end_time
+        return np.flatnonzero(mask)
+
+    def get_event_mask(self, event_name, drone_name="drone_1", races=None):
+        if event_name not in self.event_names or drone_name not in self.drone_names:
+            return np.zeros(len(self.event_code), dtype=bool)
+        mask = (self.event_code == self.event_names.index(event_name)) & \
+               (self.event_drone == self.drone_names.index(drone_name))
+        if races is not None:
+            mask &= np.isin(self.event_race, races)
+        return mask
+
+    def get_gate_passed_times(self, num_gates, drone_name="drone_1", races=None):
+        '''
+            (num_races, num_gates) time [s] each gate was first passed, nan if it was not
+            rows follow races (all races if None)
+        '''
+        if races is None:
+            races = np.arange(self.num_races)
+        races = np.asarray(races)
+        times = np.full((len(races), num_gates), np.inf)
+        mask = self.get_event_mask("gates_passed", drone_name, races)
+        gate = self.event_value[mask].astype(np.int64) - 1
+        valid = (gate >= 0) & (gate < num_gates)
+        race_to_row = np.full(self.num_races, -1, dtype=np.int64)
+        race_to_row[races] = np.arange(len(races))
+        row = race_to_row[self.event_race[mask][valid]]
+        # the earliest pass of a gate, the order of repeated indices in a fancy assignment is not defined
+        np.minimum.at(times, (row, gate[valid]), self.event_time[mask][valid] / 1000.)
+        times[np.isinf(times)] = np.nan
+        return times
+
+    def get_gate_splits(self, num_gates, drone_name="drone_1", races=None):
+        '''
+            (num_races, num_gates) time [s] from the previous gate (from the start for gate 0)
+        '''
+        times = self.get_gate_passed_times(num_gates, drone_name, races)
+        return np.diff(times, axis=1, prepend=0.)
+
+    def get_split_distribution(self, num_gates, drone_name="drone_1", races=None, percentiles=(5, 25, 50, 75, 95)):
+        '''
+            per gate percentiles of the splits over the races that passed the gate
+            returns (percentiles x num_gates array, number of races per gate)
+        '''
+        splits = self.get_gate_splits(num_gates, drone_name, races)
+        counts = np.sum(~np.isnan(splits), axis=0)
+        if len(splits) == 0:
+            return np.full((len(percentiles), num_gates), np.nan), counts
+        return np.nanpercentile(splits, percentiles, axis=0), counts
+
+
+def main(args):
+    if args.command == "build":
+        archive = RaceLogArchive.load(args.archive) if os.path.exists(args.archive) else RaceLogArchive()
+        log_files = []
+        for path in args.logs:
+            log_files += glob.glob(os.path.join(path, '*.log')) if os.path.isdir(path) else [path]
+        num_added = archive.add_logs(log_files)
+        archive.save(args.archive)
+        print(f"added {num_added} races, {archive.num_races} races in {args.archive}")
+    elif args.command == "splits":
+        archive = RaceLogArchive.load(args.archive)
+        races = archive.select_races(level=args.level, tier=args.tier)
+        distribution, counts = archive.get_split_distribution(args.num_gates, args.drone_name, races)
+        print(f"{len(races)} races")
+        for gate_idx in range(args.num_gates):
+            print(f"gate {gate_idx}: n = {counts[gate_idx]}, split p5/p25/p50/p75/p95 = {np.round(distribution[:, gate_idx], 2).tolist()}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('command', type=str, choices=["build", "splits"])
+    parser.add_argument('archive', type=str)
+    parser.add_argument('logs', type=str, nargs='*', help='RaceLogs directories or log files (build)')
+    parser.add_argument('--level', type=str, default=None)
+    parser.add_argument('--tier', type=int, default=None)
+    parser.add_argument('--num_gates', type=int, default=14)
+    parser.add_argument('--drone_name', type=str, default="drone_1")
+    args = parser.parse_args()
+    main(args)
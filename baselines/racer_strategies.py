@@ -0,0 +1,251 @@
+import copy
+import os
+import numpy as np
+import hyOpt
+import hyOpt_po
+import retrieve_best
+
+'''
+Hyperparameter optimizers of baseline_racer_engine.BaselineRacer
+
+the racer only talks to its strategy at the end of a race:
+    strategy.observe(race_time)             # the times at the gates of the race just flown
+    strategy.checkpoint(iteration)          # write the iteration to the log file
+    new_hyper = strategy.propose()          # hyperparameters of the next race
+
+    gd              hyOpt: keep the gates the current race won, mutate after them
+    po              hyOpt_po: keep the gates before the current race lost, mutate before it
+    random_search   new random hyperparameters every race, the best race is kept
+    GA              mutate the best race, the best race is kept
+    BO              optuna, one trial per race
+'''
+
+## Hyperparamters range
+V_MIN = 8.5
+V_MAX = 35
+A_MIN = 20
+A_MAX = 160
+D_MIN = 3.5
+D_MAX = 6.5
+
+FINISH_GATE_IDX = 13
+NUM_HYPER = FINISH_GATE_IDX + 1
+NUM_MUTATION = 2
+
+
+class RacerStrategy(object):
+    '''
+        hyper_opt.best_hyper / hyper_opt.curr_hyper: the best race so far / the race being flown
+        the racer flies hyper_opt.curr_hyper, it is replaced by what propose() returns
+
+        resume: restore the best hyperparameters and the iteration from the last iteration of log_file_name
+        terminate_slower_races: the racer stops a race as soon as it is slower than the best one
+    '''
+    hyper_opt_class = hyOpt.hyOpt
+    terminate_slower_races = True
+
+    def __init__(self, log_file_name, resume=True, num_hyper=NUM_HYPER):
+        self.log_file_name = log_file_name
+        self.iteration = 1
+        self.num_observed = 0
+
+        self.hyper_opt = self.hyper_opt_class(num_hyper)
+        self.hyper_opt.best_hyper.set_v_range((V_MIN, V_MAX))
+        self.hyper_opt.best_hyper.set_a_range((A_MIN, A_MAX))
+        self.hyper_opt.best_hyper.set_d_range((D_MIN, D_MAX))
+        self.hyper_opt.best_hyper.init_hypers(12, 50, 3.5)
+        self.hyper_opt.best_hyper.init_time()
+        self.hyper_opt.curr_hyper = copy.deepcopy(self.hyper_opt.best_hyper)
+
+        if resume:
+            self.restore()
+        self.data_logging = open(self.log_file_name, "a" if resume else "w")
+
+    def restore(self):
+        # if the simulation crashes, the search continues from the last iteration logged
+        if not os.path.exists(self.log_file_name):
+            return
+        last_iter, best_time, best_v, best_a, best_d = retrieve_best.retrieve_best(self.log_file_name)
+        if last_iter == 0:
+            return
+        self.set_best_hyper(best_v, best_a, best_d, best_time)
+        self.iteration = last_iter + 1
+
+    def set_best_hyper(self, v, a, d, time):
+        self.hyper_opt.best_hyper.v = np.array(v)
+        self.hyper_opt.best_hyper.a = np.array(a)
+        self.hyper_opt.best_hyper.d = np.array(d)
+        self.hyper_opt.best_hyper.time = np.array(time)
+
+    def get_first_hyper(self):
+        return self.hyper_opt.best_hyper
+
+    def get_next_hyper(self):
+        raise NotImplementedError
+
+    def propose(self):
+        if self.num_observed == 0:
+            return copy.deepcopy(self.get_first_hyper())
+        return self.get_next_hyper()
+
+    def observe(self, race_time):
+        self.hyper_opt.save_curr_time(race_time)
+        self.num_observed += 1
+
+    def checkpoint(self, iteration):
+        ## For the current iteration, write the best/current hyperparameter/time to the text file
+        self.iteration = iteration
+        self.data_logging.write(f"\niteration: {iteration}\n"
+                                f"best: {self.hyper_opt.best_hyper.time.tolist()}\n"
+                                f"time: {self.hyper_opt.curr_hyper.time.tolist()}\n"
+                                f"current_hyper_parameter\n"
+                                f"v: {self.hyper_opt.curr_hyper.v.tolist()}\n"
+                                f"a: {self.hyper_opt.curr_hyper.a.tolist()}\n"
+                                f"d: {self.hyper_opt.curr_hyper.d.tolist()}\n"
+                                f"BEST_hyper_parameter\n"
+                                f"v: {self.hyper_opt.best_hyper.v.tolist()}\n"
+                                f"a: {self.hyper_opt.best_hyper.a.tolist()}\n"
+                                f"d: {self.hyper_opt.best_hyper.d.tolist()}\n")
+        self.data_logging.flush()
+
+    def is_finished(self):
+        return False
+
+    def close(self):
+        self.data_logging.close()
+
+
+class HyOptStrategy(RacerStrategy):
+    def get_next_hyper(self):
+        idx = self.hyper_opt.update_best_hyper()
+        if idx == -1:
+            return self.hyper_opt.random_mutation_from_best(num_mutation=NUM_MUTATION)
+        return self.hyper_opt.random_mutation_from_best(num_mutation=NUM_MUTATION, start_idx=idx)
+
+
+class HyOptPoStrategy(RacerStrategy):
+    hyper_opt_class = hyOpt_po.hyOpt
+
+    def get_next_hyper(self):
+        idx = self.hyper_opt.update_best_hyper()
+        if idx == -1:
+            return self.hyper_opt.random_mutation_from_best(num_mutation=NUM_MUTATION)
+        return self.hyper_opt.random_mutation_from_best(num_mutation=NUM_MUTATION, end_idx=idx)
+
+
+class RandomSearchStrategy(RacerStrategy):
+    def update_best_hyper(self):
+        # update best hyperparameters only if wins
+        if self.hyper_opt.curr_win():
+            print("WIN")
+            self.hyper_opt.copy_curr_to_best_hyper()
+            self.hyper_opt.copy_curr_to_best_time()
+        else:
+            print("LOSE")
+
+    def get_random_hyper(self):
+        new_hyper = copy.deepcopy(self.hyper_opt.best_hyper)
+        new_hyper.random_init_hypers()
+        return new_hyper
+
+    def get_first_hyper(self):
+        return self.get_random_hyper()
+
+    def get_next_hyper(self):
+        self.update_best_hyper()
+        return self.get_random_hyper()
+
+
+class GeneticStrategy(RandomSearchStrategy):
+    def get_first_hyper(self):
+        return self.hyper_opt.best_hyper
+
+    def get_next_hyper(self):
+        self.update_best_hyper()
+        return self.hyper_opt.random_mutation_from_best(num_mutation=NUM_MUTATION)
+
+
+class OptunaStrategy(RacerStrategy):
+    '''
+        one optuna trial per race, the study is stored in <study_name>.db so the search can be resumed
+        the first trial of a new study flies the initial hyperparameters
+    '''
+    terminate_slower_races = False
+
+    def __init__(self, log_file_name, study_name, n_trials=1000, num_hyper=NUM_HYPER):
+        import optuna
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        self.study = optuna.create_study(study_name=study_name, storage=f"sqlite:///{study_name}.db", load_if_exists=True)
+        self.n_trials = n_trials
+        self.num_trials = 0
+        self.trial = None
+        super().__init__(log_file_name, resume=True, num_hyper=num_hyper)
+
+    def get_params(self, hyper):
+        params = {}
+        for i in range(self.hyper_opt.num_hyper):
+            params[f"v_{i}"] = hyper.v[i]
+            params[f"a_{i}"] = hyper.a[i]
+            params[f"d_{i}"] = hyper.d[i]
+        return params
+
+    def restore(self):
+        if not any(trial.value is not None for trial in self.study.trials):
+            return
+        best_params = self.study.best_params
+        self.set_best_hyper(
+            [np.round(best_params[f"v_{i}"], 2) for i in range(self.hyper_opt.num_hyper)],
+            [np.round(best_params[f"a_{i}"], 2) for i in range(self.hyper_opt.num_hyper)],
+            [np.round(best_params[f"d_{i}"], 2) for i in range(self.hyper_opt.num_hyper)],
+            self.hyper_opt.best_hyper.time)
+        self.hyper_opt.best_hyper.time[-1] = np.round(self.study.best_value, 2)
+        self.iteration = len(self.study.trials) + 1
+
+    def ask(self):
+        self.trial = self.study.ask()
+        new_hyper = copy.deepcopy(self.hyper_opt.best_hyper)
+        for i in range(self.hyper_opt.num_hyper):
+            new_hyper.v[i] = np.round(self.trial.suggest_uniform(f"v_{i}", V_MIN, V_MAX), 2)
+            new_hyper.a[i] = np.round(self.trial.suggest_uniform(f"a_{i}", A_MIN, A_MAX), 2)
+            new_hyper.d[i] = np.round(self.trial.suggest_uniform(f"d_{i}", D_MIN, D_MAX), 2)
+        new_hyper.d[-1] = 2  # to ensure that it finishes the race
+        return new_hyper
+
+    def get_first_hyper(self):
+        if len(self.study.trials) == 0:
+            self.study.enqueue_trial(self.get_params(self.hyper_opt.best_hyper))
+        return self.ask()
+
+    def get_next_hyper(self):
+        if self.hyper_opt.curr_hyper.time[-1] <= self.hyper_opt.best_hyper.time[-1]:
+            self.hyper_opt.copy_curr_to_best_hyper()
+            self.hyper_opt.copy_curr_to_best_time()
+        return self.ask()
+
+    def observe(self, race_time):
+        super().observe(race_time)
+        self.study.tell(self.trial, race_time[-1])
+        self.num_trials += 1
+
+    def is_finished(self):
+        return self.num_trials >= self.n_trials
+
+    def close(self):
+        super().close()
+        if self.num_trials > 0:
+            print(self.study.best_params)
+
+
+STRATEGIES = {
+    "gd": HyOptStrategy,
+    "po": HyOptPoStrategy,
+    "random_search": RandomSearchStrategy,
+    "GA": GeneticStrategy,
+}
+
+
+def get_strategy(name, log_file_name, resume=True, study_name=None):
+    if name == "BO":
+        study_name = study_name or os.path.splitext(log_file_name)[0]
+        return OptunaStrategy(log_file_name, study_name)
+    return STRATEGIES[name](log_file_name, resume=resume)
@@ -0,0 +1,79 @@
+import time
+import numpy as np
+
+JITTER_WINDOW = 1000
+
+
+class RateTimer(object):
+    '''
+        calls task() every period seconds on absolute deadlines (start + k * period),
+        so the rate does not drift with the duration of task()
+
+        when task() overruns one or more deadlines:
+            catch_up=False      the missed ticks are skipped, the next call is on the next deadline
+            catch_up=True       the missed ticks are run back to back, at most max_catch_up of them,
+                                the older ones are skipped
+
+        statistics: number of ticks, overruns and skipped ticks, and the jitter (how late a call
+        started compared to its deadline) over the last JITTER_WINDOW ticks
+    '''
+    def __init__(self, task, period, catch_up=False, max_catch_up=1):
+        self.task = task
+        self.period = period
+        self.catch_up = catch_up
+        self.max_catch_up = max_catch_up
+
+        self.num_ticks = 0
+        self.num_overruns = 0
+        self.num_skipped = 0
+        self.jitter = np.zeros(JITTER_WINDOW)
+        self.max_jitter = 0.
+
+    def run(self, is_active):
+        '''
+            run until is_active() returns False, checked before every call
+        '''
+        deadline = time.perf_counter()
+        while is_active():
+            now = time.perf_counter()
+            if now < deadline:
+                time.sleep(deadline - now)
+                now = time.perf_counter()
+            self.record_jitter(now - deadline)
+
+            self.task()
+            deadline = self.get_next_deadline(deadline, time.perf_counter())
+
+    def get_next_deadline(self, deadline, now):
+        deadline += self.period
+        if now <= deadline:
+            return deadline
+
+        self.num_overruns += 1
+        num_missed = int((now - deadline) // self.period) + 1
+        num_run = min(num_missed, self.max_catch_up) if self.catch_up else 0
+        self.num_skipped += num_missed - num_run
+        # the first deadline still to be run, it is in the past if we catch up
+        return deadline + (num_missed - num_run) * self.period
+
+    def record_jitter(self, jitter):
+        self.jitter[self.num_ticks % JITTER_WINDOW] = jitter
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.num_ticks += 1
+
+    def get_stats(self):
+        jitter = self.jitter[:min(self.num_ticks, JITTER_WINDOW)]
+        p50, p99 = np.percentile(jitter, [50, 99]) if len(jitter) > 0 else (0., 0.)
+        return {"period": self.period,
+                "ticks": self.num_ticks,
+                "overruns": self.num_overruns,
+                "skipped": self.num_skipped,
+                "jitter_p50": p50,
+                "jitter_p99": p99,
+                "jitter_max": self.max_jitter}
+
+    def __str__(self):
+        stats = self.get_stats()
+        return f"period = {stats['period']:.3f} s, ticks = {stats['ticks']}, overruns = {stats['overruns']}, " \
+               f"skipped = {stats['skipped']}, jitter p50/p99/max = {1000 * stats['jitter_p50']:.2f}/" \
+               f"{1000 * stats['jitter_p99']:.2f}/{1000 * stats['jitter_max']:.2f} ms"
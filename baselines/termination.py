@@ -0,0 +1,132 @@
+import threading
+import time
+
+'''
+Termination conditions of a race, evaluated on their own thread
+'''
+
+NOT_TERMINATED = 0
+RACE_FINISHED = 1
+DRONE_STUCKED = 2
+SLOWER_THAN_LAST_RACE = 3
+DRONE_MISSED_SOME_GATE = 4
+DRONE_COLLIDED = 5
+
+REASON_NAMES = {NOT_TERMINATED: "not terminated",
+                RACE_FINISHED: "race finished",
+                DRONE_STUCKED: "drone stucked",
+                SLOWER_THAN_LAST_RACE: "slower than the best recorded time",
+                DRONE_MISSED_SOME_GATE: "drone missed some gate",
+                DRONE_COLLIDED: "drone collided"}
+
+# how long stop_evaluator_thread() may wait for the thread
+EVALUATOR_STOP_TIMEOUT = 0.1
+# how long the odometry callback waits for the evaluation of its sample before it sends its command
+EVALUATION_WAIT_TIMEOUT = 0.05
+
+
+class TerminationEvaluator(object):
+    '''
+        conditions: list of (reason, condition), condition() returns True if the race has to be
+        terminated for that reason. they are checked in order after every post_odometry(), the
+        first one that holds is published and stays until reset() (start of the next race)
+
+        the odometry callback posts its sample and waits for its evaluation, at most wait_timeout
+        seconds, the evaluation of a slow log query is then acted on by the next tick
+        latency: optional latency.LatencyRecorder, records the duration of every evaluation
+    '''
+    def __init__(self, conditions, latency=None, wait_timeout=EVALUATION_WAIT_TIMEOUT):
+        self.conditions = list(conditions)
+        self.latency = latency
+        self.wait_timeout = wait_timeout
+        self.reason = NOT_TERMINATED
+        # incremented by reset(), a result computed for a previous race is dropped
+        self.race_id = 0
+        self.condition = threading.Condition()
+        # samples posted and samples evaluated, the evaluator runs once for all the samples posted meanwhile
+        self.num_posted = 0
+        self.num_evaluated = 0
+        self.num_evaluations = 0
+
+        self.evaluator_thread = None
+        self.is_evaluator_thread_active = False
+
+    def post_odometry(self):
+        '''
+            called by the odometry callback once the racer's state holds a new sample
+        '''
+        with self.condition:
+            self.num_posted += 1
+            self.condition.notify_all()
+
+    def wait_for_evaluation(self):
+        '''
+            waits until the last posted sample is evaluated, returns is_terminated()
+        '''
+        if self.is_evaluator_thread_active:
+            with self.condition:
+                self.condition.wait_for(lambda: self.num_evaluated >= self.num_posted or self.is_terminated(),
+                                        self.wait_timeout)
+        return self.is_terminated()
+
+    def is_terminated(self):
+        return self.reason != NOT_TERMINATED
+
+    def get_reason(self):
+        return self.reason
+
+    def get_reason_name(self):
+        return REASON_NAMES[self.reason]
+
+    def reset(self):
+        with self.condition:
+            self.race_id += 1
+            self.reason = NOT_TERMINATED
+            # the samples of the previous race are not evaluated anymore
+            self.num_evaluated = self.num_posted
+            self.condition.notify_all()
+
+    def evaluate(self):
+        '''
+            check the conditions once, returns the published reason
+        '''
+        race_id = self.race_id
+        if self.reason != NOT_TERMINATED:
+            return self.reason
+        self.num_evaluations += 1
+        start = time.perf_counter()
+        for reason, condition in self.conditions:
+            if condition():
+                with self.condition:
+                    if race_id == self.race_id:
+                        self.reason = reason
+                        self.condition.notify_all()
+                break
+        if self.latency is not None:
+            self.latency.record("termination_evaluation", start)
+        return self.reason
+
+    def evaluate_loop(self):
+        while self.is_evaluator_thread_active:
+            with self.condition:
+                # the timeout only bounds how long stop_evaluator_thread() waits
+                if not self.condition.wait_for(lambda: self.num_evaluated < self.num_posted, EVALUATOR_STOP_TIMEOUT):
+                    continue
+                num_posted = self.num_posted
+                race_id = self.race_id
+            self.evaluate()
+            with self.condition:
+                if race_id == self.race_id:
+                    self.num_evaluated = max(self.num_evaluated, num_posted)
+                self.condition.notify_all()
+
+    def start_evaluator_thread(self):
+        if not self.is_evaluator_thread_active:
+            self.is_evaluator_thread_active = True
+            self.evaluator_thread = threading.Thread(target=self.evaluate_loop, daemon=True)
+            self.evaluator_thread.start()
+
+    def stop_evaluator_thread(self):
+        if self.is_evaluator_thread_active:
+            self.is_evaluator_thread_active = False
+            self.evaluator_thread.join()
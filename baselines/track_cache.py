@@ -0,0 +1,213 @@
+from argparse import ArgumentParser
+import math
+import os
+import random
+import numpy as np
+import airsimneurips as airsim
+
+'''
+On-disk cache of the track of a level: gate object names sorted along the track, gate poses,
+gate facing vectors and the distances between consecutive gates, one small .npz file per level
+
+    python track_cache.py build --level_name Qualifier_Tier_2       # query the simulator, write the file
+    python track_cache.py validate --level_name Qualifier_Tier_2    # spot-check the file against the simulator
+    python track_cache.py show --level_name Qualifier_Tier_2
+
+the file only holds true poses: the racers use it for tier 1 races, where simGetObjectPose is not noisy
+'''
+
+TRACK_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "track_cache")
+TRACK_CACHE_VERSION = 1
+MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS = 10
+NUM_VALIDATION_GATES = 3
+VALIDATION_TOLERANCE = 0.1
+
+
+def get_sorted_gate_names(airsim_client):
+    gate_names_sorted_bad = sorted(airsim_client.simListSceneObjects("Gate.*"))
+    # gate_names_sorted_bad is of the form `GateN_GARBAGE`. for example:
+    # ['Gate0', 'Gate10_21', 'Gate11_23', 'Gate1_3', 'Gate2_5', 'Gate3_7', 'Gate4_9', 'Gate5_11', 'Gate6_13', 'Gate7_15', 'Gate8_17', 'Gate9_19']
+    # we sort them by their ibdex of occurence along the race track(N), and ignore the unreal garbage number after the underscore(GARBAGE)
+    gate_indices_bad = [int(gate_name.split('_')[0][4:]) for gate_name in gate_names_sorted_bad]
+    gate_indices_correct = sorted(range(len(gate_indices_bad)), key=lambda k: gate_indices_bad[k])
+    return [gate_names_sorted_bad[gate_idx] for gate_idx in gate_indices_correct]
+
+
+def is_nan_pose(pose):
+    return math.isnan(pose.position.x_val) or math.isnan(pose.position.y_val) or math.isnan(pose.position.z_val)
+
+
+def get_gate_pose(airsim_client, gate_name, max_trials=MAX_NUMBER_OF_GETOBJECTPOSE_TRIALS):
+    curr_pose = airsim_client.simGetObjectPose(gate_name)
+    counter = 0
+    while is_nan_pose(curr_pose) and counter < max_trials:
+        print(f"DEBUG: {gate_name} position is nan, retrying...")
+        counter += 1
+        curr_pose = airsim_client.simGetObjectPose(gate_name)
+    assert not is_nan_pose(curr_pose), f"ERROR: {gate_name} position is still nan after {counter} trials"
+    return curr_pose
+
+
+def fetch_gate_poses(airsim_client, gate_names):
+    return [get_gate_pose(airsim_client, gate_name) for gate_name in gate_names]
+
+
+def get_facing_vectors(orientations):
+    '''
+        (N,4) quaternions (w, x, y, z) -> (N,3) gate facing vectors, the second column of the
+        rotation matrix like BaselineRacer.get_gate_facing_vector_from_quaternion()
+    '''
+    q = np.asarray(orientations, dtype=np.float64).reshape(-1, 4)
+    n = np.einsum('ij,ij->i', q, q)
+    is_valid = n >= np.finfo(float).eps
+    q = q * np.sqrt(2.0 / np.where(is_valid, n, 1.))[:, None]
+    w, x, y, z = q.T
+    facing_vectors = np.stack([x * y - z * w, 1.0 - x * x - z * z, y * z + x * w], axis=1)
+    facing_vectors[~is_valid] = [0., 1., 0.]
+    return facing_vectors
+
+
+class TrackDescriptor(object):
+    '''
+        gate_names:     sorted along the track
+        positions:      (N,3) gate centers
+        orientations:   (N,4) gate quaternions (w, x, y, z)
+        facing_vectors: (N,3)
+        distances:      (N-1,) distances between consecutive gate centers
+    '''
+    def __init__(self, level_name, gate_names, positions, orientations):
+        self.level_name = level_name
+        self.gate_names = list(gate_names)
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.orientations = np.asarray(orientations, dtype=np.float64).reshape(-1, 4)
+        self.facing_vectors = get_facing_vectors(self.orientations)
+        self.distances = np.linalg.norm(np.diff(self.positions, axis=0), axis=1)
+
+    @classmethod
+    def from_poses(cls, level_name, gate_names, poses):
+        positions = [[pose.position.x_val, pose.position.y_val, pose.position.z_val] for pose in poses]
+        orientations = [[pose.orientation.w_val, pose.orientation.x_val, pose.orientation.y_val, pose.orientation.z_val] for pose in poses]
+        return cls(level_name, gate_names, positions, orientations)
+
+    def get_poses(self):
+        '''
+            the gate poses as airsim.Pose, like simGetObjectPose returns them
+        '''
+        return [airsim.Pose(airsim.Vector3r(*position), airsim.Quaternionr(x_val=q[1], y_val=q[2], z_val=q[3], w_val=q[0]))
+                for position, q in zip(self.positions.tolist(), self.orientations.tolist())]
+
+    def save(self, file_path):
+        # written next to the file and renamed, so a reader never sees a partial file
+        tmp_path = file_path + ".tmp.npz"
+        np.savez(tmp_path, version=TRACK_CACHE_VERSION, level_name=self.level_name, gate_names=np.array(self.gate_names),
+                 positions=self.positions, orientations=self.orientations,
+                 facing_vectors=self.facing_vectors, distances=self.distances)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as data:
+            if int(data["version"]) != TRACK_CACHE_VERSION:
+                return None
+            track = cls.__new__(cls)
+            track.level_name = str(data["level_name"])
+            track.gate_names = data["gate_names"].tolist()
+            track.positions = data["positions"]
+            track.orientations = data["orientations"]
+            track.facing_vectors = data["facing_vectors"]
+            track.distances = data["distances"]
+        return track
+
+    def __str__(self):
+        lines = [f"{self.level_name}: {len(self.gate_names)} gates, {self.distances.sum():.1f} m"]
+        for gate_idx, gate_name in enumerate(self.gate_names):
+            distance = f"{self.distances[gate_idx]:7.2f} m to the next" if gate_idx < len(self.distances) else ""
+            lines.append(f"    {gate_idx:3d} {gate_name:16s} {np.round(self.positions[gate_idx], 2)}    {distance}")
+        return "\n".join(lines)
+
+
+class TrackCache(object):
+    '''
+        get_track(airsim_client, level_name) loads the track of the level from cache_dir, or queries
+        the simulator and writes it there if there is no (valid) file yet
+
+        validate: spot-check num_validation_gates random gates of a loaded track against the
+                  simulator, the track is queried again if one moved by more than VALIDATION_TOLERANCE
+    '''
+    def __init__(self, cache_dir=TRACK_CACHE_DIR, validate=False, num_validation_gates=NUM_VALIDATION_GATES):
+        self.cache_dir = cache_dir
+        self.validate = validate
+        self.num_validation_gates = num_validation_gates
+
+    def get_path(self, level_name):
+        return os.path.join(self.cache_dir, f"{level_name}.npz")
+
+    def load(self, level_name):
+        file_path = self.get_path(level_name)
+        if not os.path.exists(file_path):
+            return None
+        try:
+            return TrackDescriptor.load(file_path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, track):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        track.save(self.get_path(track.level_name))
+
+    def build(self, airsim_client, level_name, fetch_gate_poses=fetch_gate_poses):
+        '''
+            fetch_gate_poses(airsim_client, gate_names) -> poses, gate_poses.GatePoseCache fetches them concurrently
+        '''
+        gate_names = get_sorted_gate_names(airsim_client)
+        track = TrackDescriptor.from_poses(level_name, gate_names, fetch_gate_poses(airsim_client, gate_names))
+        self.save(track)
+        return track
+
+    def is_valid(self, airsim_client, track):
+        gate_indices = random.sample(range(len(track.gate_names)), min(self.num_validation_gates, len(track.gate_names)))
+        for gate_idx in gate_indices:
+            pose = get_gate_pose(airsim_client, track.gate_names[gate_idx])
+            position = [pose.position.x_val, pose.position.y_val, pose.position.z_val]
+            if np.linalg.norm(track.positions[gate_idx] - position) > VALIDATION_TOLERANCE:
+                print(f"track cache: {track.gate_names[gate_idx]} of {track.level_name} moved, the track is fetched again")
+                return False
+        return True
+
+    def get_track(self, airsim_client, level_name, fetch_gate_poses=fetch_gate_poses):
+        track = self.load(level_name)
+        if track is not None and (not self.validate or self.is_valid(airsim_client, track)):
+            return track
+        return self.build(airsim_client, level_name, fetch_gate_poses)
+
+
+def main(args):
+    track_cache = TrackCache(args.cache_dir, num_validation_gates=args.num_validation_gates)
+    if args.command == "show":
+        track = track_cache.load(args.level_name)
+        print(track if track is not None else f"no track cached for {args.level_name} in {args.cache_dir}")
+        return
+
+    airsim_client = airsim.MultirotorClient()
+    airsim_client.confirmConnection()
+    airsim_client.simLoadLevel(args.level_name)
+    airsim_client.confirmConnection()
+    if args.command == "build":
+        print(track_cache.build(airsim_client, args.level_name))
+    else:
+        track = track_cache.load(args.level_name)
+        if track is None:
+            print(f"no track cached for {args.level_name} in {args.cache_dir}")
+        else:
+            print("valid" if track_cache.is_valid(airsim_client, track) else "invalid")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('command', type=str, choices=["build", "validate", "show"])
+    parser.add_argument('--level_name', type=str, choices=["Soccer_Field_Easy", "Soccer_Field_Medium", "ZhangJiaJie_Medium", "Building99_Hard",
+        "Qualifier_Tier_1", "Qualifier_Tier_2", "Qualifier_Tier_3", "Final_Tier_1", "Final_Tier_2", "Final_Tier_3"], default="Qualifier_Tier_2")
+    parser.add_argument('--cache_dir', type=str, default=TRACK_CACHE_DIR)
+    parser.add_argument('--num_validation_gates', type=int, default=NUM_VALIDATION_GATES)
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,94 @@
+import os
+import numpy as np
+
+'''
+Trajectory of a race, recorded by the odometry callback into preallocated arrays
+
+    buffer = TrajectoryBuffer()
+    buffer.append(time.perf_counter(), position, velocity, next_gate_idx, detect_flag)   # every tick
+    samples = buffer.export()                                                              # at the end of the race
+    samples["t"], samples["position"], samples["velocity"], samples["next_gate_idx"], samples["detect_flag"]
+
+the buffer is a ring: when a race has more than capacity samples, the oldest ones are overwritten
+'''
+
+TRAJECTORY_CAPACITY = 4096
+TRAJECTORY_DTYPE = np.dtype([("t", np.float64),
+                             ("position", np.float64, (3,)),
+                             ("velocity", np.float64, (3,)),
+                             ("next_gate_idx", np.int32),
+                             ("detect_flag", np.bool_)])
+
+
+class TrajectoryBuffer(object):
+    '''
+        t is the time of the sample in seconds since reset(), from the time.perf_counter() passed to append()
+        position and velocity are airsim.Vector3r (or anything with x_val, y_val, z_val)
+    '''
+    def __init__(self, capacity=TRAJECTORY_CAPACITY):
+        self.capacity = capacity
+        self.t = np.zeros(capacity)
+        self.position = np.zeros((capacity, 3))
+        self.velocity = np.zeros((capacity, 3))
+        self.next_gate_idx = np.zeros(capacity, dtype=np.int32)
+        self.detect_flag = np.zeros(capacity, dtype=np.bool_)
+        self.reset()
+
+    def reset(self):
+        self.num_samples = 0
+        self.start_time = None
+
+    def append(self, t, position, velocity, next_gate_idx, detect_flag):
+        if self.start_time is None:
+            self.start_time = t
+        i = self.num_samples % self.capacity
+        self.t[i] = t - self.start_time
+        self.position[i, 0] = position.x_val
+        self.position[i, 1] = position.y_val
+        self.position[i, 2] = position.z_val
+        self.velocity[i, 0] = velocity.x_val
+        self.velocity[i, 1] = velocity.y_val
+        self.velocity[i, 2] = velocity.z_val
+        self.next_gate_idx[i] = next_gate_idx
+        self.detect_flag[i] = detect_flag
+        self.num_samples += 1
+
+    def __len__(self):
+        return min(self.num_samples, self.capacity)
+
+    def export(self):
+        '''
+            the samples of the race in chronological order, as one structured array (TRAJECTORY_DTYPE)
+        '''
+        n = len(self)
+        # index of the oldest sample still in the buffer
+        start = self.num_samples % self.capacity if self.num_samples > self.capacity else 0
+        order = (np.arange(n) + start) % self.capacity
+        samples = np.empty(n, dtype=TRAJECTORY_DTYPE)
+        samples["t"] = self.t[order]
+        samples["position"] = self.position[order]
+        samples["velocity"] = self.velocity[order]
+        samples["next_gate_idx"] = self.next_gate_idx[order]
+        samples["detect_flag"] = self.detect_flag[order]
+        return samples
+
+    def save(self, file_path):
+        save_samples(file_path, self.export())
+
+
+def save_samples(file_path, samples):
+    '''
+        samples: from TrajectoryBuffer.export()
+    '''
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.save(file_path, samples)
+
+
+def get_trajectory_file_name(log_file_name, iteration):
+    '''
+        the trajectory of an iteration: po5_2.txt, 12 -> po5_2_trajectories/iteration_0012.npy
+    '''
+    root, _ = os.path.splitext(log_file_name)
+    return os.path.join(f"{root}_trajectories", f"iteration_{iteration:04d}.npy")
@@ -85,11 +85,12 @@ class AirSimSettingsCreator(object):
             json.dump(self.settings_dict, f, indent=2, sort_keys=True)
 
     # usage: AirSimSettingsCreator().write_airsim_neurips_baseline_settings_file()
-    def write_airsim_neurips_baseline_settings_file(self):
+    # image_width, image_height: resolution fpv_cam renders at, the frames are not resized if it is the one the detector runs at
+    def write_airsim_neurips_baseline_settings_file(self, image_width=320, image_height=240):
         instance = self.__class__()
         instance.add_minimal()
         instance.add_multirotor(vehicle_name = "drone_1", pose = Pose(Position(), Rotation()))
         instance.add_camera(vehicle_name = "drone_1", camera_name = 'fpv_cam', relative_pose=Pose(Position(0.25, 0.0, 0.0), Rotation()), 
-                image_type = 0, image_width = 320, image_height = 240, fov_horizontal_degrees = 90)
+                image_type = 0, image_width = image_width, image_height = image_height, fov_horizontal_degrees = 90)
         instance.add_multirotor(vehicle_name = "drone_2", pose = Pose(Position(), Rotation()))
         instance.write_airsim_settings_file()
\ No newline at end of file
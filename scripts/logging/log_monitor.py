@@ -1,61 +1,47 @@
-import glob
 import os
+import sys
 import time
 
+curr_dir = os.path.dirname(os.path.abspath(__file__))
+import_path = os.path.join(curr_dir, '..', '..', 'baselines')
+sys.path.insert(0, import_path)
+from log_monitor import LogMonitor
+
 disqualified_racers = set()
 finished_racers = set()
 
-def open_file():
-    list_of_files = glob.glob('*.log')
-    latest_file = max(list_of_files, key=os.path.getctime)
-    print("Opened file: " + latest_file)
-    return open(latest_file, "r+")
-
-def follow(filename):
-    filename.seek(0,2)
-    while True:
-        line = filename.readline()
-        if not line:
-            time.sleep(0.1)
-            continue
-        yield line  
-
-def process(line):
-    tokens = line.split()
-    if len(tokens) != 3 and len(tokens) != 5:
-        print("ERROR Bad line: " + line)
-        print("Tokens: " + str(tokens))
-        return
-
-    if tokens[3] == "disqualified" and tokens[4] == '1' and tokens[0] not in disqualified_racers:
-        disqualified_racers.add(tokens[0])
-        handle_disqualified_racer(tokens[0])
+def handle_disqualified_racer(event):
+    if event.drone_name in disqualified_racers:
         return
-
-    if tokens[3] == "finished" and tokens[4] == '1' and tokens[0] not in finished_racers:
-        finished_racers.add(tokens[0])
-        handle_finished_racer(tokens[0])
-        return
-
-    if tokens[3] == "gates_passed":
-        handle_gate_passed(tokens[0], tokens[4]) 
-
-def handle_disqualified_racer(racer_name):
-    print(racer_name + " has been disqualified!")
+    disqualified_racers.add(event.drone_name)
+    print(event.drone_name + " has been disqualified!")
     #Start a new race.
 
-def handle_finished_racer(racer_name):
-    print(racer_name + " has finished!")
+def handle_finished_racer(event):
+    if event.drone_name in finished_racers:
+        return
+    finished_racers.add(event.drone_name)
+    print(event.drone_name + " has finished!")
     #Start a new race.
 
-def handle_gate_passed(racer_name, gate_idx_passed):
+def handle_gate_passed(event):
     # log file gate indices are 1-indexed, not 0-indexed
-    print("{} passed gate idx {}".format(racer_name, gate_idx_passed - 1))
+    print("{} passed gate idx {}".format(event.drone_name, event.value - 1))
 
 def main():
-    f = open_file()
-    for line in follow(f):
-        process(line)
+    # the events are pushed from a watcher thread as soon as they are appended to the latest log
+    log_monitor = LogMonitor(os.getcwd() + os.sep)
+    # parse what the current log already holds before subscribing, only the new events are reported
+    log_monitor.update_all()
+    log_monitor.on_disqualified(handle_disqualified_racer)
+    log_monitor.on_finished(handle_finished_racer)
+    log_monitor.on_gate_passed(handle_gate_passed)
+    log_monitor.start_watcher_thread()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        log_monitor.stop_watcher_thread()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
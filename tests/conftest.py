@@ -0,0 +1,48 @@
+import importlib
+import os
+import sys
+import types
+
+# the baselines modules import each other by their module name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'baselines'))
+
+# needs a running simulator
+collect_ignore = ["test_reset.py"]
+
+
+class Vector3r(object):
+    def __init__(self, x_val=0.0, y_val=0.0, z_val=0.0):
+        self.x_val = x_val
+        self.y_val = y_val
+        self.z_val = z_val
+
+
+class Quaternionr(object):
+    def __init__(self, x_val=0.0, y_val=0.0, z_val=0.0, w_val=1.0):
+        self.x_val = x_val
+        self.y_val = y_val
+        self.z_val = z_val
+        self.w_val = w_val
+
+
+class Pose(object):
+    def __init__(self, position_val=None, orientation_val=None):
+        self.position = position_val if position_val is not None else Vector3r()
+        self.orientation = orientation_val if orientation_val is not None else Quaternionr()
+
+
+def install_stand_in(name, **attributes):
+    '''
+        the modules under test only need the data types of the simulator client and the constants of
+        opencv, a stand-in holding them is used when the package is not installed
+    '''
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        sys.modules[name] = types.SimpleNamespace(**attributes)
+
+
+install_stand_in("airsimneurips", Vector3r=Vector3r, Quaternionr=Quaternionr, Pose=Pose,
+                 ImageType=types.SimpleNamespace(Scene=0),
+                 ImageRequest=lambda camera_name, image_type, pixels_as_float=False, compress=True: (camera_name, image_type))
+install_stand_in("cv2", INTER_AREA=3, IMREAD_COLOR=1)
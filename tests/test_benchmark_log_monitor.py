@@ -0,0 +1,19 @@
+import os
+import benchmark_log_monitor
+import log_monitor
+
+
+def test_benchmark_log_size(tmp_path):
+    log_path = str(tmp_path / "race.log")
+    num_lines = benchmark_log_monitor.generate_race_log(log_path, 2000)
+    with open(log_path) as f:
+        assert len(f.readlines()) == num_lines + log_monitor.NUM_HEADER_LINES
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    for drone_name in benchmark_log_monitor.DRONE_NAMES:
+        assert monitor.get_drone_state(drone_name).gates_passed == benchmark_log_monitor.NUM_GATES
+        assert monitor.get_drone_state(drone_name).finished
+    # the last drone misses a gate
+    assert monitor.check_gate_missed(benchmark_log_monitor.DRONE_NAMES[-1])
+    assert not monitor.check_gate_missed(benchmark_log_monitor.DRONE_NAMES[0])
+    for name, query in benchmark_log_monitor.get_queries(monitor).items():
+        query()
@@ -0,0 +1,45 @@
+import types
+import command_cache
+
+
+def test_same_command_is_coalesced():
+    cache = command_cache.SplineCommandCache()
+    assert cache.is_new_command("gate", [10., 0., 0.], 10., 20., [0., 0., 0.])
+    assert not cache.is_new_command("gate", [10.5, 0., 0.], 10., 20., [2., 0.5, 0.])
+    assert cache.num_sent == 1 and cache.num_coalesced == 1
+
+
+def test_target_accepts_vector3r():
+    cache = command_cache.SplineCommandCache()
+    assert cache.is_new_command("gate", types.SimpleNamespace(x_val=10., y_val=0., z_val=0.), 10., 20., [0., 0., 0.])
+    assert not cache.is_new_command("gate", [10., 0., 0.], 10., 20., [1., 0., 0.])
+
+
+def test_changes_are_sent():
+    cache = command_cache.SplineCommandCache()
+    cache.is_new_command("gate", [10., 0., 0.], 10., 20., [0., 0., 0.])
+    # target moved
+    assert cache.is_new_command("gate", [12., 0., 0.], 10., 20., [0., 0., 0.])
+    # hyperparameters
+    assert cache.is_new_command("gate", [12., 0., 0.], 11., 20., [0., 0., 0.])
+    assert cache.is_new_command("gate", [12., 0., 0.], 11., 21., [0., 0., 0.])
+    # kind of target
+    assert cache.is_new_command("point", [12., 0., 0.], 11., 21., [0., 0., 0.])
+    # drone away from the segment it was sent along
+    assert cache.is_new_command("point", [12., 0., 0.], 11., 21., [6., 2., 0.])
+    assert not cache.is_new_command("point", [12., 0., 0.], 11., 21., [8., 1.5, 0.])
+
+
+def test_invalidate():
+    cache = command_cache.SplineCommandCache()
+    cache.is_new_command("gate", [10., 0., 0.], 10., 20., [0., 0., 0.])
+    cache.invalidate()
+    assert cache.is_new_command("gate", [10., 0., 0.], 10., 20., [0., 0., 0.])
+    cache.reset_stats()
+    assert str(cache) == "sent = 0, coalesced = 0"
+
+
+def test_distance_to_segment():
+    assert command_cache.get_distance_to_segment([5., 1., 0.], [0., 0., 0.], [10., 0., 0.]) == 1.
+    assert command_cache.get_distance_to_segment([-3., 4., 0.], [0., 0., 0.], [10., 0., 0.]) == 5.
+    assert command_cache.get_distance_to_segment([3., 4., 0.], [0., 0., 0.], [0., 0., 0.]) == 5.
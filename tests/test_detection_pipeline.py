@@ -0,0 +1,50 @@
+import threading
+import time
+import numpy as np
+import detection_pipeline
+
+
+def test_newer_frame_replaces_unread_one():
+    dropped = []
+    slot = detection_pipeline.FrameSlot(on_drop=dropped.append)
+    frames = [np.full((2, 2, 3), i, dtype=np.uint8) for i in range(3)]
+    slot.put(frames[0], 1.0, "pose 0")
+    slot.put(frames[1], 1.1, "pose 1")
+    frame, capture_time, camera_pose = slot.get(timeout=0.)
+    assert frame is frames[1] and capture_time == 1.1 and camera_pose == "pose 1"
+    assert dropped == [frames[0]]
+
+    # a frame that was taken is not dropped
+    slot.put(frames[2], 1.2)
+    assert len(dropped) == 1
+    assert slot.get(timeout=0.)[0] is frames[2]
+    assert (slot.num_frames, slot.num_dropped) == (3, 1)
+    assert str(slot) == "frames = 3, dropped = 1"
+
+
+def test_get_times_out_without_new_frame():
+    slot = detection_pipeline.FrameSlot()
+    assert slot.get(timeout=0.01) is None
+    slot.put(np.zeros((2, 2, 3), dtype=np.uint8), 1.0)
+    assert slot.get(timeout=0.01) is not None
+    # the same frame is not returned twice
+    start = time.perf_counter()
+    assert slot.get(timeout=0.05) is None
+    assert time.perf_counter() - start >= 0.04
+
+
+def test_get_wakes_up_on_put():
+    slot = detection_pipeline.FrameSlot()
+    frame = np.zeros((2, 2, 3), dtype=np.uint8)
+    timer = threading.Timer(0.01, slot.put, args=(frame, 2.0))
+    timer.start()
+    result = slot.get(timeout=1.)
+    timer.join()
+    assert result is not None and result[0] is frame and result[1] == 2.0
+
+
+def test_biggest_box():
+    boxes = np.array([[0., 0., 0.2, 0.2], [0.1, 0.1, 0.9, 0.9], [0., 0., 1., 1.]])
+    scores = np.array([0.99, 0.98, 0.5])
+    assert detection_pipeline.get_biggest_box(boxes, scores, 0.97).tolist() == [0.1, 0.1, 0.9, 0.9]
+    assert detection_pipeline.get_biggest_box(boxes, scores, 0.995) is None
@@ -0,0 +1,72 @@
+import types
+import numpy as np
+import pytest
+import cv2
+import frame_acquisition
+
+
+def get_response(width, height, num_channels=3):
+    data = bytes(np.arange(width * height * num_channels, dtype=np.uint32).astype(np.uint8))
+    return types.SimpleNamespace(width=width, height=height, image_data_uint8=data)
+
+
+@pytest.mark.parametrize("width, height, expected", [
+    (None, None, (640, 480)),
+    (320, None, (320, 240)),
+    (None, 120, (160, 120)),
+    (200, 100, (200, 100)),
+    (1, None, (1, 1)),
+])
+def test_size(width, height, expected):
+    acquisition = frame_acquisition.FrameAcquisition(None, width=width, height=height)
+    assert acquisition.get_size(640, 480) == expected
+
+
+def test_decode_is_a_view_of_the_response():
+    acquisition = frame_acquisition.FrameAcquisition(None)
+    response = get_response(4, 3)
+    img = acquisition.decode(response)
+    assert img.shape == (3, 4, 3) and img.dtype == np.uint8
+    # no copy of the bytes of the response
+    assert img.base is not None and not img.flags.writeable
+    assert np.shares_memory(img, np.frombuffer(response.image_data_uint8, dtype=np.uint8))
+    assert img[1, 2].tolist() == list(response.image_data_uint8[18:21])
+    assert acquisition.num_frames == 1 and acquisition.num_resized == 0
+    assert acquisition.pool is None
+
+
+def test_decode_camera_size_asked():
+    acquisition = frame_acquisition.FrameAcquisition(None, width=4)
+    img = acquisition.decode(get_response(4, 3, num_channels=4))
+    assert img.shape == (3, 4, 4) and not img.flags.writeable
+
+
+@pytest.mark.parametrize("width, height, num_bytes", [(4, 3, 35), (0, 0, 0), (4, 3, 0)])
+def test_decode_broken_response(width, height, num_bytes):
+    acquisition = frame_acquisition.FrameAcquisition(None)
+    response = types.SimpleNamespace(width=width, height=height, image_data_uint8=bytes(num_bytes))
+    assert acquisition.decode(response) is None
+    assert acquisition.num_frames == 0
+
+
+@pytest.mark.skipif(not hasattr(cv2, "resize"), reason="needs opencv")
+def test_decode_resized_into_pool():
+    acquisition = frame_acquisition.FrameAcquisition(None, width=2, num_buffers=1)
+    img = acquisition.decode(get_response(4, 4))
+    assert img.shape == (2, 2, 3) and img.flags.writeable
+    assert acquisition.num_resized == 1
+    other = acquisition.decode(get_response(4, 4))
+    assert other is not img and len(acquisition.pool) == 2
+    acquisition.release(img)
+    assert acquisition.decode(get_response(4, 4)) is img
+
+
+def test_pool():
+    pool = frame_acquisition.FramePool((2, 2, 3), num_buffers=2)
+    frames = [pool.acquire() for _ in range(3)]
+    assert len(pool) == 3 and len(set(id(frame) for frame in frames)) == 3
+    pool.release(frames[1])
+    # a frame of another pool is not taken
+    pool.release(np.empty((2, 2, 3), dtype=np.uint8))
+    assert pool.acquire() is frames[1]
+    assert len(pool) == 3
@@ -0,0 +1,82 @@
+import math
+import numpy as np
+import pytest
+import airsimneurips as airsim
+import gate_box_tracker
+import gate_roi
+
+
+def get_camera_pose(yaw=0., pitch=0.):
+    cy, sy = math.cos(yaw / 2), math.sin(yaw / 2)
+    cp, sp = math.cos(pitch / 2), math.sin(pitch / 2)
+    return airsim.Pose(airsim.Vector3r(), airsim.Quaternionr(x_val=-sp * sy, y_val=sp * cy, z_val=cp * sy, w_val=cp * cy))
+
+
+def get_box(mx, my, w=0.2, h=0.2):
+    return np.array([my - h / 2, mx - w / 2, my + h / 2, mx + w / 2])
+
+
+def test_converges_on_a_moving_box():
+    tracker = gate_box_tracker.GateBoxTracker()
+    rng = np.random.RandomState(0)
+    velocity = np.array([0.3, -0.1])
+    for i in range(30):
+        t = i / 30.
+        mx, my = np.array([0.3, 0.6]) + velocity * t
+        tracker.update(get_box(mx, my) + rng.normal(0., 0.003, 4), t, get_camera_pose())
+    assert tracker.x[4:6] == pytest.approx(velocity, abs=0.05)
+    assert tracker.x[6:] == pytest.approx([0., 0.], abs=0.05)
+
+    # between two detections the box keeps moving
+    t = 29 / 30. + 0.1
+    box = tracker.predict(t, get_camera_pose())
+    assert box == pytest.approx(get_box(*(np.array([0.3, 0.6]) + velocity * t)), abs=0.01)
+    assert (tracker.num_updates, tracker.num_predictions) == (30, 1)
+
+
+def test_rotation_compensation():
+    aspect_ratio = 0.75
+    tracker = gate_box_tracker.GateBoxTracker(aspect_ratio)
+    # a gate straight ahead, the camera turns right and up between two frames
+    tracker.update(get_box(0.5, 0.5), 0., get_camera_pose())
+    camera_pose = get_camera_pose(yaw=0.1, pitch=0.05)
+    box = tracker.predict(0.01, camera_pose)
+    u, v, _ = gate_roi.project_point(airsim.Vector3r(10., 0., 0.), camera_pose.position, camera_pose.orientation, 640, 480)
+    assert (box[1] + box[3]) / 2 == pytest.approx(u / 640., abs=1e-6)
+    assert (box[0] + box[2]) / 2 == pytest.approx(v / 480., abs=1e-6)
+    # to the left and down in the frame
+    assert u / 640. < 0.5 and v / 480. > 0.5
+
+    # the rotation is applied from the orientation of the last frame, not again from the first one
+    box = tracker.predict(0.02, camera_pose)
+    assert (box[1] + box[3]) / 2 == pytest.approx(u / 640., abs=1e-6)
+
+
+def test_rotate_normalized_point():
+    q = get_camera_pose().orientation
+    assert gate_box_tracker.rotate_normalized_point(0.3, 0.8, q, q, 0.75) == pytest.approx((0.3, 0.8))
+    # the camera turned back
+    assert gate_box_tracker.rotate_normalized_point(0.5, 0.5, q, get_camera_pose(yaw=math.pi).orientation, 0.75) is None
+
+
+def test_reset_after_lost_detections():
+    tracker = gate_box_tracker.GateBoxTracker()
+    assert tracker.predict(0., get_camera_pose()) is None
+    tracker.update(get_box(0.5, 0.5), 0., get_camera_pose(), gate_idx=3)
+    assert tracker.predict(gate_box_tracker.MAX_PREDICTION_TIME - 0.01, get_camera_pose()) is not None
+    # too long without a detection
+    assert tracker.predict(gate_box_tracker.MAX_PREDICTION_TIME + 0.01, get_camera_pose()) is None
+    assert not tracker.is_tracking()
+
+    # a new track starts from the next detection
+    tracker.update(get_box(0.2, 0.4), 1., get_camera_pose(), gate_idx=3)
+    assert tracker.predict(1.1, get_camera_pose()) == pytest.approx(get_box(0.2, 0.4))
+
+    # the box of the next gate is not mixed with the one of the previous gate
+    tracker.update(get_box(0.7, 0.3), 1.2, get_camera_pose(), gate_idx=4)
+    assert tracker.gate_idx == 4
+    assert tracker.predict(1.21, get_camera_pose()) == pytest.approx(get_box(0.7, 0.3))
+
+    # the gate went behind the camera
+    assert tracker.predict(1.25, get_camera_pose(yaw=math.pi)) is None
+    assert not tracker.is_tracking()
@@ -0,0 +1,93 @@
+import math
+import numpy as np
+import pytest
+import airsimneurips as airsim
+import cv2
+import gate_roi
+
+FRAME_SHAPE = (480, 640, 3)
+FOCAL_LENGTH = 320.     # of a 640 pixels wide frame at 90 degrees
+
+
+def get_camera_pose(x=0., y=0., z=0., yaw=0.):
+    return airsim.Pose(airsim.Vector3r(x, y, z), airsim.Quaternionr(z_val=math.sin(yaw / 2), w_val=math.cos(yaw / 2)))
+
+
+def to_crop_boxes(frame_boxes, roi):
+    '''
+        pixel boxes of the frame -> normalized boxes of the crop of roi, what the detector finds in the crop
+    '''
+    y0, x0, y1, x1 = roi
+    return (np.asarray(frame_boxes, dtype=np.float64) - [y0, x0, y0, x0]) / [y1 - y0, x1 - x0, y1 - y0, x1 - x0]
+
+
+def test_projection():
+    camera_pose = get_camera_pose(1., 2., -3.)
+    u, v, depth = gate_roi.project_point(airsim.Vector3r(11., 4., -4.), camera_pose.position, camera_pose.orientation, 640, 480)
+    # y is right and z is down in the image
+    assert (u, v, depth) == pytest.approx((320. + FOCAL_LENGTH * 2. / 10., 240. - FOCAL_LENGTH * 1. / 10., 10.))
+    assert gate_roi.project_point(airsim.Vector3r(-5., 0., 0.), airsim.Vector3r(), airsim.Quaternionr(), 640, 480) is None
+
+    # the camera turned to +y sees the gate on +y in the center of the frame
+    camera_pose = get_camera_pose(yaw=math.pi / 2)
+    u, v, depth = gate_roi.project_point(airsim.Vector3r(0., 10., 0.), camera_pose.position, camera_pose.orientation, 640, 480)
+    assert (u, v, depth) == pytest.approx((320., 240., 10.))
+
+
+def test_round_trip_in_the_frame():
+    roi_finder = gate_roi.GateROI()
+    roi = roi_finder.get_roi(FRAME_SHAPE, airsim.Vector3r(10., 0., 0.), get_camera_pose())
+    half_size = gate_roi.ROI_MARGIN * gate_roi.GATE_SIZE * FOCAL_LENGTH / 10. / 2.
+    assert roi == (int(240 - half_size), int(320 - half_size), int(240 + half_size), int(320 + half_size))
+
+    frame_boxes = np.array([[200., 290., 280., 350.], [roi[0], roi[1], roi[2], roi[3]]])
+    boxes = roi_finder.to_frame_boxes(to_crop_boxes(frame_boxes, roi), roi, FRAME_SHAPE)
+    np.testing.assert_allclose(boxes, frame_boxes / [480., 640., 480., 640.])
+    # boxes of a batch
+    boxes = roi_finder.to_frame_boxes(to_crop_boxes(frame_boxes, roi)[None], roi, FRAME_SHAPE)
+    assert boxes.shape == (1, 2, 4)
+
+
+def test_round_trip_clipped_at_the_border():
+    roi_finder = gate_roi.GateROI()
+    # the gate center projects 20 pixels left of the right border, the square goes out of the frame
+    gate_position = airsim.Vector3r(10., (620. - 320.) * 10. / FOCAL_LENGTH, 0.)
+    roi = roi_finder.get_roi(FRAME_SHAPE, gate_position, get_camera_pose())
+    assert roi is not None
+    assert roi[3] == 640 and roi[3] - roi[1] < roi[2] - roi[0]
+
+    frame_boxes = np.array([[210., 600., 270., 640.], [roi[0], roi[1], roi[2], roi[3]]])
+    boxes = roi_finder.to_frame_boxes(to_crop_boxes(frame_boxes, roi), roi, FRAME_SHAPE)
+    np.testing.assert_allclose(boxes, frame_boxes / [480., 640., 480., 640.])
+    assert boxes[1].tolist() == pytest.approx([roi[0] / 480., roi[1] / 640., roi[2] / 480., 1.])
+
+    # clipped at the top left corner
+    gate_position = airsim.Vector3r(10., -(320. - 30.) * 10. / FOCAL_LENGTH, -(240. - 30.) * 10. / FOCAL_LENGTH)
+    roi = roi_finder.get_roi(FRAME_SHAPE, gate_position, get_camera_pose())
+    assert roi[:2] == (0, 0)
+    boxes = roi_finder.to_frame_boxes(np.array([[0., 0., 0.5, 0.5]]), roi, FRAME_SHAPE)
+    assert boxes[0].tolist() == pytest.approx([0., 0., roi[2] / 2 / 480., roi[3] / 2 / 640.])
+
+
+def test_full_frame():
+    roi_finder = gate_roi.GateROI()
+    # behind the camera
+    assert roi_finder.get_roi(FRAME_SHAPE, airsim.Vector3r(-10., 0., 0.), get_camera_pose()) is None
+    # mostly out of the frame
+    assert roi_finder.get_roi(FRAME_SHAPE, airsim.Vector3r(10., 10.5, 0.), get_camera_pose()) is None
+    # closer than the frame is large
+    assert roi_finder.get_roi(FRAME_SHAPE, airsim.Vector3r(1., 0., 0.), get_camera_pose()) is None
+    # far away gates get at least min_size
+    roi = roi_finder.get_roi(FRAME_SHAPE, airsim.Vector3r(100., 0., 0.), get_camera_pose())
+    assert roi[2] - roi[0] == gate_roi.ROI_MIN_SIZE
+    assert str(roi_finder) == "roi = 1, full frame = 3"
+
+
+@pytest.mark.skipif(not hasattr(cv2, "resize"), reason="needs opencv")
+def test_crop():
+    roi_finder = gate_roi.GateROI(input_size=32)
+    img = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    img[100:200, 300:400] = 255
+    crop = roi_finder.crop(img, (100, 300, 200, 400))
+    assert crop.shape == (32, 32, 3) and crop.min() == 255
+    assert roi_finder.crop(img, (0, 0, 50, 50)) is crop
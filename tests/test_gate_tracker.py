@@ -0,0 +1,44 @@
+import types
+import numpy as np
+import gate_tracker
+
+
+def make_pose(x, y, z):
+    return types.SimpleNamespace(position=types.SimpleNamespace(x_val=x, y_val=y, z_val=z))
+
+
+GATE_CENTERS = gate_tracker.get_gate_centers([make_pose(10. * i, 0., 0.) for i in range(6)])
+PASS_DISTANCES = [1.] * 6
+
+
+def test_gate_centers():
+    assert GATE_CENTERS.shape == (6, 3)
+    assert np.array_equal(GATE_CENTERS[2], [20., 0., 0.])
+    assert gate_tracker.get_gate_centers([]).shape == (0, 3)
+
+
+def test_no_gate_passed():
+    assert gate_tracker.get_last_gate_passed_idx(GATE_CENTERS, 1, [0., 0., 0.], [5., 0., 0.], PASS_DISTANCES) == -1
+    assert gate_tracker.get_last_gate_passed_idx(GATE_CENTERS, 1, None, [5., 0., 0.], PASS_DISTANCES) == -1
+
+
+def test_gate_passed_at_the_sample():
+    assert gate_tracker.get_last_gate_passed_idx(GATE_CENTERS, 1, None, [10.5, 0., 0.], PASS_DISTANCES) == 1
+
+
+def test_gates_passed_between_two_samples():
+    # the samples are on both sides of gates 1 and 2
+    assert gate_tracker.get_last_gate_passed_idx(GATE_CENTERS, 1, [5., 0., 0.], [25., 0., 0.], PASS_DISTANCES) == 2
+    # a segment passing next to the gate, not within the pass distance
+    assert gate_tracker.get_last_gate_passed_idx(GATE_CENTERS, 1, [5., 2., 0.], [15., 2., 0.], PASS_DISTANCES) == -1
+
+
+def test_lookahead():
+    # gate 4 is further than the lookahead from the next gate
+    assert gate_tracker.get_last_gate_passed_idx(GATE_CENTERS, 1, [5., 0., 0.], [45., 0., 0.], PASS_DISTANCES, lookahead=3) == 3
+
+
+def test_end_of_track():
+    assert gate_tracker.get_last_gate_passed_idx(GATE_CENTERS, 6, [45., 0., 0.], [55., 0., 0.], PASS_DISTANCES) == -1
+    # the gates without a pass distance are not tracked
+    assert gate_tracker.get_last_gate_passed_idx(GATE_CENTERS, 3, [25., 0., 0.], [55., 0., 0.], PASS_DISTANCES[:4]) == 3
@@ -0,0 +1,97 @@
+import threading
+import types
+import pytest
+import iteration_pipeline
+
+RACE_TIME = 40.
+RESET_TIME = 0.2
+
+
+class FakeClock(object):
+    '''
+        shared by the racer thread and the pipeline thread, advance_to() lets both run "at the same time"
+    '''
+    def __init__(self):
+        self.now = 100.
+        self.lock = threading.Lock()
+
+    def perf_counter(self):
+        return self.now
+
+    def advance_to(self, t):
+        with self.lock:
+            self.now = max(self.now, t)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(iteration_pipeline, "time", types.SimpleNamespace(perf_counter=clock.perf_counter))
+    return clock
+
+
+def run_iterations(clock, pipeline, num_iterations, task_time):
+    '''
+        races of RACE_TIME, then finish_iteration (task_time on the pipeline thread) overlapped with a reset of RESET_TIME
+    '''
+    observed = []
+
+    def finish_iteration(iteration, race_time):
+        clock.advance_to(end + task_time)
+        observed.append((iteration, race_time))
+        return f"hyper {iteration + 1}"
+
+    pipeline.start_race()
+    for iteration in range(1, num_iterations + 1):
+        clock.advance_to(clock.now + RACE_TIME)
+        end = clock.now
+        next_hyper = pipeline.submit(finish_iteration, iteration, RACE_TIME)
+        clock.advance_to(end + RESET_TIME)
+        assert pipeline.wait(next_hyper, iteration, RACE_TIME) == f"hyper {iteration + 1}"
+    return observed
+
+
+def test_work_shorter_than_reset(clock, tmp_path):
+    stats_file_name = str(tmp_path / "ga_iterations.txt")
+    pipeline = iteration_pipeline.IterationPipeline(stats_file_name)
+    assert pipeline.get_iterations_per_hour() == 0.
+    observed = run_iterations(clock, pipeline, 5, task_time=0.05)
+    pipeline.close()
+
+    assert observed == [(iteration, RACE_TIME) for iteration in range(1, 6)]
+    # only the reset is dead time
+    assert pipeline.dead_time == pytest.approx(RESET_TIME)
+    assert pipeline.get_mean_dead_time() == pytest.approx(RESET_TIME)
+    assert pipeline.num_iterations == 5
+    assert pipeline.get_iterations_per_hour() == pytest.approx(3600. / (RACE_TIME + RESET_TIME))
+    with open(stats_file_name) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 5
+    assert lines[-1] == f"iteration: 5, race time: {RACE_TIME}, dead time: 0.20 s, iterations/hour: {3600. / (RACE_TIME + RESET_TIME):.1f}"
+
+
+def test_work_longer_than_reset(clock):
+    pipeline = iteration_pipeline.IterationPipeline()
+    run_iterations(clock, pipeline, 3, task_time=1.)
+    pipeline.close()
+    # the next race waits for the work, not for the work and the reset one after the other
+    assert pipeline.dead_time == pytest.approx(1.)
+    assert pipeline.get_iterations_per_hour() == pytest.approx(3600. / (RACE_TIME + 1.))
+
+
+def test_iterations_per_hour_window(clock):
+    pipeline = iteration_pipeline.IterationPipeline(window=2)
+    run_iterations(clock, pipeline, 2, task_time=0.)
+    # slower races are only seen once they fill the window
+    pipeline.start_race()
+    clock.advance_to(clock.now + 3 * RACE_TIME)
+    pipeline.start_race()
+    clock.advance_to(clock.now + 3 * RACE_TIME)
+    pipeline.start_race()
+    pipeline.close()
+    assert pipeline.get_iterations_per_hour() == pytest.approx(3600. / (3 * RACE_TIME))
+
+
+def test_iteration_file_name():
+    assert iteration_pipeline.get_iteration_file_name("po5_2.txt") == "po5_2_iterations.txt"
+    assert iteration_pipeline.get_iteration_file_name("logs/ga") == "logs/ga_iterations.txt"
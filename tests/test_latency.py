@@ -0,0 +1,56 @@
+import numpy as np
+import latency
+
+
+def test_small_values_are_exact():
+    histogram = latency.LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.get_percentiles([50, 90, 100]) == [50, 90, 100]
+    assert histogram.get_mean() == 50.5
+    assert histogram.min == 1 and histogram.max == 100
+
+
+def test_percentiles_relative_error():
+    histogram = latency.LatencyHistogram()
+    values = np.random.RandomState(0).lognormal(mean=8., sigma=1.5, size=10000).astype(int) + 1
+    for value in values:
+        histogram.record(value)
+    percentiles = [50, 90, 99, 99.9]
+    expected = np.percentile(values, percentiles, method="inverted_cdf")
+    for value, exact in zip(histogram.get_percentiles(percentiles), expected):
+        assert exact <= value <= exact * (1. + 2. ** (1 - latency.SUB_BUCKET_BITS))
+
+
+def test_values_are_clamped():
+    histogram = latency.LatencyHistogram(max_value=1000)
+    histogram.record(-5)
+    histogram.record(10 ** 9)
+    assert histogram.min == 0
+    assert histogram.get_percentiles([100]) == [1000]
+
+
+def test_empty():
+    histogram = latency.LatencyHistogram()
+    assert histogram.get_percentiles() == [0] * len(latency.PERCENTILES)
+    assert histogram.get_mean() == 0.
+    histogram.record(7)
+    histogram.reset()
+    assert histogram.total_count == 0
+
+
+def test_recorder(tmp_path):
+    recorder = latency.LatencyRecorder()
+    start = recorder.record("phase_1", 0.)
+    recorder.record("phase_2", start)
+    histograms = recorder.get_histograms()
+    assert list(histograms) == ["phase_1", "phase_2"]
+    assert recorder.get_histograms() == {}
+
+    file_path = latency.get_latency_file_name(str(tmp_path / "po5_2.txt"))
+    assert file_path == str(tmp_path / "po5_2_latency.txt")
+    latency.write_histograms(file_path, "iteration: 1", histograms)
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+    assert lines[1] == "iteration: 1"
+    assert lines[2].split()[0] == "phase_1" and lines[3].split()[0] == "phase_2"
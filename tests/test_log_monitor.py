@@ -0,0 +1,208 @@
+import os
+import time
+import numpy as np
+import benchmark_log_monitor
+import log_monitor
+
+HEADER = "header\nheader\nheader\n"
+
+
+def write_log(log_dir, name, lines):
+    file_path = os.path.join(str(log_dir), name)
+    with open(file_path, "w") as f:
+        f.write(HEADER + "".join(line + "\n" for line in lines))
+    return file_path
+
+
+def test_partial_line(tmp_path):
+    file_path = write_log(tmp_path, "race.log", ["drone_1 0 100 time 100"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    monitor.update()
+    with open(file_path, "a") as f:
+        f.write("drone_1 0 200 gates_pa")
+    assert not monitor.check_gate_passed(1)
+    with open(file_path, "a") as f:
+        f.write("ssed 1\ndrone_1 0 210 time 210\n")
+    assert monitor.check_gate_passed(1)
+    assert monitor.get_current_race_time() == 0.21
+
+
+def test_check_gate_passed_is_exact(tmp_path):
+    # gate 3 has no gates_passed line
+    write_log(tmp_path, "race.log", [
+        "drone_1 0 100 gates_passed 1",
+        "drone_1 0 200 gates_passed 2",
+        "drone_1 0 300 gates_passed 4",
+        "drone_2 0 300 gates_passed 5",
+        "drone_1 0 310 time 310"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    assert monitor.check_gate_passed(1)
+    assert monitor.check_gate_passed("2")
+    assert not monitor.check_gate_passed(3)
+    assert monitor.check_gate_passed(4)
+    assert not monitor.check_gate_passed(5)
+    assert monitor.check_gate_passed(5, "drone_2")
+    assert not monitor.check_gate_passed(0)
+
+
+def get_score_at_gate_line_scan(file_path, gate_idx):
+    '''
+        scoring of the line scan LogMonitor.get_score_at_gate used to do, for drone_1
+    '''
+    counter = 0
+    penalty = 0
+    gate_passed_time = -1
+    with open(file_path) as f:
+        lines = f.readlines()[log_monitor.NUM_HEADER_LINES:]
+    for line in lines:
+        token = line.split()
+        if token[-2] == "gates_passed" and token[0] == "drone_1" and token[-1] == gate_idx:
+            gate_passed_time = int(token[2]) / 1000.
+            counter = 1
+        elif counter == 1 and token[-2] == "gates_missed":
+            return (1000, 0)
+        elif counter == 1 and not token[-2] == "collision_count":
+            return (gate_passed_time, penalty)
+        elif counter == 1 and token[-2] == "collision_count":
+            counter = 2
+        elif counter == 2 and token[-2] == "penalty":
+            penalty = int(token[-1]) / 1000.
+            return (gate_passed_time, penalty)
+    return (1000, 0)
+
+
+def test_scores_match_line_scan(tmp_path):
+    file_path = os.path.join(str(tmp_path), "race.log")
+    for seed in range(5):
+        benchmark_log_monitor.generate_race_log(file_path, 2000, drone_names=["drone_1"], seed=seed)
+        monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+        times, penalties = monitor.get_scores_at_gates(benchmark_log_monitor.NUM_GATES + 2)
+        for gate_idx in range(1, benchmark_log_monitor.NUM_GATES + 3):
+            expected = get_score_at_gate_line_scan(file_path, str(gate_idx))
+            assert monitor.get_score_at_gate(str(gate_idx)) == expected
+            assert (times[gate_idx - 1], penalties[gate_idx - 1]) == expected
+
+
+def test_missed_gate_and_collision(tmp_path):
+    write_log(tmp_path, "race.log", [
+        "drone_1 0 100 gates_passed 1",
+        "drone_1 0 100 time 100",
+        "drone_1 0 200 gates_passed 2",
+        "drone_1 0 200 collision_count 1",
+        "drone_1 0 200 penalty 3000",
+        "drone_1 0 300 gates_passed 3",
+        "drone_1 0 300 gates_missed 1",
+        "drone_1 0 400 gates_passed 4"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    assert monitor.get_score_at_gate(1) == (0.1, 0.)
+    assert monitor.get_score_at_gate(2) == (0.2, 3.)
+    assert monitor.get_score_at_gate(3) == log_monitor.NOT_PASSED_SCORE
+    # the line after the last gate has not been written yet
+    assert monitor.get_score_at_gate(4) == log_monitor.NOT_PASSED_SCORE
+    assert monitor.get_score_at_gate(5) == log_monitor.NOT_PASSED_SCORE
+    assert monitor.check_gate_missed("drone_1")
+    assert monitor.check_collision("drone_1")
+
+
+def test_collision_waits_for_penalty(tmp_path):
+    file_path = write_log(tmp_path, "race.log", [
+        "drone_1 0 100 gates_passed 1",
+        "drone_1 0 100 collision_count 1"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    assert monitor.get_score_at_gate(1) == log_monitor.NOT_PASSED_SCORE
+    with open(file_path, "a") as f:
+        f.write("drone_1 0 110 time 110\n")
+    assert monitor.get_score_at_gate(1) == log_monitor.NOT_PASSED_SCORE
+    with open(file_path, "a") as f:
+        f.write("drone_1 0 120 penalty 3000\n")
+    assert monitor.get_score_at_gate(1) == (0.1, 3.)
+
+
+def test_events(tmp_path):
+    file_path = write_log(tmp_path, "race.log", [])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    events = []
+    monitor.on_gate_passed(events.append)
+    monitor.on_finished(events.append)
+    with open(file_path, "a") as f:
+        f.write("drone_1 0 100 gates_passed 1\ndrone_1 0 200 finished 0\ndrone_1 0 300 finished 1\n")
+    monitor.update()
+    assert [(event.kind, event.time, event.value) for event in events] == [("gate_passed", 100, 1), ("finished", 300, 1)]
+
+
+def test_new_race_log(tmp_path):
+    write_log(tmp_path, "race_1.log", [
+        "drone_1 0 100 gates_passed 1",
+        "drone_1 0 110 time 110"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    assert monitor.check_gate_passed(1)
+    # simStartRace/simResetRace start a new log
+    time.sleep(0.01)
+    write_log(tmp_path, "race_2.log", ["drone_1 0 50 time 50"])
+    assert not monitor.check_gate_passed(1)
+    assert monitor.get_current_race_time() == 0.05
+
+
+def test_race_log_rewritten_in_place(tmp_path):
+    file_path = write_log(tmp_path, "race.log", [
+        "drone_1 0 100 gates_passed 1",
+        "drone_1 0 200 gates_passed 2",
+        "drone_1 0 210 time 210"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    assert monitor.check_gate_passed(2)
+    # truncated and written again under the same name, the directory does not change
+    write_log(tmp_path, "race.log", ["drone_1 0 50 gates_passed 1"])
+    assert not monitor.check_gate_passed(2)
+    assert monitor.check_gate_passed(1)
+    assert monitor.get_current_race_time() == 0.05
+    with open(file_path, "a") as f:
+        f.write("drone_1 0 60 time 60\n")
+    assert monitor.get_current_race_time() == 0.06
+
+
+def test_race_log_replaced(tmp_path):
+    write_log(tmp_path, "race.log", ["drone_1 0 100 gates_passed 1", "drone_1 0 110 time 110"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    assert monitor.check_gate_passed(1)
+    new_path = write_log(tmp_path, "new.tmp", ["drone_1 0 500 time 500", "drone_1 0 600 time 600"])
+    os.replace(new_path, os.path.join(str(tmp_path), "race.log"))
+    assert not monitor.check_gate_passed(1)
+    assert monitor.get_current_race_time() == 0.6
+
+
+def test_older_log_rewritten_in_place(tmp_path):
+    write_log(tmp_path, "a.log", ["drone_1 0 100 time 100"])
+    time.sleep(0.01)
+    write_log(tmp_path, "b.log", ["drone_1 0 200 time 200"])
+    log_directory = log_monitor.RaceLogDirectory(str(tmp_path) + os.sep, rescan_period=0.)
+    assert log_directory.get_latest_log().endswith("b.log")
+    time.sleep(0.01)
+    write_log(tmp_path, "a.log", ["drone_1 0 300 time 300"])
+    assert log_directory.get_latest_log().endswith("a.log")
+
+
+def test_gates_resolved_per_drone(tmp_path):
+    write_log(tmp_path, "race.log", [
+        "drone_1 0 100 gates_passed 1",
+        "drone_2 0 100 gates_missed 1",
+        "drone_1 0 110 time 110",
+        "drone_2 0 200 gates_passed 3",
+        "drone_2 0 200 time 200",
+        "drone_1 0 300 finished 1",
+        "drone_2 0 400 finished 1"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    assert monitor.get_score_at_gate(1, "drone_1") == (0.1, 0.)
+    assert not monitor.check_gate_missed("drone_1")
+    assert monitor.check_gate_missed("drone_2")
+    assert monitor.get_last_gate_idx_before_termination("drone_1") == 0
+    assert monitor.get_last_gate_idx_before_termination("drone_2") == 2
+    assert monitor.get_score(300, "drone_1") == (0.3, 1, 0, 0.)
+    assert monitor.read_log("drone_2") == (0.4, 3, 1, 0.)
+
+
+def test_scores_of_unknown_drone(tmp_path):
+    write_log(tmp_path, "race.log", ["drone_1 0 100 gates_passed 1"])
+    monitor = log_monitor.LogMonitor(str(tmp_path) + os.sep)
+    times, penalties = monitor.get_scores_at_gates(3, "drone_2")
+    assert np.all(times == log_monitor.NOT_PASSED_SCORE[0])
+    assert np.all(penalties == log_monitor.NOT_PASSED_SCORE[1])
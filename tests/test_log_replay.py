@@ -0,0 +1,93 @@
+import os
+import benchmark_log_monitor
+import log_monitor
+import log_replay
+
+
+def test_replay_is_identical(tmp_path):
+    log_path = str(tmp_path / "race.log")
+    benchmark_log_monitor.generate_race_log(log_path, 500)
+    out_dir = str(tmp_path / "replay")
+    out_path = log_replay.RaceLogReplayer([log_path], out_dir, speed=0, chunk_lines=7).replay_file(log_path)
+    with open(log_path) as f, open(out_path) as g:
+        assert f.read() == g.read()
+
+
+def test_monitor_follows_replay(tmp_path):
+    log_path = str(tmp_path / "race.log")
+    benchmark_log_monitor.generate_race_log(log_path, 500, drone_names=["drone_1"])
+    out_dir = str(tmp_path / "replay")
+    monitor = log_monitor.LogMonitor(out_dir + os.sep)
+    gates_passed = []
+
+    def on_chunk(race_time):
+        gates_passed.append(monitor.get_drone_state("drone_1").gates_passed)
+
+    log_replay.RaceLogReplayer([log_path], out_dir, speed=0).replay(on_chunk=on_chunk)
+    assert gates_passed == sorted(gates_passed)
+    assert gates_passed[-1] == benchmark_log_monitor.NUM_GATES
+    assert monitor.get_drone_state("drone_1").finished
+
+
+def run_probe(log_path, out_dir, **kwargs):
+    probe = [None]
+
+    def on_race_start(out_path):
+        probe[0] = log_replay.TerminationProbe(log_monitor.LogMonitor(out_dir + os.sep), **kwargs)
+
+    log_replay.RaceLogReplayer([log_path], out_dir, speed=0).replay(on_race_start, lambda race_time: probe[0].check())
+    return probe[0]
+
+
+def test_termination_probe(tmp_path):
+    log_path = str(tmp_path / "race.log")
+    out_dir = str(tmp_path / "replay")
+    with open(log_path, "w") as f:
+        f.write("header\nheader\nheader\n")
+        for gate_idx in range(1, 15):
+            f.write(f"drone_1 0 {100 * gate_idx} gates_passed {gate_idx}\n")
+            f.write(f"drone_1 0 {100 * gate_idx} time {100 * gate_idx}\n")
+    probe = run_probe(log_path, out_dir, finish_gate_idx=13)
+    assert probe.reason == "is_race_finished"
+    assert probe.terminated_at == 1.4
+
+    probe = run_probe(log_path, out_dir, best_time=0.5)
+    assert probe.reason == "is_slower_than_last_race"
+    assert probe.terminated_at > 0.5
+
+    # the last drone of the synthetic log misses a gate
+    benchmark_log_monitor.generate_race_log(log_path, 500)
+    probe = run_probe(log_path, out_dir)
+    assert probe.reason == "is_drone_missed_some_gate"
+
+
+def write_gates_log(file_path, num_gates):
+    with open(file_path, "w") as f:
+        f.write("header\nheader\nheader\n")
+        for gate_idx in range(1, num_gates + 1):
+            f.write(f"drone_1 0 {100 * gate_idx} gates_passed {gate_idx}\n")
+            f.write(f"drone_1 0 {100 * gate_idx} time {100 * gate_idx}\n")
+
+
+def test_replay_into_used_out_dir(tmp_path):
+    a_path, b_path = str(tmp_path / "a.log"), str(tmp_path / "b.log")
+    write_gates_log(a_path, 3)
+    write_gates_log(b_path, 14)
+    out_dir = str(tmp_path / "replay")
+    log_replay.RaceLogReplayer([a_path, b_path], out_dir, speed=0).replay()
+    monitor = log_monitor.LogMonitor(out_dir + os.sep)
+    assert monitor.get_drone_state("drone_1").gates_passed == 14
+
+    # the same races again: the monitor follows the new files, the old ones are left as they are
+    out_paths = []
+    gates_passed = []
+
+    def on_chunk(race_time):
+        gates_passed.append((os.path.basename(out_paths[-1]), monitor.get_drone_state("drone_1").gates_passed))
+
+    log_replay.RaceLogReplayer([a_path, b_path], out_dir, speed=0).replay(out_paths.append, on_chunk)
+    assert [os.path.basename(out_path) for out_path in out_paths] == ["a_1.log", "b_1.log"]
+    assert max(num for name, num in gates_passed if name == "a_1.log") == 3
+    assert gates_passed[-1] == ("b_1.log", 14)
+    with open(os.path.join(out_dir, "a.log")) as f, open(a_path) as g:
+        assert f.read() == g.read()
@@ -0,0 +1,80 @@
+import os
+import time
+import numpy as np
+import race_log_archive
+
+
+def write_log(log_dir, name, lines):
+    file_path = os.path.join(str(log_dir), name)
+    with open(file_path, "w") as f:
+        f.write("header\nheader\nheader\n" + "".join(line + "\n" for line in lines))
+    return file_path
+
+
+def write_logs(log_dir):
+    return [
+        write_log(log_dir, "2019-10-01-10-00-00_Soccer_Field_Easy_tier_1_1.log", [
+            "drone_1 0 100 odometry_XYZRPY (1.000,2.000,3.000,0.000,0.000,90.000)",
+            "drone_1 0 1000 gates_passed 1",
+            "drone_2 0 1500 gates_passed 1",
+            "drone_1 0 2500 gates_passed 2",
+            "drone_1 0 3000 finished 1"]),
+        write_log(log_dir, "2019-10-01-11-00-00_Qualifier_Tier_2_tier_2_1.log", [
+            "drone_1 0 2000 gates_passed 1",
+            "drone_1 0 2600 gates_missed 1",
+            "drone_1 0 4000 gates_passed 1",
+            "drone_1 0 5000 gates_passed 3"])]
+
+
+def test_encode():
+    dictionary = ["drone_1"]
+    encoded = race_log_archive.encode(["drone_2", "drone_1", "drone_2"], dictionary)
+    assert dictionary == ["drone_1", "drone_2"]
+    assert encoded.tolist() == [1, 0, 1]
+    assert [dictionary[code] for code in encoded] == ["drone_2", "drone_1", "drone_2"]
+
+
+def test_parse_log_file_name(tmp_path):
+    file_path = write_logs(tmp_path)[1]
+    level, tier, race_number, start_time = race_log_archive.parse_log_file_name(file_path)
+    assert (level, tier, race_number) == ("Qualifier_Tier_2", 2, 1)
+    assert time.localtime(start_time)[:6] == (2019, 10, 1, 11, 0, 0)
+
+
+def test_save_load_round_trip(tmp_path):
+    archive = race_log_archive.RaceLogArchive()
+    assert archive.add_logs(write_logs(tmp_path)) == 2
+    archive_path = str(tmp_path / "archive.npz")
+    archive.save(archive_path)
+    loaded = race_log_archive.RaceLogArchive.load(archive_path)
+    assert loaded.num_races == 2
+    assert loaded.drone_names == archive.drone_names
+    assert loaded.event_names == archive.event_names
+    for name in ["event_race", "event_drone", "event_code", "event_time", "event_value", "odom_xyzrpy",
+                 "race_file_name", "race_level", "race_tier", "race_event_rows", "race_odom_rows"]:
+        assert np.array_equal(getattr(loaded, name), getattr(archive, name))
+    assert loaded.odom_xyzrpy.tolist() == [[1., 2., 3., 0., 0., 90.]]
+    assert loaded.select_races(level="Qualifier_Tier_2").tolist() == [1]
+    assert loaded.select_races(tier=1).tolist() == [0]
+
+
+def test_add_logs_skips_known_races(tmp_path):
+    log_files = write_logs(tmp_path)
+    archive = race_log_archive.RaceLogArchive()
+    archive.add_logs(log_files[:1])
+    num_events = len(archive.event_race)
+    assert archive.add_logs(log_files) == 1
+    assert archive.add_logs(log_files) == 0
+    assert archive.num_races == 2
+    assert archive.race_event_rows.tolist() == [[0, num_events], [num_events, len(archive.event_race)]]
+
+
+def test_first_pass_time_per_gate(tmp_path):
+    archive = race_log_archive.RaceLogArchive()
+    archive.add_logs(write_logs(tmp_path))
+    times = archive.get_gate_passed_times(3)
+    # gate 1 of the second race is passed twice, the first pass counts
+    assert np.array_equal(times, [[1., 2.5, np.nan], [2., np.nan, 5.]], equal_nan=True)
+    assert np.array_equal(archive.get_gate_passed_times(3, "drone_2"), [[1.5, np.nan, np.nan], [np.nan] * 3], equal_nan=True)
+    assert np.array_equal(archive.get_gate_passed_times(2, races=[1]), [[2., np.nan]], equal_nan=True)
+    assert np.array_equal(archive.get_gate_splits(2, races=[0]), [[1., 1.5]])
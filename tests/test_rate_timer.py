@@ -0,0 +1,82 @@
+import types
+import pytest
+import rate_timer
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, duration):
+        self.now += duration
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_timer, "time", types.SimpleNamespace(perf_counter=clock.perf_counter, sleep=clock.sleep))
+    return clock
+
+
+def run(clock, durations, **kwargs):
+    '''
+        runs a task taking durations[i] seconds on its i-th call, returns the start times of the calls
+    '''
+    calls = []
+
+    def task():
+        calls.append(clock.now - 100.)
+        clock.now += durations[len(calls) - 1]
+
+    timer = rate_timer.RateTimer(task, 0.5, **kwargs)
+    timer.run(lambda: len(calls) < len(durations))
+    return timer, calls
+
+
+def test_absolute_deadlines(clock):
+    timer, calls = run(clock, [0.1, 0.3, 0.49, 0.2] * 25)
+    # the duration of the task does not shift the next calls
+    assert calls == pytest.approx([0.5 * i for i in range(100)])
+    assert timer.num_overruns == 0 and timer.num_skipped == 0
+
+
+def test_overrun_skips_missed_ticks(clock):
+    timer, calls = run(clock, [0.1, 1.2, 0.1, 0.1])
+    # the second call runs until 1.7, the deadlines 1.0 and 1.5 are skipped
+    assert calls == pytest.approx([0., 0.5, 2.0, 2.5])
+    assert timer.num_overruns == 1 and timer.num_skipped == 2
+
+
+def test_overrun_catches_up(clock):
+    timer, calls = run(clock, [0.1, 1.2, 0.1, 0.1, 0.1], catch_up=True, max_catch_up=1)
+    # the deadline 1.5 is run late, right away, 1.0 is skipped
+    assert calls == pytest.approx([0., 0.5, 1.7, 2.0, 2.5])
+    assert timer.num_overruns == 1 and timer.num_skipped == 1
+
+    timer, calls = run(clock, [0.1, 1.2, 0.1, 0.1, 0.1], catch_up=True, max_catch_up=2)
+    # both missed deadlines are run back to back
+    assert [call - calls[0] for call in calls] == pytest.approx([0., 0.5, 1.7, 1.8, 2.0])
+    assert timer.num_skipped == 0
+
+
+def test_jitter_stats(clock):
+    timer, calls = run(clock, [0.1, 0.6, 0.1, 0.1], catch_up=True, max_catch_up=1)
+    # the third call starts 0.1 s after its deadline
+    stats = timer.get_stats()
+    assert stats["ticks"] == 4
+    assert stats["jitter_max"] == pytest.approx(0.1)
+    assert stats["jitter_p50"] == pytest.approx(0.)
+    assert "ticks = 4" in str(timer)
+
+
+def test_jitter_window(clock):
+    timer = rate_timer.RateTimer(lambda: None, 0.5)
+    for i in range(rate_timer.JITTER_WINDOW + 10):
+        timer.record_jitter(1. if i < 10 else 0.)
+    # the first jitters are out of the window, the maximum is kept
+    assert timer.get_stats()["jitter_p99"] == 0.
+    assert timer.get_stats()["jitter_max"] == 1.
+    assert rate_timer.RateTimer(lambda: None, 0.5).get_stats()["jitter_p50"] == 0.
@@ -0,0 +1,103 @@
+import os
+import threading
+import log_monitor
+import termination
+
+
+def write_log(log_dir, lines):
+    file_path = os.path.join(str(log_dir), "race.log")
+    with open(file_path, "w") as f:
+        f.write("header\nheader\nheader\n" + "".join(line + "\n" for line in lines))
+    return file_path
+
+
+def get_evaluator(monitor, best_time, **kwargs):
+    # the log conditions of BaselineRacer
+    conditions = [
+        (termination.SLOWER_THAN_LAST_RACE, lambda: monitor.get_current_race_time("drone_1") > best_time),
+        (termination.DRONE_MISSED_SOME_GATE, lambda: monitor.check_gate_missed("drone_1"))]
+    return termination.TerminationEvaluator(conditions, **kwargs)
+
+
+def test_slower_than_best(tmp_path):
+    file_path = write_log(tmp_path, ["drone_1 0 1000 time 1000"])
+    evaluator = get_evaluator(log_monitor.LogMonitor(str(tmp_path) + os.sep), best_time=2.)
+    assert evaluator.evaluate() == termination.NOT_TERMINATED
+    with open(file_path, "a") as f:
+        f.write("drone_1 0 1500 penalty 1000\n")
+    # time + penalty
+    assert evaluator.evaluate() == termination.SLOWER_THAN_LAST_RACE
+    assert evaluator.get_reason_name() == "slower than the best recorded time"
+
+
+def test_missed_gate(tmp_path):
+    file_path = write_log(tmp_path, ["drone_1 0 100 gates_passed 1", "drone_2 0 100 gates_missed 1"])
+    evaluator = get_evaluator(log_monitor.LogMonitor(str(tmp_path) + os.sep), best_time=1000.)
+    # the gate missed by the other drone does not count
+    assert evaluator.evaluate() == termination.NOT_TERMINATED
+    with open(file_path, "a") as f:
+        f.write("drone_1 0 200 gates_passed 3\ndrone_1 0 200 gates_missed 1\n")
+    assert evaluator.evaluate() == termination.DRONE_MISSED_SOME_GATE
+
+
+def test_first_condition_wins_and_stays():
+    holds = {termination.DRONE_STUCKED: False, termination.DRONE_COLLIDED: True}
+    evaluator = termination.TerminationEvaluator([(reason, lambda reason=reason: holds[reason]) for reason in holds])
+    assert evaluator.evaluate() == termination.DRONE_COLLIDED
+    holds[termination.DRONE_STUCKED] = True
+    assert evaluator.evaluate() == termination.DRONE_COLLIDED
+    evaluator.reset()
+    assert evaluator.evaluate() == termination.DRONE_STUCKED
+
+
+def test_result_of_previous_race_is_dropped():
+    started, release = threading.Event(), threading.Event()
+
+    def slow_condition():
+        started.set()
+        release.wait(1.)
+        return True
+
+    evaluator = termination.TerminationEvaluator([(termination.DRONE_MISSED_SOME_GATE, slow_condition)])
+    evaluator.start_evaluator_thread()
+    try:
+        evaluator.post_odometry()
+        assert started.wait(1.)
+        # the next race starts while the sample of the previous one is evaluated
+        evaluator.reset()
+        release.set()
+        assert not evaluator.wait_for_evaluation()
+        assert evaluator.get_reason() == termination.NOT_TERMINATED
+    finally:
+        evaluator.stop_evaluator_thread()
+
+
+def test_tick_waits_for_its_sample(tmp_path):
+    file_path = write_log(tmp_path, ["drone_1 0 100 gates_passed 1"])
+    evaluator = get_evaluator(log_monitor.LogMonitor(str(tmp_path) + os.sep), best_time=1000., wait_timeout=1.)
+    evaluator.start_evaluator_thread()
+    try:
+        evaluator.post_odometry()
+        assert not evaluator.wait_for_evaluation()
+        with open(file_path, "a") as f:
+            f.write("drone_1 0 200 gates_missed 1\n")
+        # the termination is known to the tick that posted the sample, not the next one
+        evaluator.post_odometry()
+        assert evaluator.wait_for_evaluation()
+        assert evaluator.get_reason() == termination.DRONE_MISSED_SOME_GATE
+    finally:
+        evaluator.stop_evaluator_thread()
+
+
+def test_wait_is_bounded():
+    release = threading.Event()
+    evaluator = termination.TerminationEvaluator([(termination.DRONE_STUCKED, lambda: release.wait(1.))], wait_timeout=0.01)
+    evaluator.start_evaluator_thread()
+    try:
+        evaluator.post_odometry()
+        # the evaluation is still running, the tick goes on
+        assert not evaluator.wait_for_evaluation()
+        release.set()
+    finally:
+        evaluator.stop_evaluator_thread()
+    assert evaluator.is_terminated()
@@ -0,0 +1,106 @@
+import math
+import numpy as np
+import pytest
+import airsimneurips as airsim
+import baseline_racer
+import track_cache
+
+GATE_NAMES = ["Gate0", "Gate10_21", "Gate1_3", "Gate2_5", "Gate3_7", "Gate4_9", "Gate5_11", "Gate6_13", "Gate7_15", "Gate8_17", "Gate9_19"]
+
+
+def get_quaternion(yaw, pitch=0., roll=0.):
+    cy, sy = math.cos(yaw / 2), math.sin(yaw / 2)
+    cp, sp = math.cos(pitch / 2), math.sin(pitch / 2)
+    cr, sr = math.cos(roll / 2), math.sin(roll / 2)
+    return airsim.Quaternionr(x_val=sr * cp * cy - cr * sp * sy, y_val=cr * sp * cy + sr * cp * sy,
+                              z_val=cr * cp * sy - sr * sp * cy, w_val=cr * cp * cy + sr * sp * sy)
+
+
+class FakeClient(object):
+    '''
+        simListSceneObjects and simGetObjectPose of a level, the first pose of nan_gates is nan
+    '''
+    def __init__(self, nan_gates=()):
+        rng = np.random.RandomState(0)
+        self.poses = {}
+        for gate_name in GATE_NAMES:
+            idx = int(gate_name.split('_')[0][4:])
+            self.poses[gate_name] = airsim.Pose(airsim.Vector3r(10. * idx, rng.uniform(-5, 5), -rng.uniform(1, 3)),
+                                                get_quaternion(*rng.uniform(-math.pi, math.pi, 3)))
+        self.nan_gates = set(nan_gates)
+        self.num_pose_queries = 0
+
+    def simListSceneObjects(self, name_regex):
+        return list(reversed(GATE_NAMES))
+
+    def simGetObjectPose(self, gate_name):
+        self.num_pose_queries += 1
+        if gate_name in self.nan_gates:
+            self.nan_gates.remove(gate_name)
+            return airsim.Pose(airsim.Vector3r(math.nan, math.nan, math.nan))
+        return self.poses[gate_name]
+
+
+def test_build_load_round_trip(tmp_path):
+    client = FakeClient(nan_gates=["Gate3_7"])
+    cache = track_cache.TrackCache(str(tmp_path))
+    track = cache.build(client, "Qualifier_Tier_1")
+    assert track.gate_names == GATE_NAMES[:1] + GATE_NAMES[2:] + GATE_NAMES[1:2]
+    assert (tmp_path / "Qualifier_Tier_1.npz").exists()
+
+    loaded = cache.load("Qualifier_Tier_1")
+    assert loaded.level_name == "Qualifier_Tier_1"
+    assert loaded.gate_names == track.gate_names
+    for name in ("positions", "orientations", "facing_vectors", "distances"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(track, name))
+    assert loaded.distances.shape == (len(GATE_NAMES) - 1,)
+    for gate_name, pose in zip(loaded.gate_names, loaded.get_poses()):
+        expected = client.poses[gate_name]
+        assert [pose.position.x_val, pose.position.y_val, pose.position.z_val] == \
+            pytest.approx([expected.position.x_val, expected.position.y_val, expected.position.z_val])
+        assert [pose.orientation.w_val, pose.orientation.x_val, pose.orientation.y_val, pose.orientation.z_val] == \
+            pytest.approx([expected.orientation.w_val, expected.orientation.x_val, expected.orientation.y_val, expected.orientation.z_val])
+
+    # a cached track is not queried again
+    num_pose_queries = client.num_pose_queries
+    assert cache.get_track(client, "Qualifier_Tier_1").gate_names == track.gate_names
+    assert client.num_pose_queries == num_pose_queries
+
+
+def test_missing_or_other_version(tmp_path):
+    cache = track_cache.TrackCache(str(tmp_path))
+    assert cache.load("Qualifier_Tier_1") is None
+    track = cache.build(FakeClient(), "Qualifier_Tier_1")
+    data = dict(np.load(cache.get_path("Qualifier_Tier_1")))
+    data["version"] = track_cache.TRACK_CACHE_VERSION + 1
+    np.savez(cache.get_path("Qualifier_Tier_1"), **data)
+    assert cache.load("Qualifier_Tier_1") is None
+    assert cache.get_track(FakeClient(), "Qualifier_Tier_1").gate_names == track.gate_names
+    assert cache.load("Qualifier_Tier_1") is not None
+
+
+def test_validate(tmp_path):
+    client = FakeClient()
+    cache = track_cache.TrackCache(str(tmp_path), validate=True, num_validation_gates=len(GATE_NAMES))
+    track = cache.build(client, "Qualifier_Tier_1")
+    assert cache.is_valid(client, track)
+
+    # a gate moved, the track is fetched again
+    moved = client.poses["Gate4_9"]
+    client.poses["Gate4_9"] = airsim.Pose(airsim.Vector3r(moved.position.x_val + 1., moved.position.y_val, moved.position.z_val), moved.orientation)
+    assert not cache.is_valid(client, cache.load("Qualifier_Tier_1"))
+    track = cache.get_track(client, "Qualifier_Tier_1")
+    assert track.positions[4, 0] == pytest.approx(moved.position.x_val + 1.)
+    assert cache.is_valid(client, cache.load("Qualifier_Tier_1"))
+
+
+def test_facing_vectors_match_the_racer():
+    rng = np.random.RandomState(1)
+    quaternions = [get_quaternion(*rng.uniform(-math.pi, math.pi, 3)) for _ in range(20)]
+    # not normalized, and degenerate
+    quaternions += [airsim.Quaternionr(0.3, -1.2, 0.5, 2.0), airsim.Quaternionr(0., 0., 0., 0.)]
+    orientations = [[q.w_val, q.x_val, q.y_val, q.z_val] for q in quaternions]
+    facing_vectors = track_cache.get_facing_vectors(orientations)
+    for q, facing_vector in zip(quaternions, facing_vectors):
+        expected = baseline_racer.BaselineRacer.get_gate_facing_vector_from_quaternion(None, q)
+        assert facing_vector == pytest.approx([expected.x_val, expected.y_val, expected.z_val])
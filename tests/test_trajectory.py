@@ -0,0 +1,56 @@
+import types
+import numpy as np
+import trajectory
+
+
+def vector(x, y=0., z=0.):
+    return types.SimpleNamespace(x_val=x, y_val=y, z_val=z)
+
+
+def fill(buffer, num_samples):
+    for i in range(num_samples):
+        buffer.append(100. + i, vector(i, 1.), vector(2. * i), i // 2, i % 2 == 0)
+
+
+def test_export():
+    buffer = trajectory.TrajectoryBuffer(capacity=8)
+    fill(buffer, 5)
+    samples = buffer.export()
+    assert len(buffer) == 5
+    assert samples.dtype == trajectory.TRAJECTORY_DTYPE
+    assert np.array_equal(samples["t"], np.arange(5.))
+    assert np.array_equal(samples["position"][:, 0], np.arange(5.))
+    assert np.array_equal(samples["position"][:, 1], np.ones(5))
+    assert np.array_equal(samples["velocity"][:, 0], 2. * np.arange(5))
+    assert np.array_equal(samples["next_gate_idx"], [0, 0, 1, 1, 2])
+    assert np.array_equal(samples["detect_flag"], [True, False, True, False, True])
+
+
+def test_export_wraps_around():
+    buffer = trajectory.TrajectoryBuffer(capacity=8)
+    fill(buffer, 8)
+    assert np.array_equal(buffer.export()["t"], np.arange(8.))
+    fill(buffer, 3)
+    samples = buffer.export()
+    assert len(samples) == 8
+    # the 3 oldest samples are overwritten, the 3 new ones come last
+    assert np.array_equal(samples["t"], [3., 4., 5., 6., 7., 0., 1., 2.])
+    assert np.array_equal(samples["position"][:, 0], [3., 4., 5., 6., 7., 0., 1., 2.])
+
+
+def test_reset():
+    buffer = trajectory.TrajectoryBuffer(capacity=8)
+    fill(buffer, 11)
+    buffer.reset()
+    assert len(buffer.export()) == 0
+    buffer.append(50., vector(1.), vector(1.), 0, False)
+    assert np.array_equal(buffer.export()["t"], [0.])
+
+
+def test_save(tmp_path):
+    buffer = trajectory.TrajectoryBuffer(capacity=8)
+    fill(buffer, 3)
+    file_path = trajectory.get_trajectory_file_name(str(tmp_path / "po5_2.txt"), 12)
+    assert file_path == str(tmp_path / "po5_2_trajectories" / "iteration_0012.npy")
+    buffer.save(file_path)
+    assert np.array_equal(np.load(file_path), buffer.export())